@@ -1,24 +1,90 @@
 from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from flask_migrate import Migrate
 from config import config
 from models import db
+import click
 import os
 
-def create_app(config_name='development'):
-    """Create and configure Flask application"""
+def _is_cli_command():
+    """True while a `flask` CLI command other than `run` is loading the app"""
+    ctx = click.get_current_context(silent=True)
+    return ctx is not None and ctx.info_name != 'run'
+
+def create_app(config_name='development', start_background=True):
+    """Create and configure Flask application
+
+    start_background=False builds the app without background threads (the
+    maintenance sweeper), e.g. for report worker processes. CLI commands such
+    as `flask db upgrade` never start them either.
+    """
     app = Flask(__name__)
     
     # Load configuration
     app.config.from_object(config[config_name])
     
     # Initialize extensions
+    from services.db_pool import configure_engine_options, instrument_engines
+    configure_engine_options(app)
     db.init_app(app)
+    Migrate(app, db)
+    instrument_engines(app, db)
+    
+    # Request timing, /metrics and slow request log
+    from services.profiling import request_profiler
+    request_profiler.init_app(app, db)
+    
+    # Route GET reads to replicas (no-op without DB_REPLICA_URLS)
+    from services.db_routing import replica_router
+    replica_router.init_app(app, db)
+    
+    # Catalog version counters for HTTP ETags
+    from services.db_routing import RoutingSession
+    from services.http_cache import register_version_tracking
+    register_version_tracking(RoutingSession)
+    
+    # Tombstones of deleted rows for delta sync
+    from services.sync import register_tombstones
+    register_tombstones(RoutingSession)
+
     CORS(app, origins=app.config['CORS_ORIGINS'], supports_credentials=True)
     jwt = JWTManager(app)
 
-    # Create upload folder if it doesn't exist
+    # Configure in-process caches
+    from services.promotion_catalog import promotion_catalog
+    from services.notification_counters import unread_counter
+    promotion_catalog.ttl = app.config['PROMOTION_CACHE_TTL']
+    unread_counter.ttl = app.config['NOTIFICATION_COUNTER_TTL']
+    
+    # Server-side apartment catalog cache
+    from services.response_cache import configure_response_cache
+    configure_response_cache(app)
+    
+    # Notification push channel
+    from services.notification_stream import configure_broker
+    configure_broker(
+        app.config['NOTIFICATION_BROKER_URL'],
+        max_connections=app.config['NOTIFICATION_STREAM_MAX_CONNECTIONS']
+    )
+    
+    # Background report generation
+    from services.reports import report_runner
+    report_runner.init_app(app, config_name)
+    
+    # Payment gateway adapters
+    from services.payment_gateway import configure_gateways
+    configure_gateways(app)
+    
+    # Expired payment / stale booking sweeper
+    from services.sweeper import sweeper
+    sweeper.init_app(app)
+    if start_background and app.config['SWEEPER_ENABLED'] and not _is_cli_command():
+        sweeper.start()
+
+    # Create upload and report folders if they don't exist
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    os.makedirs(app.config['REPORT_FOLDER'], exist_ok=True)
     
     # Register blueprints
     from routes.auth import auth_bp
@@ -31,6 +97,8 @@ def create_app(config_name='development'):
     from routes.notifications import notifications_bp
     from routes.admin import admin_bp
     from routes.promotions import promotions_bp
+    from routes.exports import exports_bp
+    from routes.sync import sync_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(apartments_bp)
@@ -42,6 +110,8 @@ def create_app(config_name='development'):
     app.register_blueprint(notifications_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(promotions_bp)
+    app.register_blueprint(exports_bp)
+    app.register_blueprint(sync_bp)
     
     # Serve uploaded files
     @app.route('/uploads/<path:filename>')
@@ -56,6 +126,95 @@ def create_app(config_name='development'):
             'message': 'Vida View API is running'
         }), 200
     
+    # CLI commands
+    @app.cli.command('repair-ratings')
+    def repair_ratings_command():
+        """Recompute apartment rating aggregates from approved reviews"""
+        from services.ratings import recompute_rating_aggregates
+        processed = recompute_rating_aggregates()
+        print(f'Rating aggregates recomputed for {processed} apartments')
+    
+    @app.cli.command('repair-favorite-counts')
+    def repair_favorite_counts_command():
+        """Recompute apartment favorites counts from the favorites table"""
+        from services.favorites import recompute_favorite_counts
+        processed = recompute_favorite_counts()
+        print(f'Favorites counts recomputed for {processed} apartments')
+    
+    @app.cli.command('sweep')
+    def sweep_command():
+        """Expire overdue payments and cancel stale bookings"""
+        from services.sweeper import sweeper
+        results = sweeper.run()
+        stats = sweeper.stats()
+        if results is None:
+            print('A sweep is already running')
+        elif stats['last_error']:
+            print(f"Sweep failed: {stats['last_error']}")
+        else:
+            print(f"Sweep finished in {stats['last_duration_ms']}ms: {results}")
+    
+    @app.cli.command('generate-invoices')
+    @click.option('--as-of', help='Billing date (YYYY-MM-DD), defaults to today')
+    @click.option('--lead-days', type=int, help='Bill periods starting within this many days')
+    def generate_invoices_command(as_of, lead_days):
+        """Generate monthly rent invoices for active bookings"""
+        from datetime import datetime
+        from services.billing import generate_rent_invoices
+        summary = generate_rent_invoices(
+            as_of=datetime.strptime(as_of, '%Y-%m-%d').date() if as_of else None,
+            lead_days=lead_days if lead_days is not None else app.config['BILLING_LEAD_DAYS']
+        )
+        print(f"Created {summary['invoices_created']} invoices for {summary['leases_scanned']} "
+              f"active bookings ({summary['leases_prepaid']} fully prepaid) in {summary['duration_ms']}ms")
+    
+    @app.cli.command('generate-data')
+    @click.option('--users', type=int, default=10000)
+    @click.option('--apartments', type=int, default=2000)
+    @click.option('--bookings', type=int, default=20000)
+    @click.option('--notifications', type=int, default=100000)
+    @click.option('--activity-logs', type=int, default=100000)
+    @click.option('--seed', type=int, default=42, help='Same seed and starting database give the same rows')
+    @click.option('--chunk-size', type=int, default=10000, help='Rows per INSERT batch and commit')
+    @click.option('--yes', is_flag=True, help='Do not ask for confirmation')
+    def generate_data_command(users, apartments, bookings, notifications, activity_logs, seed, chunk_size, yes):
+        """Bulk-generate synthetic users, apartments, bookings, payments, notifications and activity logs"""
+        from sqlalchemy.engine import make_url
+        from services.datagen import DatasetGenerator
+        if not yes:
+            target = make_url(app.config['SQLALCHEMY_DATABASE_URI']).render_as_string(hide_password=True)
+            click.confirm(f"Add synthetic rows to {target}?", abort=True)
+        
+        def progress(table, count, seconds):
+            rate = count / seconds if seconds else 0
+            print(f'{table:15} {count:>10} rows in {seconds:7.2f}s ({rate:,.0f} rows/s)')
+        
+        generator = DatasetGenerator(seed=seed, chunk_size=chunk_size, progress=progress)
+        counts = generator.run(users, apartments, bookings, notifications, activity_logs)
+        print(f'Generated {sum(counts.values())} rows')
+    
+    @app.cli.command('query-budgets')
+    def query_budgets_command():
+        """List the SQL query budget declared by each route"""
+        from services.query_budget import get_route_budgets
+        for endpoint, budget in get_route_budgets(app).items():
+            print(f"{endpoint:45} {budget if budget is not None else '-'}")
+    
+    @app.cli.command('check-query-plans')
+    def check_query_plans_command():
+        """EXPLAIN the hot queries and fail if one does not use its index"""
+        from services.query_plans import check_query_plans
+        results = check_query_plans()
+        for result in results:
+            status = 'ok' if result['uses_index'] else 'MISSING INDEX'
+            sort_note = ' (sorts)' if result['sorts'] else ''
+            print(f"{result['query']:35} {result['index']:32} {status}{sort_note}")
+            if not result['uses_index']:
+                for row in result['plan']:
+                    print(f'    {row}')
+        if not all(result['uses_index'] for result in results):
+            raise SystemExit(1)
+    
     # Error handlers
     @app.errorhandler(404)
     def not_found(error):
@@ -91,7 +250,8 @@ def create_app(config_name='development'):
     return app
 
 if __name__ == '__main__':
-    app = create_app()
+    # With the debug reloader only the serving child process (WERKZEUG_RUN_MAIN) runs background services
+    app = create_app(start_background=os.environ.get('WERKZEUG_RUN_MAIN') == 'true')
     with app.app_context():
         db.create_all()  # Create tables if they don't exist
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
@@ -0,0 +1,301 @@
+"""Load test for the core API flows.
+
+Seeds a synthetic dataset with services.datagen (users, apartments, leases
+and payments) plus photos, facilities and reviews, then
+drives each flow with concurrent in-process clients and reports latency
+percentiles, throughput and SQL statements per request (read from the
+Server-Timing header). Results can be saved as a baseline and later runs
+fail when a flow's p95 or query count regresses past it.
+
+    python -m benchmarks.api_flows --apartments 2000 --bookings 20000 --clients 16
+    python -m benchmarks.api_flows --save-baseline
+    python -m benchmarks.api_flows --baseline benchmarks/api_flows_baseline.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import build_app
+from services.datagen import UNIT_TYPES
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api_flows_baseline.json')
+
+FACILITIES = ['Kolam Renang', 'Gym', 'Parkir', 'Keamanan 24/7', 'Wi-Fi', 'AC', 'Kitchen Set', 'Water Heater']
+
+def _insert(model, rows, chunk=5000):
+    from models import db
+    for start in range(0, len(rows), chunk):
+        db.session.execute(db.insert(model), rows[start:start + chunk])
+
+def seed(users, apartments, bookings, reviews, seed_value):
+    """Create the synthetic dataset. Returns the ids the flows need.
+
+    Users, apartments, leases and their payments come from DatasetGenerator
+    (the same rows `flask generate-data` writes); on top of them go what the
+    listing and detail pages show: facilities, photos and approved reviews of
+    completed leases.
+    """
+    from models import db, User, Apartment, UnitPhoto, Facility, ApartmentFacility, Booking, Payment, Review
+    from services.datagen import DatasetGenerator
+    from services.ratings import recompute_rating_aggregates
+
+    db.drop_all()
+    db.create_all()
+    DatasetGenerator(seed=seed_value).run(users, apartments, bookings, notifications=0, activity_logs=0)
+
+    rng = random.Random(f'{seed_value}:catalog')
+    now = datetime.utcnow()
+    apartment_ids = [apartment_id for (apartment_id,) in db.session.query(Apartment.id).order_by(Apartment.id)]
+
+    _insert(Facility, [{'name': name, 'category': 'building', 'status': 'active'} for name in FACILITIES])
+    facility_ids = [facility_id for (facility_id,) in db.session.query(Facility.id).order_by(Facility.id)]
+
+    photo_rows = []
+    facility_rows = []
+    for apartment_id in apartment_ids:
+        for order in range(rng.randint(1, 3)):
+            photo_rows.append({'apartment_id': apartment_id, 'photo_url': f'/uploads/apartments/bench_{apartment_id}_{order}.jpg',
+                               'photo_type': 'other', 'display_order': order, 'is_cover': order == 0, 'created_at': now})
+        for facility_id in rng.sample(facility_ids, 3):
+            facility_rows.append({'apartment_id': apartment_id, 'facility_id': facility_id, 'created_at': now})
+    _insert(UnitPhoto, photo_rows)
+    _insert(ApartmentFacility, facility_rows)
+
+    completed = db.session.query(Booking.id, Booking.apartment_id, Booking.tenant_id).filter(
+        Booking.status == 'completed'
+    ).order_by(Booking.id).limit(reviews).all()
+    _insert(Review, [{
+        'apartment_id': apartment_id, 'tenant_id': tenant_id, 'booking_id': booking_id,
+        'rating': rng.choice([3, 4, 4, 5, 5]), 'review_text': 'Unit bersih dan nyaman',
+        'is_approved': rng.random() < 0.8, 'approved_at': now, 'created_at': now
+    } for booking_id, apartment_id, tenant_id in completed])
+    db.session.commit()
+    recompute_rating_aggregates()
+
+    def user_ids(role):
+        return [user_id for (user_id,) in db.session.query(User.id).filter(User.role == role).order_by(User.id)]
+
+    return {
+        'admin_id': user_ids('admin')[0],
+        'owner_ids': user_ids('owner'),
+        'tenant_ids': user_ids('tenant'),
+        'apartment_ids': apartment_ids,
+        'available_ids': [apartment_id for (apartment_id,) in db.session.query(Apartment.id).filter(
+            Apartment.availability_status == 'available'
+        ).order_by(Apartment.id)],
+        # Rent invoices of running leases that the tenants have not paid yet
+        'pending_payment_ids': [payment_id for (payment_id,) in db.session.query(Payment.id).filter(
+            Payment.payment_type == 'monthly_rent',
+            Payment.payment_status == 'pending'
+        ).order_by(Payment.id)]
+    }
+
+def build_flows(app, data, rng):
+    """Request factories per flow. Each returns (method, url, json, headers)"""
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        def token(user_id):
+            return {'Authorization': 'Bearer ' + create_access_token(identity=str(user_id))}
+        admin = token(data['admin_id'])
+        owners = [token(user_id) for user_id in data['owner_ids'][:50]]
+        tenants = [token(user_id) for user_id in data['tenant_ids'][:200]]
+
+    payments = iter(data['pending_payment_ids'])
+    payments_lock = threading.Lock()
+
+    def listing():
+        unit_type, *_ = rng.choice(UNIT_TYPES)
+        return 'GET', f'/api/apartments?unit_type={unit_type}&page={rng.randint(1, 5)}&per_page=12', None, {}
+
+    def detail():
+        return 'GET', f'/api/apartments/{rng.choice(data["apartment_ids"])}', None, {}
+
+    def create_booking():
+        # After every seeded lease ends, on units without a running lease, so requests
+        # are not rejected as already booked or unavailable
+        start_date = date.today() + timedelta(days=rng.randint(300, 700))
+        body = {
+            'apartment_id': rng.choice(data['available_ids']),
+            'start_date': start_date.isoformat(),
+            'end_date': (start_date + timedelta(days=200)).isoformat()
+        }
+        return 'POST', '/api/bookings', body, rng.choice(tenants)
+
+    def verify_payment():
+        with payments_lock:
+            payment_id = next(payments, None)
+        if payment_id is None:
+            return None
+        return 'POST', f'/api/payments/{payment_id}/verify', {'approved': True}, admin
+
+    def admin_dashboard():
+        return 'GET', '/api/admin/dashboard', None, admin
+
+    def owner_dashboard():
+        return 'GET', '/api/admin/owner-dashboard', None, rng.choice(owners)
+
+    return {
+        'listing_search': listing,
+        'apartment_detail': detail,
+        'create_booking': create_booking,
+        'verify_payment': verify_payment,
+        'admin_dashboard': admin_dashboard,
+        'owner_dashboard': owner_dashboard
+    }
+
+QUERIES_PATTERN = re.compile(r'desc="(\d+) queries"')
+
+def run_flow(app, make_request, requests, clients):
+    """Send `requests` requests from `clients` threads. Returns latency samples and counters"""
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+    samples = []
+    queries = []
+    errors = [0]
+
+    def client():
+        http = app.test_client()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+                spec = make_request()
+            if spec is None:
+                return
+            method, url, body, headers = spec
+            started = time.perf_counter()
+            response = http.open(url, method=method, json=body, headers=headers)
+            elapsed = time.perf_counter() - started
+            match = QUERIES_PATTERN.search(response.headers.get('Server-Timing', ''))
+            with lock:
+                samples.append(elapsed * 1000)
+                if match:
+                    queries.append(int(match.group(1)))
+                if response.status_code >= 400:
+                    errors[0] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, queries, errors[0], time.perf_counter() - started
+
+def percentile(ordered, percent):
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 2)
+
+def summarize(samples, queries, errors, elapsed):
+    ordered = sorted(samples)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'p50_ms': percentile(ordered, 50),
+        'p95_ms': percentile(ordered, 95),
+        'p99_ms': percentile(ordered, 99),
+        'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else None,
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None
+    }
+
+def compare(results, baseline, tolerance):
+    """Flows whose p95 or query count got worse than the baseline allows"""
+    regressions = []
+    for flow, result in results.items():
+        expected = baseline.get(flow)
+        if not expected:
+            continue
+        if expected.get('p95_ms') and result['p95_ms'] and result['p95_ms'] > expected['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{flow}: p95 {result['p95_ms']}ms > baseline {expected['p95_ms']}ms")
+        if expected.get('queries_per_request') is not None and result['queries_per_request'] is not None \
+                and result['queries_per_request'] > expected['queries_per_request']:
+            regressions.append(
+                f"{flow}: {result['queries_per_request']} queries/request > baseline {expected['queries_per_request']}"
+            )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Core API flow load test')
+    parser.add_argument('--database-url', help='Database URL (default: temporary SQLite file)')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--apartments', type=int, default=500)
+    parser.add_argument('--bookings', type=int, default=5000)
+    parser.add_argument('--reviews', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent clients per flow')
+    parser.add_argument('--requests', type=int, default=300, help='Requests per flow')
+    parser.add_argument('--flows', help='Comma-separated subset of flows to run')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95 slowdown over the baseline')
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if not database_url:
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'api_flows_bench.db')
+
+    app = build_app(database_url)
+    # Query counts are part of the report; keep the slow request and N+1 logs out of it
+    app.config['SLOW_REQUEST_MS'] = 60000
+    app.config['QUERY_BUDGET_MODE'] = 'off'
+
+    started = time.perf_counter()
+    with app.app_context():
+        data = seed(args.users, args.apartments, args.bookings, args.reviews, args.seed)
+    seeded = time.perf_counter() - started
+
+    flows = build_flows(app, data, random.Random(args.seed))
+    if args.flows:
+        flows = {name: flows[name] for name in args.flows.split(',')}
+
+    results = {}
+    for name, make_request in flows.items():
+        results[name] = summarize(*run_flow(app, make_request, args.requests, args.clients))
+
+    print(f'database      : {database_url}')
+    print(f'dataset       : {args.users} users, {args.apartments} apartments, {args.bookings} bookings '
+          f'(seeded in {seeded:.2f}s, seed {args.seed})')
+    print(f'clients       : {args.clients} per flow, {args.requests} requests per flow')
+    print()
+    print(f'{"flow":18} {"reqs":>6} {"errs":>5} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"req/s":>8} {"queries":>8}')
+    for name, result in results.items():
+        print(f'{name:18} {result["requests"]:>6} {result["errors"]:>5} {result["p50_ms"]!s:>8} '
+              f'{result["p95_ms"]!s:>8} {result["p99_ms"]!s:>8} {result["throughput_rps"]!s:>8} '
+              f'{result["queries_per_request"]!s:>8}')
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f'\nBaseline saved to {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('\nNo baseline to compare against (run with --save-baseline)')
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print('\nFAIL: regressions against baseline')
+        for regression in regressions:
+            print(f'  {regression}')
+        return 1
+
+    print(f'\nOK: within {args.tolerance:.0%} of baseline p95 and no extra queries')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
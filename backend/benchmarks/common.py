@@ -0,0 +1,18 @@
+"""Shared setup for the benchmark scripts"""
+from config import config, TestingConfig
+
+def build_app(database_url):
+    """Create an app bound to the benchmark database"""
+    options = {}
+    if database_url.startswith('sqlite'):
+        # Writers wait on SQLite's file lock instead of failing immediately
+        options = {'connect_args': {'timeout': 30, 'check_same_thread': False}}
+
+    config['benchmark'] = type('BenchmarkConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'SQLALCHEMY_ENGINE_OPTIONS': options,
+        'QUERY_BUDGET_MODE': 'warn'  # report N+1 patterns without failing the run
+    })
+
+    from app import create_app
+    return create_app('benchmark')
@@ -0,0 +1,148 @@
+"""Concurrent promotion redemption benchmark.
+
+Hammers one limited promotion from many threads and checks that the number of
+successful redemptions never exceeds usage_limit.
+
+    python -m benchmarks.promotion_redemption --threads 32 --attempts 2000 --limit 100
+    python -m benchmarks.promotion_redemption --database-url mysql+pymysql://root:@localhost/vidaview_bench
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import build_app
+
+def seed(limit):
+    """Create the users, apartment and limited promotion used by the run"""
+    from models import db, User, Apartment, Promotion
+
+    db.drop_all()
+    db.create_all()
+
+    owner = User(username='bench_owner', email='bench_owner@example.com', role='owner', password='x')
+    tenant = User(username='bench_tenant', email='bench_tenant@example.com', role='tenant', password='x')
+    db.session.add_all([owner, tenant])
+    db.session.flush()
+
+    apartment = Apartment(unit_number='BENCH-1', unit_type='Studio', price_per_month=Decimal('1000000'), owner_id=owner.id)
+    promotion = Promotion(
+        code='BENCHFLASH',
+        title='Benchmark flash sale',
+        type='percent',
+        value=10,
+        start_date=date.today() - timedelta(days=1),
+        end_date=date.today() + timedelta(days=1),
+        usage_limit=limit,
+        redemption_count=0
+    )
+    db.session.add_all([apartment, promotion])
+    db.session.commit()
+
+    return tenant.id, apartment.id, promotion.id
+
+def run(app, threads, attempts, tenant_id, apartment_id, promotion_id):
+    """Fire redemption attempts from a thread pool. Returns (successes, rejected, errors, seconds)"""
+    from models import db, Booking
+    from services.redemptions import reserve_redemption
+
+    counter = iter(range(attempts))
+    counter_lock = threading.Lock()
+    results = {'success': 0, 'rejected': 0, 'error': 0}
+    results_lock = threading.Lock()
+
+    def worker():
+        while True:
+            with counter_lock:
+                attempt = next(counter, None)
+            if attempt is None:
+                return
+
+            with app.app_context():
+                try:
+                    booking = Booking(
+                        apartment_id=apartment_id,
+                        tenant_id=tenant_id,
+                        booking_code=f'BENCH{attempt:08d}',
+                        start_date=date.today(),
+                        end_date=date.today() + timedelta(days=30),
+                        status='pending'
+                    )
+                    db.session.add(booking)
+                    db.session.flush()
+
+                    if reserve_redemption(promotion_id, booking.id, tenant_id):
+                        db.session.commit()
+                        outcome = 'success'
+                    else:
+                        db.session.rollback()
+                        outcome = 'rejected'
+                except Exception:
+                    db.session.rollback()
+                    outcome = 'error'
+
+            with results_lock:
+                results[outcome] += 1
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return results['success'], results['rejected'], results['error'], elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent promotion redemption benchmark')
+    parser.add_argument('--database-url', help='Database URL (default: temporary SQLite file)')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--attempts', type=int, default=1000)
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if not database_url:
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'redemption_bench.db')
+
+    app = build_app(database_url)
+
+    with app.app_context():
+        tenant_id, apartment_id, promotion_id = seed(args.limit)
+
+    successes, rejected, errors, elapsed = run(
+        app, args.threads, args.attempts, tenant_id, apartment_id, promotion_id
+    )
+
+    with app.app_context():
+        from models import db, Promotion, PromotionRedemption
+        promotion = db.session.get(Promotion, promotion_id)
+        ledger = PromotionRedemption.query.filter_by(promotion_id=promotion_id, status='reserved').count()
+        counter = promotion.redemption_count
+
+    print(f'database      : {database_url}')
+    print(f'threads       : {args.threads}')
+    print(f'attempts      : {args.attempts} in {elapsed:.2f}s ({args.attempts / elapsed:.0f} req/s)')
+    print(f'usage_limit   : {args.limit}')
+    print(f'redeemed      : {successes} (counter={counter}, ledger={ledger})')
+    print(f'rejected      : {rejected}')
+    print(f'errors        : {errors}')
+
+    over_redeemed = successes > args.limit or counter > args.limit or ledger > args.limit
+    consistent = successes == counter == ledger
+    if over_redeemed or not consistent:
+        print('FAIL: redemption count exceeded the limit or ledger is inconsistent')
+        return 1
+
+    print('OK: no over-redemption')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Monthly rent invoice generation benchmark.
+
+Seeds a number of active leases, runs the invoice generator twice and checks
+that the second run creates nothing (idempotency) and that every lease got
+exactly one invoice per due period.
+
+    python -m benchmarks.rent_invoices --leases 100000
+    python -m benchmarks.rent_invoices --database-url mysql+pymysql://root:@localhost/vidaview_bench
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import build_app
+
+def seed(leases, as_of):
+    """Create one owner, tenant and apartment plus `leases` active bookings"""
+    from models import db, User, Apartment, Booking
+    from utils import add_months
+
+    db.drop_all()
+    db.create_all()
+
+    owner = User(username='bench_owner', email='bench_owner@example.com', role='owner', password='x')
+    tenant = User(username='bench_tenant', email='bench_tenant@example.com', role='tenant', password='x')
+    db.session.add_all([owner, tenant])
+    db.session.flush()
+
+    apartment = Apartment(unit_number='BENCH-1', unit_type='Studio', price_per_month=Decimal('1000000'), owner_id=owner.id)
+    db.session.add(apartment)
+    db.session.commit()
+
+    now = datetime.utcnow()
+    rows = []
+    for i in range(leases):
+        # Leases started 0-5 months ago and run for 12 months
+        start_date = add_months(as_of, -(i % 6)).replace(day=1 + i % 28)
+        rows.append({
+            'apartment_id': apartment.id,
+            'tenant_id': tenant.id,
+            'booking_code': f'BENCH{i:08d}',
+            'start_date': start_date,
+            'end_date': add_months(start_date, 12),
+            'total_months': 12,
+            'monthly_rent': Decimal('1000000'),
+            'status': 'active',
+            'created_at': now,
+            'updated_at': now
+        })
+        if len(rows) == 10000:
+            db.session.execute(db.insert(Booking), rows)
+            rows = []
+    if rows:
+        db.session.execute(db.insert(Booking), rows)
+    db.session.commit()
+
+def expected_invoices(as_of, lead_days):
+    """Count the periods the generator should bill, computed independently"""
+    from datetime import timedelta
+    from models import db, Booking
+    from services.billing import billing_periods
+
+    until = as_of + timedelta(days=lead_days)
+    # The seeded leases have no upfront total_amount, so nothing is prepaid
+    return sum(
+        len(billing_periods(start_date, end_date, until, since=as_of))
+        for start_date, end_date in db.session.query(Booking.start_date, Booking.end_date).yield_per(10000)
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Monthly rent invoice generation benchmark')
+    parser.add_argument('--database-url', help='Database URL (default: temporary SQLite file)')
+    parser.add_argument('--leases', type=int, default=20000)
+    parser.add_argument('--lead-days', type=int, default=7)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if not database_url:
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'invoice_bench.db')
+
+    app = build_app(database_url)
+    as_of = date.today()
+
+    with app.app_context():
+        from models import Payment
+        from services.billing import generate_rent_invoices
+
+        started = time.perf_counter()
+        seed(args.leases, as_of)
+        seeded = time.perf_counter() - started
+
+        first = generate_rent_invoices(as_of, args.lead_days, args.chunk_size, notify=False)
+        second = generate_rent_invoices(as_of, args.lead_days, args.chunk_size, notify=False)
+
+        expected = expected_invoices(as_of, args.lead_days)
+        stored = Payment.query.filter_by(payment_type='monthly_rent').count()
+
+    print(f'database      : {database_url}')
+    print(f'leases        : {args.leases} (seeded in {seeded:.2f}s)')
+    print(f'first run     : {first["invoices_created"]} invoices in {first["duration_ms"] / 1000:.2f}s '
+          f'({args.leases / (first["duration_ms"] / 1000):.0f} leases/s)')
+    print(f'rerun         : {second["invoices_created"]} invoices in {second["duration_ms"] / 1000:.2f}s')
+    print(f'stored        : {stored} (expected {expected})')
+
+    if second['invoices_created'] or stored != expected:
+        print('FAIL: rerun created invoices or invoice count is wrong')
+        return 1
+
+    print('OK: invoices generated once per period')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,6 +4,12 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Placeholder webhook secret, only accepted in debug and testing
+DEFAULT_PAYMENT_GATEWAY_SECRET = 'dev-gateway-secret-please-change'
+
+def gateway_list(default):
+    return [g.strip() for g in os.getenv('PAYMENT_GATEWAYS', default).split(',') if g.strip()]
+
 class Config:
     """Base configuration"""
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-please-change')
@@ -22,21 +28,117 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
     
+    # Read replicas: comma-separated URLs. GET requests read from them; writes and
+    # anything after a write stay on the primary
+    REPLICA_URLS = [url.strip() for url in os.getenv('DB_REPLICA_URLS', '').split(',') if url.strip()]
+    SQLALCHEMY_BINDS = {f'replica_{i}': url for i, url in enumerate(REPLICA_URLS)}
+    REPLICA_BINDS = list(SQLALCHEMY_BINDS)
+    REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 5))
+    REPLICA_RETRY_SECONDS = int(os.getenv('DB_REPLICA_RETRY_SECONDS', 30))
+    
+    # Connection pool. Size per worker process: pool_size + max_overflow connections at most.
+    # Keep pool_recycle below MySQL's wait_timeout; pre-ping replaces connections the server closed.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 280)),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+    }
+    
     # Upload configuration
     UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))  # 16MB
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf'}
     
+    # Report jobs
+    REPORT_FOLDER = os.path.join(os.path.dirname(__file__), 'reports')
+    REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', 2))
+    # Jobs still 'generating' after this long (worker died) are failed by the sweeper
+    REPORT_TIMEOUT_MINUTES = int(os.getenv('REPORT_TIMEOUT_MINUTES', 30))
+    # GET /reports/occupancy and /reports/revenue: how long the request waits for its job,
+    # and how long a completed job is reused for the same user and period
+    REPORT_WAIT_SECONDS = float(os.getenv('REPORT_WAIT_SECONDS', 5))
+    REPORT_REUSE_SECONDS = int(os.getenv('REPORT_REUSE_SECONDS', 300))
+    
+    # Bulk apartment import (POST /api/apartments/import)
+    APARTMENT_IMPORT_MAX_ROWS = int(os.getenv('APARTMENT_IMPORT_MAX_ROWS', 5000))
+    
+    # Bulk booking approve/reject/cancel (POST /api/bookings/bulk/<action>)
+    BOOKING_BULK_MAX_ITEMS = int(os.getenv('BOOKING_BULK_MAX_ITEMS', 1000))
+    
+    # Bulk payment verification (POST /api/payments/bulk/verify)
+    PAYMENT_BULK_MAX_ITEMS = int(os.getenv('PAYMENT_BULK_MAX_ITEMS', 500))
+    
+    # Delta sync (GET /api/sync): rows per entity per call, re-read window for late commits,
+    # and how long deletes are remembered (older cursors get a full resync)
+    SYNC_MAX_ROWS = int(os.getenv('SYNC_MAX_ROWS', 500))
+    SYNC_OVERLAP_SECONDS = int(os.getenv('SYNC_OVERLAP_SECONDS', 10))
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+    
+    # Favorites cursor pagination (GET /api/apartments/favorites?limit=...): largest page
+    FAVORITES_MAX_PAGE_SIZE = int(os.getenv('FAVORITES_MAX_PAGE_SIZE', 100))
+    
     # Pagination
     ITEMS_PER_PAGE = 10
     
+    # HTTP caching of public catalog endpoints (seconds browsers/CDNs may reuse a response)
+    CATALOG_CACHE_MAX_AGE = int(os.getenv('CATALOG_CACHE_MAX_AGE', 60))
+    
+    # Request profiling: Server-Timing header, /metrics and slow request log
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    PROFILING_SERVER_TIMING = os.getenv('PROFILING_SERVER_TIMING', 'true').lower() in ('1', 'true', 'yes')
+    PROFILING_MAX_STATEMENTS = int(os.getenv('PROFILING_MAX_STATEMENTS', 50))  # SQL kept per request for the slow log
+    SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', 500))
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # /metrics requires "Authorization: Bearer <token>"; without it only debug/testing serve it
+    
+    # Per-route query budgets (@query_budget) and N+1 detection: off, warn or raise
+    QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE', 'warn')
+    QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', 5))  # same statement this often in one request
+    
+    # Server-side cache of apartment listing/detail payloads. Set a redis:// URL to share it across workers
+    RESPONSE_CACHE_URL = os.getenv('RESPONSE_CACHE_URL')
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 60))
+    
+    # Promotion catalog cache lifetime (seconds)
+    PROMOTION_CACHE_TTL = int(os.getenv('PROMOTION_CACHE_TTL', 60))
+    
+    # Unread notification counter reconcile interval (seconds)
+    NOTIFICATION_COUNTER_TTL = int(os.getenv('NOTIFICATION_COUNTER_TTL', 30))
+    
+    # Notification push (SSE). Set a redis:// URL to fan out across workers
+    NOTIFICATION_BROKER_URL = os.getenv('NOTIFICATION_BROKER_URL')
+    NOTIFICATION_STREAM_HEARTBEAT = int(os.getenv('NOTIFICATION_STREAM_HEARTBEAT', 15))
+    # Open streams per worker process (0: no limit). Each stream holds a thread under threaded
+    # workers and a greenlet under gevent (gunicorn.conf.py); over the cap clients get a 503 and poll
+    NOTIFICATION_STREAM_MAX_CONNECTIONS = int(os.getenv('NOTIFICATION_STREAM_MAX_CONNECTIONS', 1000))
+    
+    # Payment gateways. Comma-separated adapter names from services/payment_gateway.py; none by
+    # default. The app refuses to start outside debug/testing with the default webhook secret
+    PAYMENT_GATEWAYS = gateway_list('')
+    PAYMENT_GATEWAY_SECRET = os.getenv('PAYMENT_GATEWAY_SECRET', DEFAULT_PAYMENT_GATEWAY_SECRET)
+    PAYMENT_GATEWAY_EXPIRY_MINUTES = int(os.getenv('PAYMENT_GATEWAY_EXPIRY_MINUTES', 60))
+    
+    # Maintenance sweeper (expired payments, stale bookings). Off by default (run `flask sweep` from
+    # cron); when enabled, the web server process sweeps every SWEEPER_INTERVAL seconds
+    SWEEPER_ENABLED = os.getenv('SWEEPER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    SWEEPER_INTERVAL = int(os.getenv('SWEEPER_INTERVAL', 300))
+    SWEEPER_BATCH_SIZE = int(os.getenv('SWEEPER_BATCH_SIZE', 200))
+    SWEEPER_MAX_BATCHES = int(os.getenv('SWEEPER_MAX_BATCHES', 50))
+    
+    # Monthly rent invoices are created this many days before each period starts
+    BILLING_LEAD_DAYS = int(os.getenv('BILLING_LEAD_DAYS', 7))
+    
     # CORS
     CORS_ORIGINS = ['http://localhost:3000', 'http://localhost:5173']
 
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
-    SQLALCHEMY_ECHO = True
+    PAYMENT_GATEWAYS = gateway_list('mock')
+    # Per-request SQL is in the Server-Timing header and slow request log; echo everything on demand
+    SQLALCHEMY_ECHO = os.getenv('SQLALCHEMY_ECHO', 'false').lower() in ('1', 'true', 'yes')
 
 class ProductionConfig(Config):
     """Production configuration"""
@@ -47,6 +149,13 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # in-memory SQLite uses a single static connection
+    SQLALCHEMY_BINDS = {}
+    REPLICA_BINDS = []
+    REPORT_WORKERS = 0  # run report jobs inline against the in-memory database
+    SWEEPER_ENABLED = False
+    PAYMENT_GATEWAYS = gateway_list('mock')
+    QUERY_BUDGET_MODE = 'raise'  # budget violations and N+1 patterns fail the request
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,12 @@
+# Production server settings, read by `gunicorn "app:create_app('production')"` from this directory.
+# gevent workers hold each idle notification stream in a greenlet instead of a thread.
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5001')
+workers = int(os.getenv('GUNICORN_WORKERS', 4))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+# Concurrent connections per gevent worker, streams included; keep it above
+# NOTIFICATION_STREAM_MAX_CONNECTIONS so regular requests still get through
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 2000))
+# Worker liveness timeout; under gevent a long-lived stream does not count against it
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
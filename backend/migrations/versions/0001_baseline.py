@@ -0,0 +1,325 @@
+"""Baseline: the schema before the performance series
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19 09:00:00
+
+The tables, keys and indexes of database/vidaview_schema.sql as of the
+commit before versioned migrations, plus the columns the models of that
+time already used (apartments.is_archived/archived_at,
+bookings.promotion_id/discount_amount, the 'verifying' payment status).
+
+On an empty database the upgrade creates all of it. A database created
+from that SQL file already has these tables, so the upgrade only records
+the revision and `flask db upgrade` continues with the later revisions.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Secondary indexes of the SQL file as (table, name, columns)
+SQL_INDEXES = [
+    ('users', 'idx_email', ['email']),
+    ('users', 'idx_role', ['role']),
+    ('users', 'idx_status', ['status']),
+    ('apartments', 'idx_owner', ['owner_id']),
+    ('apartments', 'idx_availability', ['availability_status']),
+    ('apartments', 'idx_unit_type', ['unit_type']),
+    ('promotions', 'idx_code', ['code']),
+    ('promotions', 'idx_active', ['active']),
+    ('bookings', 'idx_booking_code', ['booking_code']),
+    ('bookings', 'idx_status', ['status']),
+    ('bookings', 'idx_dates', ['start_date', 'end_date']),
+    ('payments', 'idx_payment_code', ['payment_code']),
+    ('payments', 'idx_status', ['payment_status']),
+    ('availability_calendar', 'idx_date', ['date']),
+    ('unit_photos', 'idx_apartment', ['apartment_id']),
+    ('reviews', 'idx_apartment', ['apartment_id']),
+    ('reviews', 'idx_approved', ['is_approved']),
+    ('notifications', 'idx_user', ['user_id']),
+    ('notifications', 'idx_read', ['is_read']),
+    ('activity_logs', 'idx_user', ['user_id']),
+    ('activity_logs', 'idx_entity', ['entity_type', 'entity_id']),
+    ('activity_logs', 'idx_action', ['action']),
+    ('payment_transactions', 'idx_transaction_ref', ['transaction_reference'])
+]
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('users'):
+        return
+
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('username', sa.String(length=50), nullable=False, unique=True),
+        sa.Column('email', sa.String(length=100), nullable=False, unique=True),
+        sa.Column('password', sa.String(length=255), nullable=False),
+        sa.Column('full_name', sa.String(length=100)),
+        sa.Column('phone', sa.String(length=20)),
+        sa.Column('role', sa.Enum('tenant', 'owner', 'admin'), nullable=False),
+        sa.Column('profile_photo', sa.String(length=255)),
+        sa.Column('id_card_number', sa.String(length=50)),
+        sa.Column('id_card_photo', sa.String(length=255)),
+        sa.Column('address', sa.Text()),
+        sa.Column('birth_date', sa.Date()),
+        sa.Column('status', sa.Enum('active', 'inactive', 'suspended')),
+        sa.Column('email_verified_at', sa.DateTime()),
+        sa.Column('document_verified_at', sa.DateTime()),
+        sa.Column('last_login', sa.DateTime()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime())
+    )
+
+    op.create_table(
+        'apartments',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('unit_number', sa.String(length=20), nullable=False),
+        sa.Column('unit_type', sa.String(length=50), nullable=False),
+        sa.Column('floor', sa.Integer()),
+        sa.Column('size_sqm', sa.Numeric(8, 2)),
+        sa.Column('bedrooms', sa.Integer()),
+        sa.Column('bathrooms', sa.Integer()),
+        sa.Column('price_per_month', sa.Numeric(12, 2), nullable=False),
+        sa.Column('deposit_amount', sa.Numeric(12, 2)),
+        sa.Column('seasonal_pricing', sa.JSON()),
+        sa.Column('minimum_stay_months', sa.Integer()),
+        sa.Column('description', sa.Text()),
+        sa.Column('furnished', sa.Boolean()),
+        sa.Column('view_direction', sa.String(length=50)),
+        sa.Column('electricity_watt', sa.Integer()),
+        sa.Column('water_source', sa.String(length=50)),
+        sa.Column('parking_slots', sa.Integer()),
+        sa.Column('pet_friendly', sa.Boolean()),
+        sa.Column('smoking_allowed', sa.Boolean()),
+        sa.Column('availability_status', sa.Enum('available', 'occupied')),
+        sa.Column('is_archived', sa.Boolean()),
+        sa.Column('archived_at', sa.DateTime()),
+        sa.Column('owner_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('total_views', sa.Integer()),
+        sa.Column('total_inquiries', sa.Integer()),
+        sa.Column('avg_rating', sa.Numeric(3, 2)),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime())
+    )
+
+    op.create_table(
+        'promotions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('code', sa.String(length=50), unique=True),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text()),
+        sa.Column('type', sa.Enum('percent', 'fixed_amount', 'seasonal', 'coupon', 'special_rate')),
+        sa.Column('value', sa.Numeric(12, 4)),
+        sa.Column('apartment_id', sa.Integer(), sa.ForeignKey('apartments.id', ondelete='CASCADE')),
+        sa.Column('start_date', sa.Date()),
+        sa.Column('end_date', sa.Date()),
+        sa.Column('min_nights', sa.Integer()),
+        sa.Column('active', sa.Boolean()),
+        sa.Column('usage_limit', sa.Integer()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime())
+    )
+
+    op.create_table(
+        'bookings',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('apartment_id', sa.Integer(), sa.ForeignKey('apartments.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('booking_code', sa.String(length=50), nullable=False, unique=True),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('total_months', sa.Integer()),
+        sa.Column('monthly_rent', sa.Numeric(12, 2)),
+        sa.Column('deposit_paid', sa.Numeric(12, 2)),
+        sa.Column('utility_deposit', sa.Numeric(12, 2)),
+        sa.Column('admin_fee', sa.Numeric(12, 2)),
+        sa.Column('promotion_id', sa.Integer(), sa.ForeignKey('promotions.id', ondelete='SET NULL')),
+        sa.Column('discount_amount', sa.Numeric(12, 2)),
+        sa.Column('total_amount', sa.Numeric(12, 2)),
+        sa.Column('status', sa.Enum('pending', 'confirmed', 'active', 'completed', 'cancelled', 'rejected')),
+        sa.Column('rejection_reason', sa.Text()),
+        sa.Column('contract_file', sa.String(length=255)),
+        sa.Column('contract_start_date', sa.Date()),
+        sa.Column('contract_end_date', sa.Date()),
+        sa.Column('auto_renewal', sa.Boolean()),
+        sa.Column('notes', sa.Text()),
+        sa.Column('approved_by', sa.Integer(), sa.ForeignKey('users.id', ondelete='SET NULL')),
+        sa.Column('approved_at', sa.DateTime()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime())
+    )
+
+    op.create_table(
+        'payments',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('booking_id', sa.Integer(), sa.ForeignKey('bookings.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('payment_code', sa.String(length=50), nullable=False, unique=True),
+        sa.Column('payment_type', sa.Enum('deposit', 'monthly_rent', 'penalty', 'refund', 'utility')),
+        sa.Column('amount', sa.Numeric(12, 2), nullable=False),
+        sa.Column('payment_method', sa.Enum('bank_transfer', 'credit_card', 'e_wallet', 'cash')),
+        sa.Column('payment_status', sa.Enum('pending', 'verifying', 'completed', 'failed', 'refunded')),
+        sa.Column('payment_date', sa.DateTime()),
+        sa.Column('due_date', sa.Date()),
+        sa.Column('transaction_id', sa.String(length=100)),
+        sa.Column('payment_gateway_ref', sa.String(length=255)),
+        sa.Column('payment_gateway_response', sa.JSON()),
+        sa.Column('receipt_file', sa.String(length=255)),
+        sa.Column('notes', sa.Text()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime())
+    )
+
+    op.create_table(
+        'availability_calendar',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('apartment_id', sa.Integer(), sa.ForeignKey('apartments.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('status', sa.Enum('available', 'booked', 'blocked')),
+        sa.Column('booking_id', sa.Integer(), sa.ForeignKey('bookings.id', ondelete='SET NULL')),
+        sa.Column('blocked_reason', sa.Text()),
+        sa.Column('price_override', sa.Numeric(12, 2)),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime()),
+        sa.UniqueConstraint('apartment_id', 'date', name='unique_apartment_date')
+    )
+
+    op.create_table(
+        'unit_photos',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('apartment_id', sa.Integer(), sa.ForeignKey('apartments.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('photo_url', sa.String(length=255), nullable=False),
+        sa.Column('photo_type', sa.Enum('main', 'bedroom', 'bathroom', 'kitchen', 'living_room', 'balcony', 'other')),
+        sa.Column('caption', sa.String(length=255)),
+        sa.Column('display_order', sa.Integer()),
+        sa.Column('is_cover', sa.Boolean()),
+        sa.Column('created_at', sa.DateTime())
+    )
+
+    op.create_table(
+        'facilities',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text()),
+        sa.Column('icon', sa.String(length=100)),
+        sa.Column('category', sa.Enum('building', 'unit', 'area')),
+        sa.Column('status', sa.Enum('active', 'inactive')),
+        sa.Column('created_at', sa.DateTime())
+    )
+
+    op.create_table(
+        'apartment_facilities',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('apartment_id', sa.Integer(), sa.ForeignKey('apartments.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('facility_id', sa.Integer(), sa.ForeignKey('facilities.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('created_at', sa.DateTime()),
+        sa.UniqueConstraint('apartment_id', 'facility_id', name='unique_apartment_facility')
+    )
+
+    op.create_table(
+        'reviews',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('apartment_id', sa.Integer(), sa.ForeignKey('apartments.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('booking_id', sa.Integer(), sa.ForeignKey('bookings.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('rating', sa.Integer(), nullable=False),
+        sa.Column('review_text', sa.Text()),
+        sa.Column('photos', sa.JSON()),
+        sa.Column('is_approved', sa.Boolean()),
+        sa.Column('approved_by', sa.Integer(), sa.ForeignKey('users.id', ondelete='SET NULL')),
+        sa.Column('approved_at', sa.DateTime()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.CheckConstraint('rating >= 1 AND rating <= 5')
+    )
+
+    op.create_table(
+        'favorites',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('apartment_id', sa.Integer(), sa.ForeignKey('apartments.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('created_at', sa.DateTime()),
+        sa.UniqueConstraint('user_id', 'apartment_id', name='unique_user_apartment')
+    )
+
+    op.create_table(
+        'notifications',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('type', sa.Enum('booking', 'payment', 'system', 'promotion')),
+        sa.Column('related_id', sa.Integer()),
+        sa.Column('is_read', sa.Boolean()),
+        sa.Column('send_email', sa.Boolean()),
+        sa.Column('created_at', sa.DateTime())
+    )
+
+    op.create_table(
+        'reports',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('report_code', sa.String(length=50), nullable=False, unique=True),
+        sa.Column('report_type', sa.Enum('monthly_income', 'occupancy', 'tenant', 'financial', 'yearly'), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text()),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('period_end', sa.Date(), nullable=False),
+        sa.Column('filters', sa.JSON()),
+        sa.Column('report_data', sa.JSON()),
+        sa.Column('generated_by', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('file_path', sa.String(length=255)),
+        sa.Column('status', sa.Enum('generating', 'completed', 'failed')),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime())
+    )
+
+    op.create_table(
+        'activity_logs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('action', sa.String(length=50), nullable=False),
+        sa.Column('entity_type', sa.String(length=50), nullable=False),
+        sa.Column('entity_id', sa.Integer()),
+        sa.Column('old_data', sa.JSON()),
+        sa.Column('new_data', sa.JSON()),
+        sa.Column('ip_address', sa.String(length=45)),
+        sa.Column('user_agent', sa.Text()),
+        sa.Column('created_at', sa.DateTime())
+    )
+
+    op.create_table(
+        'payment_transactions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('payment_id', sa.Integer(), sa.ForeignKey('payments.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('transaction_reference', sa.String(length=100), nullable=False, unique=True),
+        sa.Column('gateway_name', sa.String(length=50), nullable=False),
+        sa.Column('gateway_transaction_id', sa.String(length=255)),
+        sa.Column('amount', sa.Numeric(12, 2), nullable=False),
+        sa.Column('status', sa.Enum('initiated', 'pending', 'success', 'failed', 'expired'), nullable=False),
+        sa.Column('payment_url', sa.String(length=500)),
+        sa.Column('callback_data', sa.JSON()),
+        sa.Column('error_message', sa.Text()),
+        sa.Column('expired_at', sa.DateTime()),
+        sa.Column('paid_at', sa.DateTime()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime())
+    )
+
+    # MySQL index names are per table; elsewhere (SQLite) they must be unique in the database
+    per_table = op.get_bind().dialect.name == 'mysql'
+    for table, name, columns in SQL_INDEXES:
+        op.create_index(name if per_table else f'{table}_{name}', table, columns)
+
+
+def downgrade():
+    for table in (
+        'payment_transactions', 'activity_logs', 'reports', 'notifications', 'favorites', 'reviews',
+        'apartment_facilities', 'facilities', 'unit_photos', 'availability_calendar', 'payments',
+        'bookings', 'promotions', 'apartments', 'users'
+    ):
+        op.drop_table(table)
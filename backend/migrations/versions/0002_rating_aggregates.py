@@ -0,0 +1,57 @@
+"""Apartment rating aggregates
+
+Revision ID: 0002_rating_aggregates
+Revises: 0001_baseline
+Create Date: 2026-10-19 09:05:00
+
+apartment_rating_aggregates keeps the sum, count and star histogram of each
+apartment's approved reviews (services/ratings.py). The upgrade fills it
+from the approved reviews, with a zero row for every apartment, and
+recomputes apartments.avg_rating from it.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_rating_aggregates'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'apartment_rating_aggregates',
+        sa.Column('apartment_id', sa.Integer(), sa.ForeignKey('apartments.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('rating_sum', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rating_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('star_1', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('star_2', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('star_3', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('star_4', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('star_5', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime())
+    )
+
+    stars = ', '.join(
+        f'COALESCE(SUM(CASE WHEN reviews.rating = {star} THEN 1 ELSE 0 END), 0)' for star in range(1, 6)
+    )
+    op.execute(
+        'INSERT INTO apartment_rating_aggregates '
+        '(apartment_id, rating_sum, rating_count, star_1, star_2, star_3, star_4, star_5, updated_at) '
+        f'SELECT apartments.id, COALESCE(SUM(reviews.rating), 0), COUNT(reviews.id), {stars}, CURRENT_TIMESTAMP '
+        'FROM apartments LEFT JOIN reviews '
+        'ON reviews.apartment_id = apartments.id AND reviews.is_approved = 1 '
+        'GROUP BY apartments.id'
+    )
+    op.execute(
+        'UPDATE apartments SET avg_rating = COALESCE('
+        '(SELECT ROUND(rating_sum * 1.0 / rating_count, 2) FROM apartment_rating_aggregates '
+        'WHERE apartment_rating_aggregates.apartment_id = apartments.id AND rating_count > 0), 0), '
+        'updated_at = updated_at'
+    )
+
+
+def downgrade():
+    op.drop_table('apartment_rating_aggregates')
@@ -0,0 +1,59 @@
+"""Promotion redemption ledger
+
+Revision ID: 0003_promotion_redemptions
+Revises: 0002_rating_aggregates
+Create Date: 2026-10-19 09:10:00
+
+promotions.redemption_count is bumped with a conditional UPDATE against
+usage_limit and promotion_redemptions records which booking holds each
+redemption (services/redemptions.py). The upgrade builds the ledger from the
+existing bookings with a promotion: rejected and cancelled bookings are
+released, all others reserved, and redemption_count is the number of
+reserved rows per promotion.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_promotion_redemptions'
+down_revision = '0002_rating_aggregates'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('promotions', sa.Column('redemption_count', sa.Integer(), nullable=False, server_default='0'))
+
+    op.create_table(
+        'promotion_redemptions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('promotion_id', sa.Integer(), sa.ForeignKey('promotions.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('booking_id', sa.Integer(), sa.ForeignKey('bookings.id', ondelete='CASCADE'), nullable=False, unique=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('status', sa.Enum('reserved', 'released'), nullable=False, server_default='reserved'),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('released_at', sa.DateTime())
+    )
+    op.create_index('idx_promotion_status', 'promotion_redemptions', ['promotion_id', 'status'])
+
+    op.execute(
+        'INSERT INTO promotion_redemptions (promotion_id, booking_id, user_id, status, created_at, released_at) '
+        "SELECT promotion_id, id, tenant_id, "
+        "CASE WHEN status IN ('rejected', 'cancelled') THEN 'released' ELSE 'reserved' END, "
+        "created_at, "
+        "CASE WHEN status IN ('rejected', 'cancelled') THEN updated_at END "
+        'FROM bookings WHERE promotion_id IS NOT NULL'
+    )
+    op.execute(
+        'UPDATE promotions SET redemption_count = '
+        "(SELECT COUNT(*) FROM promotion_redemptions WHERE promotion_redemptions.promotion_id = promotions.id "
+        "AND promotion_redemptions.status = 'reserved'), "
+        'updated_at = updated_at'
+    )
+
+
+def downgrade():
+    op.drop_index('idx_promotion_status', table_name='promotion_redemptions')
+    op.drop_table('promotion_redemptions')
+    op.drop_column('promotions', 'redemption_count')
@@ -0,0 +1,26 @@
+"""Index for unread notification counts
+
+Revision ID: 0004_unread_notifications_index
+Revises: 0003_promotion_redemptions
+Create Date: 2026-10-19 09:15:00
+
+notifications (user_id, is_read, created_at) answers a user's unread count
+(services/notification_counters.py) from the index alone.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_unread_notifications_index'
+down_revision = '0003_promotion_redemptions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_user_read_created', 'notifications', ['user_id', 'is_read', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('idx_user_read_created', table_name='notifications')
@@ -0,0 +1,32 @@
+"""Indexes for the maintenance sweeper
+
+Revision ID: 0005_sweeper_indexes
+Revises: 0004_unread_notifications_index
+Create Date: 2026-10-19 09:20:00
+
+Each sweeper task (services/sweeper.py) finds its batch with a range scan:
+- payments (payment_status, due_date): pending deposits past their due date
+- payment_transactions (status, expired_at): expired gateway checkouts
+- bookings (status, start_date): pending bookings whose start date passed
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_sweeper_indexes'
+down_revision = '0004_unread_notifications_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_status_due', 'payments', ['payment_status', 'due_date'])
+    op.create_index('idx_status_expired', 'payment_transactions', ['status', 'expired_at'])
+    op.create_index('idx_status_start', 'bookings', ['status', 'start_date'])
+
+
+def downgrade():
+    op.drop_index('idx_status_start', table_name='bookings')
+    op.drop_index('idx_status_expired', table_name='payment_transactions')
+    op.drop_index('idx_status_due', table_name='payments')
@@ -0,0 +1,33 @@
+"""Billing period of monthly rent invoices
+
+Revision ID: 0006_rent_billing_period
+Revises: 0005_sweeper_indexes
+Create Date: 2026-10-19 09:25:00
+
+payments.billing_period is the first day of the rent period an invoice
+covers. The unique (booking_id, payment_type, billing_period) key lets
+`flask generate-invoices` insert with INSERT IGNORE, so a rerun or a
+concurrent run never bills a period twice (services/billing.py). Existing
+payments keep a NULL period, which the key does not constrain.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_rent_billing_period'
+down_revision = '0005_sweeper_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('payments') as batch_op:
+        batch_op.add_column(sa.Column('billing_period', sa.Date(), nullable=True))
+        batch_op.create_unique_constraint('uq_booking_type_period', ['booking_id', 'payment_type', 'billing_period'])
+
+
+def downgrade():
+    with op.batch_alter_table('payments') as batch_op:
+        batch_op.drop_constraint('uq_booking_type_period', type_='unique')
+        batch_op.drop_column('billing_period')
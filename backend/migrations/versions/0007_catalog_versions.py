@@ -0,0 +1,35 @@
+"""Catalog version counters for HTTP ETags
+
+Revision ID: 0007_catalog_versions
+Revises: 0006_rent_billing_period
+Create Date: 2026-10-19 09:28:00
+
+catalog_versions holds one counter per public catalog (apartments,
+facilities, promotions, reviews), bumped in the same transaction as every
+write to it and folded into the ETags (services/http_cache.py).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_catalog_versions'
+down_revision = '0006_rent_billing_period'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    catalog_versions = op.create_table(
+        'catalog_versions',
+        sa.Column('name', sa.String(length=50), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime())
+    )
+    op.bulk_insert(catalog_versions, [
+        {'name': name, 'version': 0} for name in ('apartments', 'facilities', 'promotions', 'reviews')
+    ])
+
+
+def downgrade():
+    op.drop_table('catalog_versions')
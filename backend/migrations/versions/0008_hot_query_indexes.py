@@ -0,0 +1,37 @@
+"""Composite indexes for the hot query shapes
+
+Revision ID: 0008_hot_query_indexes
+Revises: 0007_catalog_versions
+Create Date: 2026-10-19 09:30:00
+
+- bookings (apartment_id, status, start_date, end_date): overlap check in
+  check_apartment_availability
+- payments (booking_id, created_at): payment history of a booking
+- notifications (user_id, created_at): notification list without is_read filter
+- reviews (apartment_id, is_approved, created_at): approved reviews of an apartment
+
+`flask check-query-plans` verifies that the database uses them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_hot_query_indexes'
+down_revision = '0007_catalog_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_apartment_status_dates', 'bookings', ['apartment_id', 'status', 'start_date', 'end_date'])
+    op.create_index('idx_booking_created', 'payments', ['booking_id', 'created_at'])
+    op.create_index('idx_user_created', 'notifications', ['user_id', 'created_at'])
+    op.create_index('idx_apartment_approved_created', 'reviews', ['apartment_id', 'is_approved', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('idx_apartment_approved_created', table_name='reviews')
+    op.drop_index('idx_user_created', table_name='notifications')
+    op.drop_index('idx_booking_created', table_name='payments')
+    op.drop_index('idx_apartment_status_dates', table_name='bookings')
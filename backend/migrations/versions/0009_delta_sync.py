@@ -0,0 +1,48 @@
+"""Delta sync: notifications.updated_at, change-range indexes and sync_tombstones
+
+Revision ID: 0009_delta_sync
+Revises: 0008_hot_query_indexes
+Create Date: 2026-10-19 12:00:00
+
+GET /api/sync reads rows changed after a client cursor from these ranges:
+- bookings (tenant_id, updated_at)
+- notifications (user_id, updated_at); the column is new and starts out
+  equal to created_at
+- sync_tombstones (user_id, deleted_at) for deleted rows
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_delta_sync'
+down_revision = '0008_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('notifications', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute('UPDATE notifications SET updated_at = created_at')
+    op.create_index('idx_user_updated', 'notifications', ['user_id', 'updated_at'])
+    op.create_index('idx_tenant_updated', 'bookings', ['tenant_id', 'updated_at'])
+
+    op.create_table(
+        'sync_tombstones',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('entity_type', sa.String(length=30), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False)
+    )
+    op.create_index('idx_user_deleted', 'sync_tombstones', ['user_id', 'deleted_at'])
+    op.create_index('idx_deleted', 'sync_tombstones', ['deleted_at'])
+
+
+def downgrade():
+    op.drop_index('idx_deleted', table_name='sync_tombstones')
+    op.drop_index('idx_user_deleted', table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+    op.drop_index('idx_tenant_updated', table_name='bookings')
+    op.drop_index('idx_user_updated', table_name='notifications')
+    op.drop_column('notifications', 'updated_at')
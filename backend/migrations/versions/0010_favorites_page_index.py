@@ -0,0 +1,26 @@
+"""Index for cursor pagination of a user's favorites
+
+Revision ID: 0010_favorites_page_index
+Revises: 0009_delta_sync
+Create Date: 2026-10-19 15:00:00
+
+GET /api/apartments/favorites pages newest first over (created_at, id);
+favorites (user_id, created_at) makes each page one index range scan.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_favorites_page_index'
+down_revision = '0009_delta_sync'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_user_favorited', 'favorites', ['user_id', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('idx_user_favorited', table_name='favorites')
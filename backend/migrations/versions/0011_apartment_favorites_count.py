@@ -0,0 +1,35 @@
+"""Denormalized favorites count per apartment
+
+Revision ID: 0011_apartment_favorites_count
+Revises: 0010_favorites_page_index
+Create Date: 2026-10-19 17:00:00
+
+apartments.favorites_count is kept up to date by the favorite endpoints
+(services/favorites.py) and backs the "most saved" ranking through
+idx_favorites_count. The upgrade fills it from the favorites table;
+`flask repair-favorite-counts` does the same at any time.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011_apartment_favorites_count'
+down_revision = '0010_favorites_page_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('apartments', sa.Column('favorites_count', sa.Integer(), nullable=False, server_default='0'))
+    op.execute(
+        'UPDATE apartments SET favorites_count = '
+        '(SELECT COUNT(*) FROM favorites WHERE favorites.apartment_id = apartments.id), '
+        'updated_at = updated_at'
+    )
+    op.create_index('idx_favorites_count', 'apartments', ['favorites_count'])
+
+
+def downgrade():
+    op.drop_index('idx_favorites_count', table_name='apartments')
+    op.drop_column('apartments', 'favorites_count')
@@ -0,0 +1,42 @@
+"""Gateway transactions flagged for review
+
+Revision ID: 0012_gateway_review_status
+Revises: 0011_apartment_favorites_count
+Create Date: 2026-10-20 09:00:00
+
+payment_transactions.status gains 'review': a success webhook whose amount or
+currency does not match, or that arrives after the payment was closed.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012_gateway_review_status'
+down_revision = '0011_apartment_favorites_count'
+branch_labels = None
+depends_on = None
+
+OLD_STATUSES = ('initiated', 'pending', 'success', 'failed', 'expired')
+NEW_STATUSES = OLD_STATUSES + ('review',)
+
+
+def upgrade():
+    with op.batch_alter_table('payment_transactions') as batch_op:
+        batch_op.alter_column(
+            'status',
+            existing_type=sa.Enum(*OLD_STATUSES),
+            type_=sa.Enum(*NEW_STATUSES),
+            existing_nullable=False
+        )
+
+
+def downgrade():
+    op.execute("UPDATE payment_transactions SET status = 'failed' WHERE status = 'review'")
+    with op.batch_alter_table('payment_transactions') as batch_op:
+        batch_op.alter_column(
+            'status',
+            existing_type=sa.Enum(*NEW_STATUSES),
+            type_=sa.Enum(*OLD_STATUSES),
+            existing_nullable=False
+        )
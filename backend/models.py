@@ -1,9 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import joinedload, selectinload
+from services.db_routing import RoutingSession
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 import json
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -65,6 +67,9 @@ class User(db.Model):
 
 class Apartment(db.Model):
     __tablename__ = 'apartments'
+    __table_args__ = (
+        db.Index('idx_favorites_count', 'favorites_count'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     unit_number = db.Column(db.String(20), nullable=False)
@@ -92,6 +97,7 @@ class Apartment(db.Model):
     total_views = db.Column(db.Integer, default=0)
     total_inquiries = db.Column(db.Integer, default=0)
     avg_rating = db.Column(db.Numeric(3, 2), default=0)
+    favorites_count = db.Column(db.Integer, nullable=False, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -101,6 +107,16 @@ class Apartment(db.Model):
     bookings = db.relationship('Booking', backref='apartment', lazy=True)
     reviews = db.relationship('Review', backref='apartment', lazy=True)
     favorites = db.relationship('Favorite', backref='apartment', lazy=True, cascade='all, delete-orphan')
+    rating_aggregate = db.relationship('ApartmentRatingAggregate', backref='apartment', lazy=True, uselist=False, cascade='all, delete-orphan')
+    
+    @classmethod
+    def relation_loaders(cls):
+        """Loader options for what to_dict(include_relations=True) reads"""
+        return (
+            selectinload(cls.photos),
+            selectinload(cls.facilities).joinedload(ApartmentFacility.facility),
+            joinedload(cls.owner)
+        )
     
     def to_dict(self, include_relations=False):
         data = {
@@ -139,6 +155,11 @@ class Apartment(db.Model):
 
 class Booking(db.Model):
     __tablename__ = 'bookings'
+    __table_args__ = (
+        db.Index('idx_status_start', 'status', 'start_date'),
+        db.Index('idx_apartment_status_dates', 'apartment_id', 'status', 'start_date', 'end_date'),
+        db.Index('idx_tenant_updated', 'tenant_id', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     apartment_id = db.Column(db.Integer, db.ForeignKey('apartments.id'), nullable=False)
@@ -170,6 +191,16 @@ class Booking(db.Model):
     payments = db.relationship('Payment', backref='booking', lazy=True, cascade='all, delete-orphan')
     promotion = db.relationship('Promotion', backref='bookings', lazy=True)
     
+    @classmethod
+    def relation_loaders(cls):
+        """Loader options for what to_dict(include_relations=True) reads"""
+        return (
+            joinedload(cls.apartment),
+            joinedload(cls.tenant),
+            selectinload(cls.payments),
+            joinedload(cls.promotion)
+        )
+    
     def to_dict(self, include_relations=False):
         data = {
             'id': self.id,
@@ -205,6 +236,11 @@ class Booking(db.Model):
 
 class Payment(db.Model):
     __tablename__ = 'payments'
+    __table_args__ = (
+        db.Index('idx_status_due', 'payment_status', 'due_date'),
+        db.Index('idx_booking_created', 'booking_id', 'created_at'),
+        db.UniqueConstraint('booking_id', 'payment_type', 'billing_period', name='uq_booking_type_period'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), nullable=False)
@@ -215,6 +251,7 @@ class Payment(db.Model):
     payment_status = db.Column(db.Enum('pending', 'verifying', 'completed', 'failed', 'refunded'), default='pending')
     payment_date = db.Column(db.DateTime)
     due_date = db.Column(db.Date)
+    billing_period = db.Column(db.Date)  # first day of the rent period for monthly_rent invoices
     transaction_id = db.Column(db.String(100))
     payment_gateway_ref = db.Column(db.String(255))
     payment_gateway_response = db.Column(db.JSON)
@@ -223,6 +260,19 @@ class Payment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Relationships
+    transactions = db.relationship('PaymentTransaction', backref='payment', lazy=True, cascade='all, delete-orphan')
+    
+    @classmethod
+    def relation_loaders(cls):
+        """Loader options for what to_dict(include_relations=True) reads"""
+        booking = joinedload(cls.booking)
+        return (
+            booking.joinedload(Booking.apartment),
+            booking.joinedload(Booking.tenant),
+            booking.joinedload(Booking.promotion)
+        )
+
     def to_dict(self, include_relations=False):
         data = {
             'id': self.id,
@@ -234,6 +284,7 @@ class Payment(db.Model):
             'payment_status': self.payment_status,
             'payment_date': self.payment_date.isoformat() if self.payment_date else None,
             'due_date': self.due_date.isoformat() if self.due_date else None,
+            'billing_period': self.billing_period.isoformat() if self.billing_period else None,
             'transaction_id': self.transaction_id,
             'receipt_file': self.receipt_file,
             'notes': self.notes,
@@ -273,6 +324,43 @@ class Payment(db.Model):
 
         return data
 
+class PaymentTransaction(db.Model):
+    __tablename__ = 'payment_transactions'
+    __table_args__ = (
+        db.Index('idx_status_expired', 'status', 'expired_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    payment_id = db.Column(db.Integer, db.ForeignKey('payments.id'), nullable=False)
+    transaction_reference = db.Column(db.String(100), unique=True, nullable=False)
+    gateway_name = db.Column(db.String(50), nullable=False)
+    gateway_transaction_id = db.Column(db.String(255))
+    amount = db.Column(db.Numeric(12, 2), nullable=False)
+    status = db.Column(db.Enum('initiated', 'pending', 'success', 'failed', 'expired', 'review'), nullable=False, default='initiated')
+    payment_url = db.Column(db.String(500))
+    callback_data = db.Column(db.JSON)
+    error_message = db.Column(db.Text)
+    expired_at = db.Column(db.DateTime)
+    paid_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'payment_id': self.payment_id,
+            'transaction_reference': self.transaction_reference,
+            'gateway_name': self.gateway_name,
+            'gateway_transaction_id': self.gateway_transaction_id,
+            'amount': float(self.amount),
+            'status': self.status,
+            'payment_url': self.payment_url,
+            'error_message': self.error_message,
+            'expired_at': self.expired_at.isoformat() if self.expired_at else None,
+            'paid_at': self.paid_at.isoformat() if self.paid_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
 class UnitPhoto(db.Model):
     __tablename__ = 'unit_photos'
     
@@ -330,6 +418,9 @@ class ApartmentFacility(db.Model):
 
 class Review(db.Model):
     __tablename__ = 'reviews'
+    __table_args__ = (
+        db.Index('idx_apartment_approved_created', 'apartment_id', 'is_approved', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     apartment_id = db.Column(db.Integer, db.ForeignKey('apartments.id'), nullable=False)
@@ -357,8 +448,33 @@ class Review(db.Model):
             'tenant': self.reviewer.to_dict() if self.reviewer else None
         }
 
+class ApartmentRatingAggregate(db.Model):
+    __tablename__ = 'apartment_rating_aggregates'
+    
+    apartment_id = db.Column(db.Integer, db.ForeignKey('apartments.id'), primary_key=True)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    star_1 = db.Column(db.Integer, nullable=False, default=0)
+    star_2 = db.Column(db.Integer, nullable=False, default=0)
+    star_3 = db.Column(db.Integer, nullable=False, default=0)
+    star_4 = db.Column(db.Integer, nullable=False, default=0)
+    star_5 = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'apartment_id': self.apartment_id,
+            'avg_rating': round(self.rating_sum / self.rating_count, 2) if self.rating_count else 0,
+            'rating_count': self.rating_count,
+            'histogram': {str(star): getattr(self, f'star_{star}') or 0 for star in range(1, 6)}
+        }
+
 class Favorite(db.Model):
     __tablename__ = 'favorites'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'apartment_id', name='unique_user_apartment'),
+        db.Index('idx_user_favorited', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -375,6 +491,11 @@ class Favorite(db.Model):
 
 class Notification(db.Model):
     __tablename__ = 'notifications'
+    __table_args__ = (
+        db.Index('idx_user_read_created', 'user_id', 'is_read', 'created_at'),
+        db.Index('idx_user_created', 'user_id', 'created_at'),
+        db.Index('idx_user_updated', 'user_id', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -385,6 +506,7 @@ class Notification(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     send_email = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
         return {
@@ -413,9 +535,13 @@ class Promotion(db.Model):
     min_nights = db.Column(db.Integer)
     active = db.Column(db.Boolean, default=True)
     usage_limit = db.Column(db.Integer)
+    redemption_count = db.Column(db.Integer, nullable=False, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Relationships
+    redemptions = db.relationship('PromotionRedemption', backref='promotion', lazy=True, cascade='all, delete-orphan')
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -429,8 +555,69 @@ class Promotion(db.Model):
             'end_date': self.end_date.isoformat() if self.end_date else None,
             'min_nights': self.min_nights,
             'active': self.active,
-            'usage_limit': self.usage_limit
+            'usage_limit': self.usage_limit,
+            'redemption_count': self.redemption_count or 0
+        }
+
+class PromotionRedemption(db.Model):
+    __tablename__ = 'promotion_redemptions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    promotion_id = db.Column(db.Integer, db.ForeignKey('promotions.id'), nullable=False)
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    status = db.Column(db.Enum('reserved', 'released'), default='reserved', nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    released_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'promotion_id': self.promotion_id,
+            'booking_id': self.booking_id,
+            'user_id': self.user_id,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'released_at': self.released_at.isoformat() if self.released_at else None
+        }
+
+class Report(db.Model):
+    __tablename__ = 'reports'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    report_code = db.Column(db.String(50), unique=True, nullable=False)
+    report_type = db.Column(db.Enum('monthly_income', 'occupancy', 'tenant', 'financial', 'yearly'), nullable=False)
+    title = db.Column(db.String(255), nullable=False)
+    description = db.Column(db.Text)
+    period_start = db.Column(db.Date, nullable=False)
+    period_end = db.Column(db.Date, nullable=False)
+    filters = db.Column(db.JSON)
+    report_data = db.Column(db.JSON)
+    generated_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    file_path = db.Column(db.String(255))
+    status = db.Column(db.Enum('generating', 'completed', 'failed'), default='generating')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self, include_data=False):
+        data = {
+            'id': self.id,
+            'report_code': self.report_code,
+            'report_type': self.report_type,
+            'title': self.title,
+            'description': self.description,
+            'period_start': self.period_start.isoformat() if self.period_start else None,
+            'period_end': self.period_end.isoformat() if self.period_end else None,
+            'filters': self.filters,
+            'generated_by': self.generated_by,
+            'has_file': bool(self.file_path),
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+        if include_data:
+            data['report_data'] = self.report_data
+        return data
 
 class ActivityLog(db.Model):
     __tablename__ = 'activity_logs'
@@ -444,4 +631,25 @@ class ActivityLog(db.Model):
     new_data = db.Column(db.JSON)
     ip_address = db.Column(db.String(45))
     user_agent = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class CatalogVersion(db.Model):
+    __tablename__ = 'catalog_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SyncTombstone(db.Model):
+    """Deleted row of a delta-synced table, kept for every user that could see it"""
+    __tablename__ = 'sync_tombstones'
+    __table_args__ = (
+        db.Index('idx_user_deleted', 'user_id', 'deleted_at'),
+        db.Index('idx_deleted', 'deleted_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    entity_type = db.Column(db.String(30), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -1,9 +1,16 @@
-from flask import Blueprint, request, jsonify
-from models import db, User, Apartment, Booking, Payment, Review
+from flask import Blueprint, request, jsonify, send_from_directory, current_app
+from models import db, User, Apartment, Booking, Payment, Review, Report
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from utils import role_required
+from utils import role_required, generate_report_code, log_activity
+from services.reports import report_runner, find_recent_report, REPORT_BUILDERS
+from services.sweeper import sweeper
+from services.billing import generate_rent_invoices
+from services.db_pool import get_pool_stats
+from services.db_routing import replica_router
+from services.response_cache import get_response_cache
+from services.query_budget import query_budget
 from sqlalchemy import func, and_, extract
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
@@ -92,6 +99,7 @@ def get_dashboard_stats():
         return jsonify({'message': str(e)}), 500
 
 @admin_bp.route('/owner-dashboard', methods=['GET'])
+@query_budget(16)
 @jwt_required()
 @role_required('owner')
 def get_owner_dashboard():
@@ -100,7 +108,7 @@ def get_owner_dashboard():
         current_user_id = get_jwt_identity()
         
         # Owner's apartments
-        owner_apartments = Apartment.query.filter_by(owner_id=current_user_id).all()
+        owner_apartments = Apartment.query.options(*Apartment.relation_loaders()).filter_by(owner_id=current_user_id).all()
         apartment_ids = [apt.id for apt in owner_apartments]
         
         total_apartments = len(owner_apartments)
@@ -144,7 +152,7 @@ def get_owner_dashboard():
         ).scalar() or 0
         
         # Recent bookings
-        recent_bookings = Booking.query.filter(
+        recent_bookings = Booking.query.options(*Booking.relation_loaders()).filter(
             Booking.apartment_id.in_(apartment_ids)
         ).order_by(Booking.created_at.desc()).limit(5).all()
         
@@ -175,98 +183,119 @@ def get_owner_dashboard():
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+def _dashboard_report(user, report_type, period_start, period_end, title):
+    """Report job behind a dashboard report endpoint.
+
+    Reuses the user's job for the same period while it is generating or for
+    REPORT_REUSE_SECONDS after it completed; otherwise submits a new one and
+    waits up to REPORT_WAIT_SECONDS for it.
+    """
+    filters = {'owner_id': user.id} if user.role == 'owner' else {}
+    report = find_recent_report(
+        report_type, period_start, period_end, user.id, filters,
+        current_app.config['REPORT_REUSE_SECONDS']
+    )
+    if report:
+        return report
+    
+    report = Report(
+        report_code=generate_report_code(),
+        report_type=report_type,
+        title=title,
+        period_start=period_start,
+        period_end=period_end,
+        filters=filters,
+        generated_by=user.id,
+        status='generating'
+    )
+    db.session.add(report)
+    db.session.commit()
+    
+    report_runner.submit(report.id, wait=current_app.config['REPORT_WAIT_SECONDS'])
+    db.session.refresh(report)
+    return report
+
+def _unfinished_report_response(report):
+    """202 while the job runs (ask again later), 500 if it failed; None once completed"""
+    if report.status == 'generating':
+        return jsonify({
+            'message': 'Report is being generated, try again shortly',
+            'report': report.to_dict()
+        }), 202
+    if report.status == 'failed':
+        return jsonify({
+            'message': (report.report_data or {}).get('error', 'Report generation failed'),
+            'report': report.to_dict()
+        }), 500
+    return None
+
 @admin_bp.route('/reports/occupancy', methods=['GET'])
 @jwt_required()
 @role_required('admin', 'owner')
 def get_occupancy_report():
-    """Get occupancy report"""
+    """Get occupancy report (generated as an occupancy report job)"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         user = User.query.get(current_user_id)
         
-        # Filter by owner if role is owner
-        if user.role == 'owner':
-            apartments = Apartment.query.filter_by(owner_id=current_user_id).all()
-        else:
-            apartments = Apartment.query.all()
-        
-        total = len(apartments)
-        occupied = len([apt for apt in apartments if apt.availability_status == 'occupied'])
-        available = len([apt for apt in apartments if apt.availability_status == 'available'])
-        
-        occupancy_rate = (occupied / total * 100) if total > 0 else 0
-        
-        # By unit type
-        by_type = {}
-        for apt in apartments:
-            if apt.unit_type not in by_type:
-                by_type[apt.unit_type] = {'total': 0, 'occupied': 0, 'available': 0}
-            
-            by_type[apt.unit_type]['total'] += 1
-            if apt.availability_status == 'occupied':
-                by_type[apt.unit_type]['occupied'] += 1
-            else:
-                by_type[apt.unit_type]['available'] += 1
+        today = datetime.utcnow().date()
+        report = _dashboard_report(user, 'occupancy', today, today, f'Occupancy {today}')
+        unfinished = _unfinished_report_response(report)
+        if unfinished:
+            return unfinished
+        
+        data = report.report_data
+        by_type = {
+            row['unit_type']: {'total': row['total'], 'occupied': row['occupied'], 'available': row['available']}
+            for row in data['rows']
+        }
         
         return jsonify({
-            'summary': {
-                'total': total,
-                'occupied': occupied,
-                'available': available,
-                'occupancy_rate': round(occupancy_rate, 2)
-            },
-            'by_type': by_type
+            'summary': data['summary'],
+            'by_type': by_type,
+            'report_id': report.id,
+            'generated_at': report.updated_at.isoformat()
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'message': str(e)}), 500
 
 @admin_bp.route('/reports/revenue', methods=['GET'])
 @jwt_required()
 @role_required('admin', 'owner')
 def get_revenue_report():
-    """Get revenue report"""
+    """Get revenue report for a year (generated as a yearly report job)"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         user = User.query.get(current_user_id)
         
         year = request.args.get('year', datetime.now().year, type=int)
+        if not 1 <= year <= 9999:
+            return jsonify({'message': 'Invalid year'}), 400
         
-        # Base query
-        query = db.session.query(
-            extract('month', Payment.payment_date).label('month'),
-            func.sum(Payment.amount).label('total')
-        ).filter(
-            and_(
-                Payment.payment_status == 'completed',
-                extract('year', Payment.payment_date) == year
-            )
-        )
-        
-        # Filter by owner if role is owner
-        if user.role == 'owner':
-            query = query.join(Booking).join(Apartment).filter(
-                Apartment.owner_id == current_user_id
-            )
-        
-        query = query.group_by(extract('month', Payment.payment_date))
-        
-        results = query.all()
+        report = _dashboard_report(user, 'yearly', date(year, 1, 1), date(year, 12, 31), f'Revenue {year}')
+        unfinished = _unfinished_report_response(report)
+        if unfinished:
+            return unfinished
         
         # Format results
         monthly_data = {i: 0 for i in range(1, 13)}
-        for month, total in results:
-            monthly_data[int(month)] = float(total)
+        for period, total in report.report_data['summary']['by_month'].items():
+            monthly_data[int(period[5:7])] = total
         
         total_revenue = sum(monthly_data.values())
         
         return jsonify({
             'year': year,
             'total_revenue': total_revenue,
-            'monthly_data': monthly_data
+            'monthly_data': monthly_data,
+            'report_id': report.id,
+            'generated_at': report.updated_at.isoformat()
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'message': str(e)}), 500
 
 @admin_bp.route('/reports/top-apartments', methods=['GET'])
@@ -285,6 +314,11 @@ def get_top_apartments():
             Apartment.avg_rating > 0
         ).order_by(Apartment.avg_rating.desc()).limit(limit).all()
         
+        # Most saved (denormalized favorites_count, no COUNT over favorites)
+        most_saved = Apartment.query.filter(
+            Apartment.favorites_count > 0
+        ).order_by(Apartment.favorites_count.desc()).limit(limit).all()
+        
         # Most bookings
         most_booked = db.session.query(
             Apartment,
@@ -296,6 +330,10 @@ def get_top_apartments():
         return jsonify({
             'most_viewed': [apt.to_dict() for apt in most_viewed],
             'highest_rated': [apt.to_dict() for apt in highest_rated],
+            'most_saved': [
+                {**apt.to_dict(), 'favorites_count': apt.favorites_count}
+                for apt in most_saved
+            ],
             'most_booked': [
                 {**apt.to_dict(), 'booking_count': count}
                 for apt, count in most_booked
@@ -303,4 +341,249 @@ def get_top_apartments():
         }), 200
         
     except Exception as e:
-        return jsonify({'message': str(e)}), 500
\ No newline at end of file
+        return jsonify({'message': str(e)}), 500
+
+@admin_bp.route('/reports', methods=['POST'])
+@jwt_required()
+@role_required('admin', 'owner')
+def create_report():
+    """Submit a report job (generated in the background)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = User.query.get(current_user_id)
+        
+        data = request.get_json(silent=True) or {}
+        
+        required_fields = ['report_type', 'period_start', 'period_end']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'message': f'{field} is required'}), 400
+        
+        if data['report_type'] not in REPORT_BUILDERS:
+            return jsonify({'message': 'Invalid report type'}), 400
+        
+        try:
+            period_start = datetime.strptime(data['period_start'], '%Y-%m-%d').date()
+            period_end = datetime.strptime(data['period_end'], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return jsonify({'message': 'period_start and period_end must be dates in YYYY-MM-DD format'}), 400
+        
+        if period_end < period_start:
+            return jsonify({'message': 'End date must be after start date'}), 400
+        
+        # Owners only get figures for their own apartments
+        filters = data.get('filters') or {}
+        if user.role == 'owner':
+            filters['owner_id'] = current_user_id
+        
+        report = Report(
+            report_code=generate_report_code(),
+            report_type=data['report_type'],
+            title=data.get('title') or f"{data['report_type'].replace('_', ' ').title()} {period_start} - {period_end}",
+            description=data.get('description'),
+            period_start=period_start,
+            period_end=period_end,
+            filters=filters,
+            generated_by=current_user_id,
+            status='generating'
+        )
+        
+        db.session.add(report)
+        db.session.commit()
+        
+        report_runner.submit(report.id)
+        
+        log_activity(
+            user_id=current_user_id,
+            action='create',
+            entity_type='report',
+            entity_id=report.id
+        )
+        
+        return jsonify({
+            'message': 'Report is being generated',
+            'report': report.to_dict()
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 500
+
+@admin_bp.route('/reports', methods=['GET'])
+@jwt_required()
+@role_required('admin', 'owner')
+def get_reports():
+    """Get report jobs (owners see their own)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = User.query.get(current_user_id)
+        
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 10, type=int)
+        status = request.args.get('status')
+        
+        query = Report.query
+        if user.role == 'owner':
+            query = query.filter_by(generated_by=current_user_id)
+        
+        if status:
+            query = query.filter(Report.status == status)
+        
+        reports = query.order_by(Report.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
+        
+        return jsonify({
+            'reports': [report.to_dict() for report in reports.items],
+            'pagination': {
+                'page': reports.page,
+                'per_page': reports.per_page,
+                'total': reports.total,
+                'pages': reports.pages
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+def _get_accessible_report(report_id, current_user_id):
+    """Load a report the current user may see, or None"""
+    user = User.query.get(current_user_id)
+    report = Report.query.get(report_id)
+    if not report:
+        return None
+    if user.role == 'owner' and report.generated_by != current_user_id:
+        return None
+    return report
+
+@admin_bp.route('/reports/<int:report_id>', methods=['GET'])
+@jwt_required()
+@role_required('admin', 'owner')
+def get_report(report_id):
+    """Get report status and, once completed, its data"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        report = _get_accessible_report(report_id, current_user_id)
+        if not report:
+            return jsonify({'message': 'Report not found'}), 404
+        
+        return jsonify({
+            'report': report.to_dict(include_data=report.status != 'generating')
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@admin_bp.route('/reports/<int:report_id>/download', methods=['GET'])
+@jwt_required()
+@role_required('admin', 'owner')
+def download_report(report_id):
+    """Download exported report file"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        report = _get_accessible_report(report_id, current_user_id)
+        if not report:
+            return jsonify({'message': 'Report not found'}), 404
+        
+        if report.status != 'completed' or not report.file_path:
+            return jsonify({'message': f'Report is {report.status}'}), 409
+        
+        return send_from_directory(
+            current_app.config['REPORT_FOLDER'],
+            report.file_path,
+            as_attachment=True
+        )
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@admin_bp.route('/maintenance/sweeper', methods=['GET'])
+@jwt_required()
+@role_required('admin')
+def get_sweeper_stats():
+    """Get maintenance sweeper runtime statistics (Admin only)"""
+    return jsonify({'sweeper': sweeper.stats()}), 200
+
+@admin_bp.route('/maintenance/sweeper/run', methods=['POST'])
+@jwt_required()
+@role_required('admin')
+def run_sweeper():
+    """Run the maintenance sweeper now (Admin only)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        results = sweeper.run()
+        if results is None:
+            return jsonify({'message': 'A sweep is already running'}), 409
+        
+        log_activity(
+            user_id=current_user_id,
+            action='sweep',
+            entity_type='maintenance'
+        )
+        
+        return jsonify({
+            'message': 'Sweep completed',
+            'results': results,
+            'sweeper': sweeper.stats()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@admin_bp.route('/billing/run', methods=['POST'])
+@jwt_required()
+@role_required('admin')
+def run_billing():
+    """Generate monthly rent invoices for active bookings (Admin only)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        data = request.get_json(silent=True) or {}
+        as_of = datetime.strptime(data['as_of'], '%Y-%m-%d').date() if data.get('as_of') else None
+        lead_days = int(data.get('lead_days', current_app.config['BILLING_LEAD_DAYS']))
+        
+        summary = generate_rent_invoices(as_of=as_of, lead_days=lead_days)
+        
+        log_activity(
+            user_id=current_user_id,
+            action='generate_invoices',
+            entity_type='payment',
+            new_data=summary
+        )
+        
+        return jsonify({
+            'message': 'Monthly invoices generated',
+            'summary': summary
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 500
+
+@admin_bp.route('/db/pool', methods=['GET'])
+@jwt_required()
+@role_required('admin')
+def get_db_pool_stats():
+    """Connection pool checkout latency and saturation for this worker (Admin only)"""
+    return jsonify({
+        'engines': get_pool_stats(),
+        'replicas': replica_router.status()
+    }), 200
+
+@admin_bp.route('/cache', methods=['GET'])
+@jwt_required()
+@role_required('admin')
+def get_cache_stats():
+    """Server-side response cache hit/miss counters and memory use (Admin only)"""
+    return jsonify(get_response_cache().snapshot()), 200
+
+@admin_bp.route('/cache/clear', methods=['POST'])
+@jwt_required()
+@role_required('admin')
+def clear_cache():
+    """Drop every cached response (Admin only)"""
+    get_response_cache().clear()
+    return jsonify({'message': 'Cache cleared'}), 200
@@ -1,12 +1,55 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from models import db, Apartment, UnitPhoto, Facility, ApartmentFacility, Review, Favorite, User, Booking
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from utils import role_required, paginate_query, save_file, log_activity
-from sqlalchemy import or_, and_
+from services.apartment_import import ApartmentImportError, import_apartments, read_rows
+from services.favorites import (
+    FavoriteCursorError, favorites_page, favorites_query, favorited_ids, add_favorite, remove_favorite
+)
+from services.http_cache import conditional
+from services.query_budget import query_budget
+from services.response_cache import (
+    get_response_cache, make_key, encode_json, json_response,
+    invalidate_apartment, invalidate_listings, LISTING_NAMESPACE, DETAIL_NAMESPACE
+)
+from sqlalchemy import or_, and_, func
+from sqlalchemy.orm import joinedload
 
 apartments_bp = Blueprint('apartments', __name__, url_prefix='/api/apartments')
 
+def _listing_fingerprint():
+    count, last_updated = db.session.query(
+        func.count(Apartment.id), func.max(Apartment.updated_at)
+    ).filter(Apartment.is_archived == False).one()
+    return count, last_updated.isoformat() if last_updated else None
+
+def _detail_fingerprint(apartment_id):
+    row = db.session.query(Apartment.updated_at, Apartment.is_archived).filter(
+        Apartment.id == apartment_id
+    ).first()
+    if row is None:
+        return ''
+    if row.is_archived:
+        return None  # access depends on the user, never cache
+    return row.updated_at.isoformat() if row.updated_at else ''
+
+def _count_view(apartment_id):
+    """Increment view count as an UPDATE on the primary.
+
+    updated_at is kept as is so a view does not change the apartment's ETag,
+    and the catalog version is not bumped for it.
+    """
+    Apartment.query.filter_by(id=apartment_id).execution_options(catalog_version=False).update(
+        {
+            Apartment.total_views: Apartment.total_views + 1,
+            Apartment.updated_at: Apartment.updated_at
+        }
+    )
+    db.session.commit()
+
 @apartments_bp.route('', methods=['GET'])
+@query_budget(10)
+@conditional(['apartments'], fingerprint=_listing_fingerprint)
 def get_apartments():
     """Get all apartments with filters (excludes archived for public)"""
     try:
@@ -21,8 +64,25 @@ def get_apartments():
         status = request.args.get('status', 'available')
         search = request.args.get('search')
 
+        # Serve from the server-side cache, keyed by the parsed filters
+        cache = get_response_cache()
+        cache_key = make_key({
+            'page': page,
+            'per_page': per_page,
+            'unit_type': unit_type,
+            'min_price': min_price,
+            'max_price': max_price,
+            'bedrooms': bedrooms,
+            'furnished': furnished,
+            'status': status,
+            'search': search
+        })
+        body = cache.get(LISTING_NAMESPACE, cache_key)
+        if body is not None:
+            return json_response(body), 200
+
         # Build query - EXCLUDE archived apartments for public listing
-        query = Apartment.query.filter(Apartment.is_archived == False)
+        query = Apartment.query.options(*Apartment.relation_loaders()).filter(Apartment.is_archived == False)
 
         # Apply filters
         if unit_type:
@@ -60,7 +120,7 @@ def get_apartments():
         # Format response
         apartments = [apt.to_dict(include_relations=True) for apt in result['items']]
 
-        return jsonify({
+        body = encode_json({
             'apartments': apartments,
             'pagination': {
                 'page': result['page'],
@@ -70,12 +130,16 @@ def get_apartments():
                 'has_next': result['has_next'],
                 'has_prev': result['has_prev']
             }
-        }), 200
+        })
+        cache.set(LISTING_NAMESPACE, cache_key, body)
+
+        return json_response(body), 200
 
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
 @apartments_bp.route('/my-units', methods=['GET'])
+@query_budget(10)
 @jwt_required()
 @role_required('owner')
 def get_my_units():
@@ -90,7 +154,7 @@ def get_my_units():
         include_archived = request.args.get('include_archived', 'true')  # By default, show all including archived
 
         # Build query - filter by owner (INCLUDE archived units)
-        query = Apartment.query.filter_by(owner_id=current_user_id)
+        query = Apartment.query.options(*Apartment.relation_loaders()).filter_by(owner_id=current_user_id)
 
         # Optional: filter out archived if requested
         if include_archived.lower() == 'false':
@@ -125,12 +189,27 @@ def get_my_units():
         return jsonify({'message': str(e)}), 500
 
 @apartments_bp.route('/<int:apartment_id>', methods=['GET'])
+@conditional(['apartments'], fingerprint=_detail_fingerprint, on_not_modified=_count_view)
 def get_apartment(apartment_id):
     """Get single apartment details"""
     try:
         from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
         from models import Booking
 
+        # Existence and archiving are checked before the cache, so a unit
+        # deleted or archived through another worker is never served from it
+        visibility = db.session.query(Apartment.is_archived).filter(Apartment.id == apartment_id).first()
+        if visibility is None:
+            return jsonify({'message': 'Apartment not found'}), 404
+
+        # Only public (non-archived) details are cached
+        cache = get_response_cache()
+        if not visibility.is_archived:
+            body = cache.get(DETAIL_NAMESPACE, apartment_id)
+            if body is not None:
+                _count_view(apartment_id)
+                return json_response(body), 200
+
         apartment = Apartment.query.get(apartment_id)
 
         if not apartment:
@@ -171,8 +250,7 @@ def get_apartment(apartment_id):
                 return jsonify({'message': 'Apartment not found'}), 404
 
         # Increment view count (only if not archived or has access)
-        apartment.total_views += 1
-        db.session.commit()
+        _count_view(apartment_id)
 
         # Get reviews
         reviews = Review.query.filter_by(
@@ -183,7 +261,12 @@ def get_apartment(apartment_id):
         data = apartment.to_dict(include_relations=True)
         data['reviews'] = [review.to_dict() for review in reviews]
 
-        return jsonify(data), 200
+        if apartment.is_archived:
+            return jsonify(data), 200
+
+        body = encode_json(data)
+        cache.set(DETAIL_NAMESPACE, apartment_id, body)
+        return json_response(body), 200
 
     except Exception as e:
         return jsonify({'message': str(e)}), 500
@@ -244,6 +327,7 @@ def create_apartment():
                 db.session.add(apt_facility)
         
         db.session.commit()
+        invalidate_listings()
         
         # Log activity
         log_activity(
@@ -263,6 +347,80 @@ def create_apartment():
         db.session.rollback()
         return jsonify({'message': str(e)}), 500
 
+@apartments_bp.route('/import', methods=['POST'])
+@query_budget(15)
+@jwt_required()
+@role_required('owner', 'admin')
+def bulk_import_apartments():
+    """Create (or, with mode=upsert, update) many apartments from a CSV/JSON upload (Owner/Admin only)
+
+    Accepts a multipart `file` (.csv or .json), a JSON body, or a text/csv body.
+    Query parameters: mode=create|upsert, partial=true to import the valid rows
+    when others fail, dry_run=true to only validate.
+    """
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = User.query.get(current_user_id)
+        
+        mode = request.args.get('mode', 'create')
+        partial = request.args.get('partial', 'false').lower() == 'true'
+        dry_run = request.args.get('dry_run', 'false').lower() == 'true'
+        
+        try:
+            if 'file' in request.files:
+                upload = request.files['file']
+                rows = read_rows(upload.read(), upload.filename, upload.mimetype)
+            elif request.is_json:
+                rows = read_rows(request.get_json())
+            else:
+                rows = read_rows(request.get_data(), content_type=request.mimetype)
+            
+            summary = import_apartments(
+                rows, user, mode=mode, partial=partial, dry_run=dry_run,
+                max_rows=current_app.config['APARTMENT_IMPORT_MAX_ROWS']
+            )
+        except ApartmentImportError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        if summary['errors'] and not partial and not dry_run:
+            return jsonify({
+                'message': f"{len(summary['errors'])} rows have errors, nothing was imported",
+                **summary
+            }), 400
+        
+        if dry_run:
+            return jsonify({'message': 'Validation finished, nothing was imported', **summary}), 200
+        
+        if summary['created']:
+            invalidate_listings()
+        if summary['updated']:
+            get_response_cache().clear_namespace(DETAIL_NAMESPACE)
+            invalidate_listings()
+        
+        # One audit entry for the whole import
+        if summary['created'] or summary['updated']:
+            log_activity(
+                user_id=current_user_id,
+                action='bulk_import',
+                entity_type='apartment',
+                new_data={
+                    'mode': mode,
+                    'rows': summary['rows'],
+                    'created': summary['created'],
+                    'updated': summary['updated'],
+                    'skipped': len(summary['errors'])
+                }
+            )
+        
+        return jsonify({
+            'message': f"Imported {len(summary['created'])} new and {len(summary['updated'])} updated apartments",
+            **summary
+        }), 201 if summary['created'] else 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 500
+
 @apartments_bp.route('/<int:apartment_id>', methods=['PUT'])
 @jwt_required()
 @role_required('owner', 'admin')
@@ -311,6 +469,7 @@ def update_apartment(apartment_id):
                 db.session.add(apt_facility)
         
         db.session.commit()
+        invalidate_apartment(apartment_id)
         
         # Log activity
         log_activity(
@@ -420,6 +579,7 @@ def delete_apartment(apartment_id):
             # Hard delete the apartment
             db.session.delete(apartment)
             db.session.commit()
+            invalidate_apartment(apartment_id)
 
             # Log activity
             log_activity(
@@ -447,6 +607,7 @@ def delete_apartment(apartment_id):
             apartment.archived_at = datetime.utcnow()
 
             db.session.commit()
+            invalidate_apartment(apartment_id)
 
             # Log activity
             log_activity(
@@ -506,6 +667,7 @@ def upload_photo(apartment_id):
         
         db.session.add(photo)
         db.session.commit()
+        invalidate_apartment(apartment_id)
         
         return jsonify({
             'message': 'Photo uploaded successfully',
@@ -516,57 +678,114 @@ def upload_photo(apartment_id):
         db.session.rollback()
         return jsonify({'message': str(e)}), 500
 
+def _favorite_target(apartment_id):
+    """404 response if the apartment cannot be favorited, else None"""
+    exists = db.session.query(Apartment.id).filter_by(id=apartment_id).scalar()
+    if exists is None:
+        return jsonify({'message': 'Apartment not found'}), 404
+    return None
+
+def _favorite_response(apartment_id, message, is_favorite, status):
+    favorites_count = db.session.query(Apartment.favorites_count).filter_by(id=apartment_id).scalar()
+    return jsonify({
+        'message': message,
+        'is_favorite': is_favorite,
+        'favorites_count': favorites_count or 0
+    }), status
+
 @apartments_bp.route('/<int:apartment_id>/favorite', methods=['POST'])
 @jwt_required()
 def toggle_favorite(apartment_id):
-    """Add/remove apartment from favorites"""
+    """Add/remove apartment from favorites
+
+    Kept for existing clients; PUT and DELETE are idempotent and safe to retry.
+    """
     try:
         current_user_id = int(get_jwt_identity())
         
-        apartment = Apartment.query.get(apartment_id)
+        not_found = _favorite_target(apartment_id)
+        if not_found:
+            return not_found
         
-        if not apartment:
-            return jsonify({'message': 'Apartment not found'}), 404
+        if remove_favorite(current_user_id, apartment_id):
+            db.session.commit()
+            return _favorite_response(apartment_id, 'Removed from favorites', False, 200)
         
-        # Check if already favorited
-        favorite = Favorite.query.filter_by(
-            user_id=current_user_id,
-            apartment_id=apartment_id
-        ).first()
+        add_favorite(current_user_id, apartment_id)
+        db.session.commit()
+        return _favorite_response(apartment_id, 'Added to favorites', True, 201)
         
-        if favorite:
-            # Remove from favorites
-            db.session.delete(favorite)
-            db.session.commit()
-            return jsonify({
-                'message': 'Removed from favorites',
-                'is_favorite': False
-            }), 200
-        else:
-            # Add to favorites
-            favorite = Favorite(
-                user_id=current_user_id,
-                apartment_id=apartment_id
-            )
-            db.session.add(favorite)
-            db.session.commit()
-            return jsonify({
-                'message': 'Added to favorites',
-                'is_favorite': True
-            }), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 500
+
+@apartments_bp.route('/<int:apartment_id>/favorite', methods=['PUT'])
+@query_budget(6)
+@jwt_required()
+def save_favorite(apartment_id):
+    """Add apartment to favorites (no-op if already saved)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        not_found = _favorite_target(apartment_id)
+        if not_found:
+            return not_found
+        
+        created = add_favorite(current_user_id, apartment_id)
+        db.session.commit()
+        
+        if created:
+            return _favorite_response(apartment_id, 'Added to favorites', True, 201)
+        return _favorite_response(apartment_id, 'Already in favorites', True, 200)
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 500
+
+@apartments_bp.route('/<int:apartment_id>/favorite', methods=['DELETE'])
+@query_budget(6)
+@jwt_required()
+def delete_favorite(apartment_id):
+    """Remove apartment from favorites (no-op if not saved)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        removed = remove_favorite(current_user_id, apartment_id)
+        db.session.commit()
+        
+        return _favorite_response(
+            apartment_id,
+            'Removed from favorites' if removed else 'Not in favorites',
+            False,
+            200
+        )
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': str(e)}), 500
 
 @apartments_bp.route('/favorites', methods=['GET'])
+@query_budget(8)
 @jwt_required()
 def get_favorites():
-    """Get user's favorite apartments"""
+    """Get user's favorite apartments, newest first
+
+    Pass `limit` (and then the returned `next_cursor` as `cursor`) to page
+    through them; without either the full list is returned.
+    """
     try:
         current_user_id = int(get_jwt_identity())
         
-        favorites = Favorite.query.filter_by(user_id=current_user_id).all()
+        # Paginate only when requested (the favorites page loads the full list)
+        if 'cursor' in request.args or 'limit' in request.args:
+            max_limit = current_app.config['FAVORITES_MAX_PAGE_SIZE']
+            limit = min(max(request.args.get('limit', 20, type=int), 1), max_limit)
+            try:
+                favorites, next_cursor = favorites_page(current_user_id, request.args.get('cursor'), limit)
+            except FavoriteCursorError as e:
+                return jsonify({'message': str(e)}), 400
+        else:
+            favorites, next_cursor = favorites_query(current_user_id).all(), None
         
         apartments = []
         for fav in favorites:
@@ -575,7 +794,33 @@ def get_favorites():
             apartments.append(apt_data)
         
         return jsonify({
-            'favorites': apartments
+            'favorites': apartments,
+            'next_cursor': next_cursor
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@apartments_bp.route('/favorites/ids', methods=['GET'])
+@query_budget(3)
+@jwt_required()
+def get_favorite_ids():
+    """Ids of the user's favorite apartments, for heart icons on listing cards
+
+    `apartment_ids=1,2,3` limits the answer to the units on the current page.
+    """
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        apartment_ids = request.args.get('apartment_ids')
+        if apartment_ids is not None:
+            try:
+                apartment_ids = [int(value) for value in apartment_ids.split(',') if value.strip()]
+            except ValueError:
+                return jsonify({'message': 'apartment_ids must be a comma-separated list of integers'}), 400
+        
+        return jsonify({
+            'apartment_ids': favorited_ids(current_user_id, apartment_ids)
         }), 200
         
     except Exception as e:
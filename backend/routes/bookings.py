@@ -1,15 +1,20 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from models import db, Booking, Apartment, Payment, User, Promotion
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from utils import (role_required, generate_booking_code, generate_payment_code,
                    calculate_total_amount, create_notification, log_activity,
                    validate_dates, check_apartment_availability, calculate_months_between)
+from services.promotion_catalog import promotion_catalog
+from services.redemptions import lock_promotion, reserve_redemption, release_redemption
+from services.query_budget import query_budget
+from services.booking_actions import BookingActionError, apply_booking_action
 from datetime import datetime, timedelta
 from decimal import Decimal
 
 bookings_bp = Blueprint('bookings', __name__, url_prefix='/api/bookings')
 
 @bookings_bp.route('', methods=['GET'])
+@query_budget(8)
 @jwt_required()
 def get_bookings():
     """Get bookings based on user role"""
@@ -22,13 +27,12 @@ def get_bookings():
         status = request.args.get('status')
         
         # Build query based on role
+        query = Booking.query.options(*Booking.relation_loaders())
         if user.role == 'tenant':
-            query = Booking.query.filter_by(tenant_id=current_user_id)
+            query = query.filter_by(tenant_id=current_user_id)
         elif user.role == 'owner':
             # Get bookings for owner's apartments
-            query = Booking.query.join(Apartment).filter(Apartment.owner_id == current_user_id)
-        else:  # admin
-            query = Booking.query
+            query = query.join(Apartment, Booking.apartment_id == Apartment.id).filter(Apartment.owner_id == current_user_id)
         
         # Apply filters
         if status:
@@ -148,16 +152,26 @@ def create_booking():
         discount_amount = Decimal('0')
         promotion_id = data.get('promotion_id')
 
+        promotion = None
+
         if promotion_id:
-            promotion = Promotion.query.get(promotion_id)
-            if promotion and promotion.active:
-                # Check if promotion is valid (dates)
-                today = datetime.now().date()
-                if promotion.start_date <= today <= promotion.end_date:
-                    if promotion.type == 'percent':
-                        discount_amount = subtotal * (Decimal(str(promotion.value)) / Decimal('100'))
-                    elif promotion.type == 'fixed_amount':
-                        discount_amount = Decimal(str(promotion.value))
+            # Cheap pre-check against the in-process catalog
+            promotion = promotion_catalog.get(promotion_id)
+            promo_error = promotion_catalog.validate(promotion, apartment_id=apartment.id)
+            if promo_error:
+                return jsonify({'message': promo_error}), 400
+
+            # The catalog entry may be stale: re-read and lock the row in this transaction
+            promotion, promo_error = lock_promotion(promotion.id, apartment_id=apartment.id)
+            if promo_error:
+                db.session.rollback()
+                promotion_catalog.invalidate()
+                return jsonify({'message': promo_error}), 400
+
+            if promotion.type == 'percent':
+                discount_amount = subtotal * (Decimal(str(promotion.value)) / Decimal('100'))
+            elif promotion.type == 'fixed_amount':
+                discount_amount = Decimal(str(promotion.value))
 
         # Calculate final total amount after discount
         total_amount = subtotal - discount_amount
@@ -184,6 +198,12 @@ def create_booking():
         db.session.add(booking)
         db.session.flush()
         
+        # Take one promotion redemption in the same transaction as the booking
+        if promotion and not reserve_redemption(promotion.id, booking.id, booking.tenant_id):
+            db.session.rollback()
+            promotion_catalog.invalidate()
+            return jsonify({'message': 'Promo code usage limit reached'}), 400
+        
         # Create initial payment record (for total amount)
         payment = Payment(
             booking_id=booking.id,
@@ -195,7 +215,12 @@ def create_booking():
         )
         
         db.session.add(payment)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except Exception:
+            if promotion:
+                promotion_catalog.note_redemption(promotion.id, -1)
+            raise
         
         # Create notification for tenant
         create_notification(
@@ -316,6 +341,9 @@ def reject_booking(booking_id):
         booking.approved_by = current_user_id
         booking.approved_at = datetime.utcnow()
         
+        # Return the promotion redemption
+        release_redemption(booking.id)
+        
         db.session.commit()
         
         # Create notification for tenant
@@ -369,6 +397,10 @@ def cancel_booking(booking_id):
         
         # Update booking status
         booking.status = 'cancelled'
+        
+        # Return the promotion redemption
+        release_redemption(booking.id)
+        
         db.session.commit()
         
         # Create notification
@@ -408,6 +440,61 @@ def cancel_booking(booking_id):
         db.session.rollback()
         return jsonify({'message': str(e)}), 500
 
+def _bulk_booking_action(action):
+    """Run a bulk approve/reject/cancel request and report per-booking results"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = User.query.get(current_user_id)
+        
+        data = request.get_json() or {}
+        
+        try:
+            results = apply_booking_action(
+                action,
+                data.get('booking_ids'),
+                user,
+                reason=data.get('reason'),
+                max_items=current_app.config['BOOKING_BULK_MAX_ITEMS']
+            )
+        except BookingActionError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        succeeded = sum(1 for result in results if result['success'])
+        return jsonify({
+            'message': f'{succeeded} of {len(results)} bookings processed',
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 500
+
+@bookings_bp.route('/bulk/approve', methods=['POST'])
+@query_budget(20)
+@jwt_required()
+@role_required('owner', 'admin')
+def bulk_approve_bookings():
+    """Approve many pending bookings in one transaction (Owner/Admin only)"""
+    return _bulk_booking_action('approve')
+
+@bookings_bp.route('/bulk/reject', methods=['POST'])
+@query_budget(20)
+@jwt_required()
+@role_required('owner', 'admin')
+def bulk_reject_bookings():
+    """Reject many pending bookings in one transaction (Owner/Admin only)"""
+    return _bulk_booking_action('reject')
+
+@bookings_bp.route('/bulk/cancel', methods=['POST'])
+@query_budget(20)
+@jwt_required()
+@role_required('owner', 'admin')
+def bulk_cancel_bookings():
+    """Cancel many pending/confirmed bookings in one transaction (Owner/Admin only)"""
+    return _bulk_booking_action('cancel')
+
 @bookings_bp.route('/<int:booking_id>', methods=['PUT'])
 @jwt_required()
 @role_required('admin')
@@ -437,6 +524,10 @@ def update_booking(booking_id):
                 else:
                     setattr(booking, field, data[field])
         
+        # Return the promotion redemption when an admin closes the booking
+        if booking.status in ['cancelled', 'rejected']:
+            release_redemption(booking.id)
+        
         db.session.commit()
         
         # Log activity
@@ -0,0 +1,199 @@
+from flask import Blueprint, request, jsonify
+from models import db, User, Apartment, Booking, Payment, ActivityLog
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from utils import role_required
+from services.exports import export_response
+from datetime import datetime, timedelta
+
+exports_bp = Blueprint('exports', __name__, url_prefix='/api/exports')
+
+EXPORT_FORMATS = ['csv', 'xlsx']
+
+class ExportArgsError(Exception):
+    """The query string of an export request cannot be used"""
+
+def _parse_date_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ExportArgsError(f'{name} must be a date in YYYY-MM-DD format')
+
+def _parse_export_args():
+    """Get format and created_at date range from query string"""
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ExportArgsError('Format must be csv or xlsx')
+    date_from = _parse_date_arg('date_from')
+    date_to = _parse_date_arg('date_to')
+    # date_to is inclusive
+    date_to = date_to + timedelta(days=1) if date_to else None
+    return fmt, date_from, date_to
+
+def _apply_created_range(query, column, date_from, date_to):
+    if date_from:
+        query = query.filter(column >= date_from)
+    if date_to:
+        query = query.filter(column < date_to)
+    return query
+
+@exports_bp.route('/bookings', methods=['GET'])
+@jwt_required()
+def export_bookings():
+    """Export bookings as CSV (streamed) or XLSX (same role scoping as GET /api/bookings)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = User.query.get(current_user_id)
+
+        try:
+            fmt, date_from, date_to = _parse_export_args()
+        except ExportArgsError as e:
+            return jsonify({'message': str(e)}), 400
+
+        status = request.args.get('status')
+
+        headers = [
+            'booking_code', 'status', 'start_date', 'end_date', 'total_months',
+            'monthly_rent', 'discount_amount', 'total_amount', 'unit_number',
+            'unit_type', 'tenant_name', 'tenant_email', 'created_at'
+        ]
+        query = db.session.query(
+            Booking.booking_code,
+            Booking.status,
+            Booking.start_date,
+            Booking.end_date,
+            Booking.total_months,
+            Booking.monthly_rent,
+            Booking.discount_amount,
+            Booking.total_amount,
+            Apartment.unit_number,
+            Apartment.unit_type,
+            User.full_name,
+            User.email,
+            Booking.created_at
+        ).select_from(Booking).join(
+            Apartment, Booking.apartment_id == Apartment.id
+        ).join(
+            User, Booking.tenant_id == User.id
+        )
+
+        # Build query based on role
+        if user.role == 'tenant':
+            query = query.filter(Booking.tenant_id == current_user_id)
+        elif user.role == 'owner':
+            query = query.filter(Apartment.owner_id == current_user_id)
+
+        if status:
+            query = query.filter(Booking.status == status)
+
+        query = _apply_created_range(query, Booking.created_at, date_from, date_to)
+        query = query.order_by(Booking.created_at.desc())
+
+        return export_response(query, headers, 'bookings', fmt)
+
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@exports_bp.route('/payments', methods=['GET'])
+@jwt_required()
+def export_payments():
+    """Export payments as CSV (streamed) or XLSX (same role scoping as GET /api/payments)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = User.query.get(current_user_id)
+
+        try:
+            fmt, date_from, date_to = _parse_export_args()
+        except ExportArgsError as e:
+            return jsonify({'message': str(e)}), 400
+
+        status = request.args.get('status')
+
+        headers = [
+            'payment_code', 'booking_code', 'payment_type', 'amount', 'payment_method',
+            'payment_status', 'payment_date', 'due_date', 'transaction_id',
+            'unit_number', 'tenant_name', 'created_at'
+        ]
+        query = db.session.query(
+            Payment.payment_code,
+            Booking.booking_code,
+            Payment.payment_type,
+            Payment.amount,
+            Payment.payment_method,
+            Payment.payment_status,
+            Payment.payment_date,
+            Payment.due_date,
+            Payment.transaction_id,
+            Apartment.unit_number,
+            User.full_name,
+            Payment.created_at
+        ).select_from(Payment).join(
+            Booking, Payment.booking_id == Booking.id
+        ).join(
+            Apartment, Booking.apartment_id == Apartment.id
+        ).join(
+            User, Booking.tenant_id == User.id
+        )
+
+        # Build query based on role
+        if user.role == 'tenant':
+            query = query.filter(Booking.tenant_id == current_user_id)
+        elif user.role == 'owner':
+            query = query.filter(Apartment.owner_id == current_user_id)
+
+        if status:
+            query = query.filter(Payment.payment_status == status)
+
+        query = _apply_created_range(query, Payment.created_at, date_from, date_to)
+        query = query.order_by(Payment.created_at.desc())
+
+        return export_response(query, headers, 'payments', fmt)
+
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@exports_bp.route('/activity-logs', methods=['GET'])
+@jwt_required()
+@role_required('admin')
+def export_activity_logs():
+    """Export activity logs as CSV (streamed) or XLSX (Admin only)"""
+    try:
+        try:
+            fmt, date_from, date_to = _parse_export_args()
+        except ExportArgsError as e:
+            return jsonify({'message': str(e)}), 400
+
+        headers = [
+            'id', 'created_at', 'user_id', 'username', 'action',
+            'entity_type', 'entity_id', 'ip_address'
+        ]
+        query = db.session.query(
+            ActivityLog.id,
+            ActivityLog.created_at,
+            ActivityLog.user_id,
+            User.username,
+            ActivityLog.action,
+            ActivityLog.entity_type,
+            ActivityLog.entity_id,
+            ActivityLog.ip_address
+        ).select_from(ActivityLog).outerjoin(
+            User, ActivityLog.user_id == User.id
+        )
+
+        action = request.args.get('action')
+        if action:
+            query = query.filter(ActivityLog.action == action)
+
+        entity_type = request.args.get('entity_type')
+        if entity_type:
+            query = query.filter(ActivityLog.entity_type == entity_type)
+
+        query = _apply_created_range(query, ActivityLog.created_at, date_from, date_to)
+        query = query.order_by(ActivityLog.id.desc())
+
+        return export_response(query, headers, 'activity_logs', fmt)
+
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
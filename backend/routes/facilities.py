@@ -2,10 +2,16 @@ from flask import Blueprint, request, jsonify
 from models import db, Facility
 from flask_jwt_extended import jwt_required
 from utils import role_required, log_activity
+from services.http_cache import conditional
+from sqlalchemy import func
 
 facilities_bp = Blueprint('facilities', __name__, url_prefix='/api/facilities')
 
+def _facilities_fingerprint():
+    return db.session.query(func.count(Facility.id), func.max(Facility.created_at)).one()
+
 @facilities_bp.route('', methods=['GET'])
+@conditional(['facilities'], fingerprint=_facilities_fingerprint)
 def get_facilities():
     """Get all facilities"""
     try:
@@ -1,7 +1,9 @@
 # routes/notifications.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, current_app
 from models import db, Notification
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, decode_token
+from services.notification_counters import unread_counter
+from services.notification_stream import StreamLimitError, get_broker, stream_events
 
 notifications_bp = Blueprint('notifications', __name__, url_prefix='/api/notifications')
 
@@ -43,6 +45,71 @@ def get_notifications():
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+@notifications_bp.route('/stream', methods=['GET'])
+def stream_notifications():
+    """Server-sent events stream of new notifications.
+
+    EventSource cannot send headers, so the access token may be passed as ?token=.
+    On reconnect the browser sends Last-Event-ID and missed notifications are replayed.
+    A worker already holding NOTIFICATION_STREAM_MAX_CONNECTIONS streams answers 503.
+    """
+    try:
+        token = request.args.get('token')
+        if not token:
+            auth_header = request.headers.get('Authorization', '')
+            if auth_header.startswith('Bearer '):
+                token = auth_header[len('Bearer '):]
+        
+        if not token:
+            return jsonify({'message': 'Authorization token is missing'}), 401
+        
+        try:
+            decoded = decode_token(token)
+        except Exception:
+            return jsonify({'message': 'Invalid token'}), 401
+        
+        if decoded.get('type') != 'access':
+            return jsonify({'message': 'Invalid token'}), 401
+        
+        current_user_id = int(decoded['sub'])
+        
+        # Replay notifications the client missed while disconnected
+        backlog = []
+        last_event_id = request.headers.get('Last-Event-ID', type=int)
+        if last_event_id:
+            missed = Notification.query.filter(
+                Notification.user_id == current_user_id,
+                Notification.id > last_event_id
+            ).order_by(Notification.id.asc()).limit(100).all()
+            backlog = [notif.to_dict() for notif in missed]
+        
+        # Release the pooled connection before holding the stream open
+        db.session.remove()
+        
+        broker = get_broker()
+        try:
+            subscriber = broker.subscribe(current_user_id)
+        except StreamLimitError as e:
+            # The client falls back to polling /unread-count and reconnects later
+            response = jsonify({'message': str(e)})
+            response.headers['Retry-After'] = '60'
+            return response, 503
+        
+        response = Response(
+            stream_events(current_user_id, subscriber, backlog, current_app.config['NOTIFICATION_STREAM_HEARTBEAT']),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+        # Also frees the slot when the client leaves before the first frame
+        response.call_on_close(lambda: broker.unsubscribe(current_user_id, subscriber))
+        return response
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
 @notifications_bp.route('/<int:notification_id>/read', methods=['POST'])
 @jwt_required()
 def mark_as_read(notification_id):
@@ -58,9 +125,13 @@ def mark_as_read(notification_id):
         if notification.user_id != current_user_id:
             return jsonify({'message': 'Access denied'}), 403
         
+        was_unread = not notification.is_read
         notification.is_read = True
         db.session.commit()
         
+        if was_unread:
+            unread_counter.incr(current_user_id, -1)
+        
         return jsonify({
             'message': 'Notification marked as read'
         }), 200
@@ -82,6 +153,7 @@ def mark_all_read():
         ).update({'is_read': True})
         
         db.session.commit()
+        unread_counter.set(current_user_id, 0)
         
         return jsonify({
             'message': 'All notifications marked as read'
@@ -94,14 +166,11 @@ def mark_all_read():
 @notifications_bp.route('/unread-count', methods=['GET'])
 @jwt_required()
 def get_unread_count():
-    """Get unread notifications count"""
+    """Get unread notifications count (served from the per-user counter cache)"""
     try:
         current_user_id = int(get_jwt_identity())
         
-        count = Notification.query.filter_by(
-            user_id=current_user_id,
-            is_read=False
-        ).count()
+        count = unread_counter.get(current_user_id)
         
         return jsonify({
             'unread_count': count
@@ -125,9 +194,13 @@ def delete_notification(notification_id):
         if notification.user_id != current_user_id:
             return jsonify({'message': 'Access denied'}), 403
         
+        was_unread = not notification.is_read
         db.session.delete(notification)
         db.session.commit()
         
+        if was_unread:
+            unread_counter.incr(current_user_id, -1)
+        
         return jsonify({
             'message': 'Notification deleted'
         }), 200
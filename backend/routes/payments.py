@@ -1,12 +1,17 @@
-from flask import Blueprint, request, jsonify
-from models import db, Payment, Booking, User
+from flask import Blueprint, request, jsonify, current_app
+from models import db, Payment, PaymentTransaction, Booking, User
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from utils import role_required, generate_payment_code, create_notification, log_activity
+from services.payment_gateway import GatewayError, get_gateway, initiate_transaction, mark_payment_completed, process_webhook
+from services.payment_verification import PaymentVerificationError, verify_payments
+from services.response_cache import invalidate_apartment, invalidate_apartments
+from services.query_budget import query_budget
 from datetime import datetime
 
 payments_bp = Blueprint('payments', __name__, url_prefix='/api/payments')
 
 @payments_bp.route('', methods=['GET'])
+@query_budget(8)
 @jwt_required()
 def get_payments():
     """Get payments based on user role"""
@@ -19,13 +24,14 @@ def get_payments():
         status = request.args.get('status')
         
         # Build query based on role
+        query = Payment.query.options(*Payment.relation_loaders())
         if user.role == 'tenant':
-            query = Payment.query.join(Booking).filter(Booking.tenant_id == current_user_id)
+            query = query.join(Booking, Payment.booking_id == Booking.id).filter(Booking.tenant_id == current_user_id)
         elif user.role == 'owner':
             from models import Apartment
-            query = Payment.query.join(Booking).join(Apartment).filter(Apartment.owner_id == current_user_id)
-        else:  # admin
-            query = Payment.query
+            query = query.join(Booking, Payment.booking_id == Booking.id).join(
+                Apartment, Booking.apartment_id == Apartment.id
+            ).filter(Apartment.owner_id == current_user_id)
         
         # Apply filters
         if status:
@@ -247,17 +253,7 @@ def verify_payment(payment_id):
         is_approved = data.get('approved', True)
         
         if is_approved:
-            payment.payment_status = 'completed'
-
-            # If this is deposit payment, update booking status and set contract dates
-            if payment.payment_type == 'deposit':
-                booking.status = 'active'
-                # Update apartment status
-                booking.apartment.availability_status = 'occupied'
-
-                # Set contract dates - contract starts from booking start_date
-                booking.contract_start_date = booking.start_date
-                booking.contract_end_date = booking.end_date
+            mark_payment_completed(payment)
 
             # Create notification for tenant
             create_notification(
@@ -282,6 +278,10 @@ def verify_payment(payment_id):
         
         db.session.commit()
         
+        # A verified deposit marks the unit occupied
+        if is_approved and payment.payment_type == 'deposit':
+            invalidate_apartment(booking.apartment_id)
+        
         # Log activity
         log_activity(
             user_id=current_user_id,
@@ -299,6 +299,193 @@ def verify_payment(payment_id):
         db.session.rollback()
         return jsonify({'message': str(e)}), 500
 
+@payments_bp.route('/bulk/verify', methods=['POST'])
+@query_budget(20)
+@jwt_required()
+@role_required('owner', 'admin')
+def bulk_verify_payments():
+    """Approve or reject many payments in one transaction (Owner/Admin only)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = User.query.get(current_user_id)
+        
+        data = request.get_json() or {}
+        
+        try:
+            results, occupied_apartments = verify_payments(
+                data.get('decisions'),
+                user,
+                max_items=current_app.config['PAYMENT_BULK_MAX_ITEMS']
+            )
+        except PaymentVerificationError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        # Verified deposits mark their units occupied
+        invalidate_apartments(occupied_apartments)
+        
+        succeeded = sum(1 for result in results if result['success'])
+        return jsonify({
+            'message': f'{succeeded} of {len(results)} payments processed',
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 500
+
+@payments_bp.route('/<int:payment_id>/checkout', methods=['POST'])
+@jwt_required()
+def checkout_payment(payment_id):
+    """Start an online payment through a payment gateway"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = User.query.get(current_user_id)
+        
+        payment = Payment.query.get(payment_id)
+        
+        if not payment:
+            return jsonify({'message': 'Payment not found'}), 404
+        
+        # Only the tenant of the booking (or admin) can pay
+        booking = payment.booking
+        if user.role == 'owner' or (user.role == 'tenant' and booking.tenant_id != current_user_id):
+            return jsonify({'message': 'Access denied'}), 403
+        
+        if payment.payment_status != 'pending':
+            return jsonify({'message': f'Payment is already {payment.payment_status}'}), 400
+        
+        data = request.get_json(silent=True) or {}
+        gateway = get_gateway(data.get('gateway') or next(iter(current_app.config['PAYMENT_GATEWAYS']), None))
+        
+        if not gateway:
+            return jsonify({'message': 'Payment gateway not available'}), 400
+        
+        # Reuse a still-open transaction so repeated clicks do not create new charges
+        transaction = PaymentTransaction.query.filter(
+            PaymentTransaction.payment_id == payment.id,
+            PaymentTransaction.gateway_name == gateway.name,
+            PaymentTransaction.status.in_(['initiated', 'pending']),
+            PaymentTransaction.expired_at > datetime.utcnow()
+        ).order_by(PaymentTransaction.created_at.desc()).first()
+        
+        created = transaction is None
+        if created:
+            transaction = initiate_transaction(payment, gateway)
+            db.session.commit()
+            
+            # Log activity
+            log_activity(
+                user_id=current_user_id,
+                action='checkout',
+                entity_type='payment',
+                entity_id=payment_id
+            )
+        
+        return jsonify({
+            'message': 'Payment transaction created',
+            'transaction': transaction.to_dict()
+        }), 201 if created else 200
+        
+    except GatewayError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 502
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 500
+
+@payments_bp.route('/webhook/<gateway_name>', methods=['POST'])
+def payment_webhook(gateway_name):
+    """Receive payment status callbacks from a gateway (signature-authenticated)"""
+    gateway = get_gateway(gateway_name)
+    if not gateway:
+        return jsonify({'message': 'Unknown gateway'}), 404
+    
+    body = request.get_data()
+    if not gateway.verify_signature(body, request.headers):
+        return jsonify({'message': 'Invalid signature'}), 401
+    
+    payload = request.get_json(silent=True)
+    if not payload:
+        return jsonify({'message': 'Invalid payload'}), 400
+    
+    try:
+        event = gateway.parse_webhook(payload)
+        result, transaction = process_webhook(gateway, event, payload)
+    except GatewayError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 404
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 500
+    
+    if result == 'applied':
+        payment = transaction.payment
+        if transaction.status == 'success':
+            if payment.payment_type == 'deposit':
+                invalidate_apartment(payment.booking.apartment_id)
+            create_notification(
+                user_id=payment.booking.tenant_id,
+                title='Pembayaran Berhasil',
+                message=f'Pembayaran {payment.payment_code} telah diterima',
+                notification_type='payment',
+                related_id=payment.id
+            )
+        elif transaction.status in ['failed', 'expired']:
+            create_notification(
+                user_id=payment.booking.tenant_id,
+                title='Pembayaran Gagal',
+                message=f'Transaksi pembayaran {payment.payment_code} tidak berhasil. Silakan coba lagi.',
+                notification_type='payment',
+                related_id=payment.id
+            )
+    elif result == 'review':
+        payment = transaction.payment
+        create_notification(
+            user_id=payment.booking.tenant_id,
+            title='Pembayaran Sedang Ditinjau',
+            message=f'Pembayaran {payment.payment_code} diterima dan sedang ditinjau oleh admin',
+            notification_type='payment',
+            related_id=payment.id
+        )
+    
+    # Always acknowledge duplicates and reviews with 200 so the gateway stops retrying
+    return jsonify({
+        'status': result,
+        'transaction_status': transaction.status
+    }), 200
+
+@payments_bp.route('/<int:payment_id>/transactions', methods=['GET'])
+@jwt_required()
+def get_payment_transactions(payment_id):
+    """Get gateway transactions of a payment"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = User.query.get(current_user_id)
+        
+        payment = Payment.query.get(payment_id)
+        
+        if not payment:
+            return jsonify({'message': 'Payment not found'}), 404
+        
+        booking = payment.booking
+        if user.role == 'tenant' and booking.tenant_id != current_user_id:
+            return jsonify({'message': 'Access denied'}), 403
+        if user.role == 'owner' and booking.apartment.owner_id != current_user_id:
+            return jsonify({'message': 'Access denied'}), 403
+        
+        transactions = PaymentTransaction.query.filter_by(payment_id=payment_id).order_by(
+            PaymentTransaction.created_at.desc()
+        ).all()
+        
+        return jsonify({
+            'transactions': [transaction.to_dict() for transaction in transactions]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
 @payments_bp.route('/booking/<int:booking_id>', methods=['GET'])
 @jwt_required()
 def get_booking_payments(booking_id):
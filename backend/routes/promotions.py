@@ -2,11 +2,19 @@ from flask import Blueprint, request, jsonify
 from models import db, Promotion, Apartment
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from utils import role_required, log_activity
+from services.promotion_catalog import promotion_catalog
+from services.http_cache import conditional
+from sqlalchemy import func
 from datetime import datetime
 
 promotions_bp = Blueprint('promotions', __name__, url_prefix='/api/promotions')
 
+def _promotions_fingerprint():
+    # The public listing only shows promotions active today
+    return db.session.query(func.count(Promotion.id), func.max(Promotion.updated_at)).one(), datetime.now().date()
+
 @promotions_bp.route('', methods=['GET'])
+@conditional(['promotions'], fingerprint=_promotions_fingerprint)
 def get_promotions():
     """Get all promotions (admin can see all, others only active)"""
     try:
@@ -25,25 +33,56 @@ def get_promotions():
         except:
             pass
 
-        # Build query
-        query = Promotion.query
+        status = request.args.get('status')
+        promo_type = request.args.get('type')
 
-        # If not admin, only show active promotions
+        # Public listing is served from the in-process catalog (active promotions only)
         if not is_admin:
-            query = query.filter(Promotion.active == True)
+            if status and status != 'active':
+                promotions = []
+            else:
+                promotions = [
+                    entry for entry in promotion_catalog.all()
+                    if not promo_type or entry.type == promo_type
+                ]
+
+            return jsonify({
+                'promotions': [entry.to_dict() for entry in promotions],
+                'total': len(promotions)
+            }), 200
+
+        # Build query
+        query = Promotion.query
 
         # Get filter parameters
-        status = request.args.get('status')
         if status:
             active = status == 'active'
             query = query.filter(Promotion.active == active)
 
-        promo_type = request.args.get('type')
         if promo_type:
             query = query.filter(Promotion.type == promo_type)
 
         # Order by created_at desc
-        promotions = query.order_by(Promotion.created_at.desc()).all()
+        query = query.order_by(Promotion.created_at.desc())
+
+        # Paginate only when requested (the admin page loads the full list)
+        if 'page' in request.args or 'per_page' in request.args:
+            page = request.args.get('page', 1, type=int)
+            per_page = request.args.get('per_page', 10, type=int)
+            promotions = query.paginate(page=page, per_page=per_page, error_out=False)
+
+            return jsonify({
+                'promotions': [promo.to_dict() for promo in promotions.items],
+                'total': promotions.total,
+                'pagination': {
+                    'page': promotions.page,
+                    'per_page': promotions.per_page,
+                    'total': promotions.total,
+                    'pages': promotions.pages
+                }
+            }), 200
+
+        promotions = query.all()
 
         return jsonify({
             'promotions': [promo.to_dict() for promo in promotions],
@@ -122,6 +161,7 @@ def create_promotion():
 
         db.session.add(promotion)
         db.session.commit()
+        promotion_catalog.invalidate()
 
         # Log activity
         log_activity(
@@ -187,6 +227,7 @@ def update_promotion(promotion_id):
             return jsonify({'message': 'End date must be after start date'}), 400
 
         db.session.commit()
+        promotion_catalog.invalidate()
 
         # Log activity
         log_activity(
@@ -224,6 +265,7 @@ def delete_promotion(promotion_id):
 
         db.session.delete(promotion)
         db.session.commit()
+        promotion_catalog.invalidate()
 
         # Log activity
         log_activity(
@@ -245,20 +287,17 @@ def delete_promotion(promotion_id):
 
 @promotions_bp.route('/validate/<code>', methods=['GET'])
 def validate_promo_code(code):
-    """Validate promo code"""
+    """Validate promo code (served from the promotion catalog, no database round trip)"""
     try:
-        promotion = Promotion.query.filter_by(code=code.upper(), active=True).first()
+        apartment_id = request.args.get('apartment_id', type=int)
+        promotion = promotion_catalog.get_by_code(code)
 
         if not promotion:
             return jsonify({'valid': False, 'message': 'Invalid promo code'}), 404
 
-        # Check if promotion is expired
-        today = datetime.now().date()
-        if promotion.start_date and today < promotion.start_date:
-            return jsonify({'valid': False, 'message': 'Promo code not yet active'}), 400
-
-        if promotion.end_date and today > promotion.end_date:
-            return jsonify({'valid': False, 'message': 'Promo code has expired'}), 400
+        error = promotion_catalog.validate(promotion, apartment_id=apartment_id)
+        if error:
+            return jsonify({'valid': False, 'message': error}), 400
 
         return jsonify({
             'valid': True,
@@ -266,4 +305,4 @@ def validate_promo_code(code):
         }), 200
 
     except Exception as e:
-        return jsonify({'message': str(e)}), 500
+        return jsonify({'message': str(e)}), 500
\ No newline at end of file
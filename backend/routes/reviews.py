@@ -3,6 +3,11 @@ from flask import Blueprint, request, jsonify
 from models import db, Review, Apartment, Booking, User
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from utils import role_required, create_notification, log_activity
+from services.ratings import record_review, discard_review, get_rating_summary, recompute_rating_aggregates
+from services.http_cache import conditional
+from services.response_cache import invalidate_apartment
+from sqlalchemy import func
+from datetime import datetime
 
 reviews_bp = Blueprint('reviews', __name__, url_prefix='/api/reviews')
 
@@ -12,7 +17,7 @@ reviews_bp = Blueprint('reviews', __name__, url_prefix='/api/reviews')
 def create_review():
     """Create apartment review (Tenant only, must have completed booking)"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         data = request.get_json()
         
         required_fields = ['apartment_id', 'booking_id', 'rating']
@@ -53,12 +58,9 @@ def create_review():
         db.session.add(review)
         db.session.flush()
         
-        # Update apartment average rating
+        # Update apartment rating aggregate (no-op until the review is approved)
         apartment = Apartment.query.get(data['apartment_id'])
-        reviews = Review.query.filter_by(apartment_id=data['apartment_id'], is_approved=True).all()
-        if reviews:
-            avg_rating = sum(r.rating for r in reviews) / len(reviews)
-            apartment.avg_rating = avg_rating
+        record_review(review)
         
         db.session.commit()
         
@@ -95,17 +97,24 @@ def create_review():
 def approve_review(review_id):
     """Approve review (Admin only)"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
         review = Review.query.get(review_id)
         if not review:
             return jsonify({'message': 'Review not found'}), 404
         
+        if review.is_approved:
+            return jsonify({'message': 'Review is already approved'}), 400
+        
         review.is_approved = True
         review.approved_by = current_user_id
         review.approved_at = datetime.utcnow()
         
+        # Count the rating now that it is public
+        record_review(review)
+        
         db.session.commit()
+        invalidate_apartment(review.apartment_id)
         
         create_notification(
             user_id=review.tenant_id,
@@ -123,7 +132,132 @@ def approve_review(review_id):
         db.session.rollback()
         return jsonify({'message': str(e)}), 500
 
+@reviews_bp.route('/<int:review_id>/reject', methods=['POST'])
+@jwt_required()
+@role_required('admin')
+def reject_review(review_id):
+    """Withdraw approval of a published review (Admin only)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        review = Review.query.get(review_id)
+        if not review:
+            return jsonify({'message': 'Review not found'}), 404
+        
+        if not review.is_approved:
+            return jsonify({'message': 'Review is not approved'}), 400
+        
+        # Take the rating out of the aggregate while it still counts as approved
+        discard_review(review)
+        
+        review.is_approved = False
+        review.approved_by = None
+        review.approved_at = None
+        
+        db.session.commit()
+        invalidate_apartment(review.apartment_id)
+        
+        create_notification(
+            user_id=review.tenant_id,
+            title='Ulasan Ditolak',
+            message='Ulasan Anda tidak lagi ditampilkan',
+            notification_type='system'
+        )
+        
+        log_activity(
+            user_id=current_user_id,
+            action='reject',
+            entity_type='review',
+            entity_id=review_id
+        )
+        
+        return jsonify({
+            'message': 'Review rejected',
+            'review': review.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 500
+
+@reviews_bp.route('/<int:review_id>', methods=['DELETE'])
+@jwt_required()
+@role_required('tenant', 'admin')
+def delete_review(review_id):
+    """Delete review (Admin or review author)"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = User.query.get(current_user_id)
+        
+        review = Review.query.get(review_id)
+        if not review:
+            return jsonify({'message': 'Review not found'}), 404
+        
+        if user.role == 'tenant' and review.tenant_id != current_user_id:
+            return jsonify({'message': 'Access denied'}), 403
+        
+        old_data = review.to_dict()
+        
+        # Remove the rating from the aggregate before the row goes away
+        discard_review(review)
+        
+        db.session.delete(review)
+        db.session.commit()
+        if old_data.get('is_approved'):
+            invalidate_apartment(review.apartment_id)
+        
+        log_activity(
+            user_id=current_user_id,
+            action='delete',
+            entity_type='review',
+            entity_id=review_id,
+            old_data=old_data
+        )
+        
+        return jsonify({
+            'message': 'Review deleted'
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 500
+
+@reviews_bp.route('/apartment/<int:apartment_id>/summary', methods=['GET'])
+def get_apartment_rating_summary(apartment_id):
+    """Get rating average, count and star histogram for an apartment"""
+    try:
+        return jsonify({
+            'summary': get_rating_summary(apartment_id)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@reviews_bp.route('/aggregates/repair', methods=['POST'])
+@jwt_required()
+@role_required('admin')
+def repair_rating_aggregates():
+    """Recompute rating aggregates for all apartments (Admin only)"""
+    try:
+        processed = recompute_rating_aggregates()
+        
+        return jsonify({
+            'message': 'Rating aggregates recomputed',
+            'apartments': processed
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 500
+
+def _reviews_fingerprint(apartment_id):
+    return db.session.query(func.count(Review.id), func.max(Review.approved_at)).filter(
+        Review.apartment_id == apartment_id,
+        Review.is_approved == True
+    ).one()
+
 @reviews_bp.route('/apartment/<int:apartment_id>', methods=['GET'])
+@conditional(['reviews'], fingerprint=_reviews_fingerprint)
 def get_apartment_reviews(apartment_id):
     """Get reviews for an apartment"""
     try:
@@ -139,6 +273,7 @@ def get_apartment_reviews(apartment_id):
         
         return jsonify({
             'reviews': [review.to_dict() for review in reviews.items],
+            'summary': get_rating_summary(apartment_id),
             'pagination': {
                 'page': reviews.page,
                 'per_page': reviews.per_page,
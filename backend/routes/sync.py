@@ -0,0 +1,46 @@
+from flask import Blueprint, request, jsonify, current_app
+from models import User
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from services.query_budget import query_budget
+from services.sync import SYNC_ENTITIES, SyncCursorError, build_delta
+
+sync_bp = Blueprint('sync', __name__, url_prefix='/api/sync')
+
+@sync_bp.route('', methods=['GET'])
+@query_budget(8)
+@jwt_required()
+def get_delta():
+    """Bookings, payments, notifications and favorites changed or deleted since a cursor
+
+    Without a cursor this is a full sync. Call again with the returned cursor
+    while has_more is true; store the last cursor for the next app open.
+    """
+    try:
+        current_user_id = int(get_jwt_identity())
+        user = User.query.get(current_user_id)
+        
+        entities = request.args.get('entities')
+        entities = [name.strip() for name in entities.split(',') if name.strip()] if entities else list(SYNC_ENTITIES)
+        unknown = [name for name in entities if name not in SYNC_ENTITIES]
+        if unknown:
+            return jsonify({'message': f"Unknown entities: {', '.join(unknown)}"}), 400
+        
+        max_rows = current_app.config['SYNC_MAX_ROWS']
+        limit = min(max(request.args.get('limit', max_rows, type=int), 1), max_rows)
+        
+        try:
+            delta = build_delta(
+                user,
+                cursor=request.args.get('cursor'),
+                entities=entities,
+                limit=limit,
+                overlap_seconds=current_app.config['SYNC_OVERLAP_SECONDS'],
+                retention_days=current_app.config['SYNC_TOMBSTONE_RETENTION_DAYS']
+            )
+        except SyncCursorError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        return jsonify(delta), 200
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
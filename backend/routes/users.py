@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from models import db, User
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from utils import role_required, save_file, log_activity
+from services.favorites import discard_user_favorites
 from datetime import datetime
 
 users_bp = Blueprint('users', __name__, url_prefix='/api/users')
@@ -269,6 +270,7 @@ def delete_user(user_id):
         
         old_data = user.to_dict()
         
+        discard_user_favorites(user_id)
         db.session.delete(user)
         db.session.commit()
         
@@ -0,0 +1,284 @@
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import delete, func, insert, update
+from models import db, Apartment, ApartmentFacility, Facility, User
+
+IMPORT_MODES = ('create', 'upsert')
+
+REQUIRED_FIELDS = ('unit_number', 'unit_type', 'price_per_month')
+TEXT_FIELDS = {'unit_number': 20, 'unit_type': 50, 'description': None, 'view_direction': 50, 'water_source': 50}
+INTEGER_FIELDS = ('floor', 'bedrooms', 'bathrooms', 'minimum_stay_months', 'electricity_watt', 'parking_slots', 'owner_id')
+DECIMAL_FIELDS = ('size_sqm', 'price_per_month', 'deposit_amount')
+BOOLEAN_FIELDS = ('furnished', 'pet_friendly', 'smoking_allowed')
+AVAILABILITY_STATUSES = ('available', 'occupied')
+
+# Values of columns a new unit gets when the row leaves them out (same as create_apartment)
+CREATE_DEFAULTS = {
+    'floor': None, 'size_sqm': None, 'bedrooms': None, 'bathrooms': None, 'deposit_amount': None,
+    'minimum_stay_months': 1, 'description': None, 'furnished': False, 'view_direction': None,
+    'electricity_watt': None, 'water_source': None, 'parking_slots': None, 'pet_friendly': False,
+    'smoking_allowed': False, 'availability_status': 'available'
+}
+
+TRUE_VALUES = ('1', 'true', 'yes', 'y')
+FALSE_VALUES = ('0', 'false', 'no', 'n')
+
+class ApartmentImportError(Exception):
+    """The upload as a whole cannot be imported (unreadable file, too many rows)"""
+
+def read_rows(payload, filename=None, content_type=None):
+    """Rows of a CSV or JSON upload as a list of dicts.
+
+    JSON is either a list of apartments or {"apartments": [...]}. CSV has a
+    header row with the field names; facility_ids are separated by ';' or '|'
+    and empty cells count as not provided.
+    """
+    if isinstance(payload, bytes):
+        try:
+            payload = payload.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ApartmentImportError('File must be UTF-8 encoded')
+
+    is_csv = (filename or '').lower().endswith('.csv') or 'csv' in (content_type or '')
+    if isinstance(payload, str) and not is_csv:
+        try:
+            payload = json.loads(payload)
+        except ValueError:
+            raise ApartmentImportError('File is not valid JSON (use a .csv file name for CSV)')
+
+    if isinstance(payload, str):
+        reader = csv.DictReader(io.StringIO(payload))
+        return [
+            {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+            for row in reader
+        ]
+
+    if isinstance(payload, dict):
+        payload = payload.get('apartments')
+    if not isinstance(payload, list) or not all(isinstance(row, dict) for row in payload):
+        raise ApartmentImportError('Expected a list of apartments or {"apartments": [...]}')
+    return payload
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError
+
+def _parse_facility_ids(value):
+    if isinstance(value, str):
+        value = [part for part in value.replace('|', ';').split(';') if part.strip()]
+    if not isinstance(value, list):
+        raise ValueError
+    return sorted({int(facility_id) for facility_id in value})
+
+def validate_row(raw, require_all=True):
+    """Typed values of one row and its errors.
+
+    Only fields present in the row are returned, so an update changes just
+    those columns. `require_all` is False for rows updating an existing unit.
+    """
+    values = {}
+    errors = []
+    for field, max_length in TEXT_FIELDS.items():
+        value = raw.get(field)
+        if value is None:
+            continue
+        value = str(value).strip()
+        if max_length and len(value) > max_length:
+            errors.append(f'{field} is longer than {max_length} characters')
+        values[field] = value
+    for field in INTEGER_FIELDS:
+        if raw.get(field) is not None:
+            try:
+                values[field] = int(raw[field])
+            except (TypeError, ValueError):
+                errors.append(f'{field} must be an integer')
+    for field in DECIMAL_FIELDS:
+        if raw.get(field) is not None:
+            try:
+                values[field] = Decimal(str(raw[field]))
+            except InvalidOperation:
+                errors.append(f'{field} must be a number')
+                continue
+            if values[field] < 0:
+                errors.append(f'{field} cannot be negative')
+    for field in BOOLEAN_FIELDS:
+        if raw.get(field) is not None:
+            try:
+                values[field] = _parse_bool(raw[field])
+            except ValueError:
+                errors.append(f'{field} must be true or false')
+    if raw.get('availability_status') is not None:
+        if raw['availability_status'] not in AVAILABILITY_STATUSES:
+            errors.append(f"availability_status must be one of {', '.join(AVAILABILITY_STATUSES)}")
+        values['availability_status'] = raw['availability_status']
+    if raw.get('facility_ids') is not None:
+        try:
+            values['facility_ids'] = _parse_facility_ids(raw['facility_ids'])
+        except (TypeError, ValueError):
+            errors.append('facility_ids must be a list of facility ids')
+
+    if values.get('minimum_stay_months') is not None and values['minimum_stay_months'] < 1:
+        errors.append('minimum_stay_months must be at least 1')
+    required = REQUIRED_FIELDS if require_all else ('unit_number',)
+    for field in required:
+        if values.get(field) in (None, '') and raw.get(field) in (None, ''):
+            errors.append(f'{field} is required')
+    return values, errors
+
+def import_apartments(rows, user, mode='create', partial=False, dry_run=False, max_rows=5000):
+    """Validate and write many apartments with a fixed number of statements.
+
+    Unit numbers, facilities and owners referenced by the rows are each checked
+    with one IN query; new units are written with one executemany INSERT,
+    updates (mode 'upsert', for unit numbers that already exist) with one bulk
+    UPDATE by primary key, and facility links with one DELETE and one INSERT.
+    Rows with errors make the whole import fail unless `partial` is set, in
+    which case only the valid rows are written. Returns a summary with the
+    created and updated apartment ids and the per-row errors (row numbers
+    start at 1 for the first data row). Commits its own transaction; a dry
+    run only validates.
+    """
+    if mode not in IMPORT_MODES:
+        raise ApartmentImportError(f"mode must be one of {', '.join(IMPORT_MODES)}")
+    if not rows:
+        raise ApartmentImportError('No apartments to import')
+    if len(rows) > max_rows:
+        raise ApartmentImportError(f'At most {max_rows} apartments can be imported at once')
+
+    unit_numbers = {str(row['unit_number']).strip() for row in rows if row.get('unit_number') is not None}
+    existing = {
+        unit_number: (apartment_id, owner_id)
+        for apartment_id, unit_number, owner_id in db.session.query(
+            Apartment.id, Apartment.unit_number, Apartment.owner_id
+        ).filter(Apartment.unit_number.in_(unit_numbers)).all()
+    } if unit_numbers else {}
+
+    parsed = []
+    errors = []
+    seen = set()
+    for number, raw in enumerate(rows, start=1):
+        unit_number = str(raw.get('unit_number') or '').strip()
+        target = existing.get(unit_number)
+        values, row_errors = validate_row(raw, require_all=target is None or mode == 'create')
+
+        if unit_number and unit_number in seen:
+            row_errors.append('Duplicate unit_number in this import')
+        seen.add(unit_number)
+
+        if target is not None:
+            if mode == 'create':
+                row_errors.append('Unit number already exists')
+            elif user.role == 'owner' and target[1] != user.id:
+                row_errors.append('Unit number belongs to another owner')
+
+        if user.role == 'owner':
+            values.pop('owner_id', None)
+            if target is None:
+                values['owner_id'] = user.id
+        elif target is None and values.get('owner_id') is None:
+            row_errors.append('owner_id is required')
+
+        parsed.append((number, unit_number, values, target, row_errors))
+
+    # Facilities and owners referenced anywhere in the file, one query each
+    facility_ids = {fid for _, _, values, _, _ in parsed for fid in values.get('facility_ids', ())}
+    known_facilities = {
+        fid for (fid,) in db.session.query(Facility.id).filter(Facility.id.in_(facility_ids)).all()
+    } if facility_ids else set()
+    owner_ids = {values['owner_id'] for _, _, values, _, _ in parsed if values.get('owner_id') is not None}
+    known_owners = {
+        uid for (uid,) in db.session.query(User.id).filter(User.id.in_(owner_ids), User.role == 'owner').all()
+    } if owner_ids else set()
+
+    new_rows = []
+    update_rows = []
+    for number, unit_number, values, target, row_errors in parsed:
+        unknown = [fid for fid in values.get('facility_ids', ()) if fid not in known_facilities]
+        if unknown:
+            row_errors.append(f"Unknown facility ids: {', '.join(map(str, unknown))}")
+        if values.get('owner_id') is not None and values['owner_id'] not in known_owners:
+            row_errors.append(f"Owner {values['owner_id']} not found")
+        if row_errors:
+            errors.append({'row': number, 'unit_number': unit_number or None, 'errors': row_errors})
+        elif target is None:
+            new_rows.append(values)
+        else:
+            update_rows.append((target[0], values))
+
+    summary = {
+        'rows': len(rows),
+        'created': [],
+        'updated': [],
+        'errors': errors,
+        'dry_run': dry_run,
+        'would_create': len(new_rows),
+        'would_update': len(update_rows)
+    }
+    if dry_run or (errors and not partial) or not (new_rows or update_rows):
+        return summary
+
+    now = datetime.utcnow()
+    facility_rows = []
+    try:
+        if new_rows:
+            max_id = db.session.query(func.max(Apartment.id)).scalar() or 0
+            db.session.execute(insert(Apartment), [
+                {
+                    **CREATE_DEFAULTS,
+                    **{key: value for key, value in values.items() if key != 'facility_ids'},
+                    'is_archived': False,
+                    'created_at': now,
+                    'updated_at': now
+                }
+                for values in new_rows
+            ])
+            # MySQL has no INSERT ... RETURNING; the new ids are the rows above the previous maximum
+            created = dict(db.session.query(Apartment.unit_number, Apartment.id).filter(
+                Apartment.unit_number.in_([values['unit_number'] for values in new_rows]),
+                Apartment.id > max_id
+            ).all())
+            if len(created) != len(new_rows):
+                raise ApartmentImportError('Some unit numbers were created concurrently, nothing was imported')
+            for values in new_rows:
+                apartment_id = created[values['unit_number']]
+                summary['created'].append(apartment_id)
+                facility_rows.extend(
+                    {'apartment_id': apartment_id, 'facility_id': fid, 'created_at': now}
+                    for fid in values.get('facility_ids', ())
+                )
+
+        if update_rows:
+            db.session.execute(update(Apartment), [
+                {
+                    'id': apartment_id,
+                    **{key: value for key, value in values.items() if key not in ('facility_ids', 'unit_number')},
+                    'updated_at': now
+                }
+                for apartment_id, values in update_rows
+            ])
+            replaced = [apartment_id for apartment_id, values in update_rows if 'facility_ids' in values]
+            if replaced:
+                db.session.execute(delete(ApartmentFacility).where(ApartmentFacility.apartment_id.in_(replaced)))
+            for apartment_id, values in update_rows:
+                summary['updated'].append(apartment_id)
+                facility_rows.extend(
+                    {'apartment_id': apartment_id, 'facility_id': fid, 'created_at': now}
+                    for fid in values.get('facility_ids', ())
+                )
+
+        if facility_rows:
+            db.session.execute(insert(ApartmentFacility), facility_rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return summary
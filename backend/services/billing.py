@@ -0,0 +1,174 @@
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from models import db, Booking, Payment
+from utils import add_months, generate_invoice_code, create_notifications
+
+BILLING_CHUNK_SIZE = 5000
+
+def billing_periods(start_date, end_date, until, since=None, prepaid_months=0):
+    """Start dates of the monthly rent periods of a lease that are due by `until`.
+
+    The first `prepaid_months` periods were paid with the booking and are
+    skipped, and so are periods that ended on or before `since` (no back-billing).
+    """
+    periods = []
+    months = prepaid_months
+    period_start = add_months(start_date, months)
+    while period_start < end_date and period_start <= until:
+        period_end = min(add_months(start_date, months + 1), end_date)
+        if since is None or period_end > since:
+            periods.append(period_start)
+        months += 1
+        period_start = add_months(start_date, months)
+    return periods
+
+def prepaid_months(lease):
+    """Rent months included in the booking's upfront payment.
+
+    create_booking charges total_amount = monthly_rent * total_months + deposit
+    + utility deposit + admin fee - discount, so what is left after the
+    deposit and fees (before the discount) is rent paid in advance. A booking
+    made through the API has therefore prepaid its whole booked term and is
+    only invoiced for months past it (an admin moved end_date out); leases
+    without a total_amount (imported or generated data) prepaid nothing.
+    """
+    if not lease.total_amount or not lease.monthly_rent:
+        return 0
+    rent_paid = (
+        lease.total_amount + (lease.discount_amount or 0)
+        - (lease.deposit_paid or 0) - (lease.utility_deposit or 0) - (lease.admin_fee or 0)
+    )
+    return max(int(rent_paid // lease.monthly_rent), 0)
+
+def _insert_ignore(table):
+    """INSERT that skips rows hitting a unique key (MySQL and SQLite syntax)"""
+    return insert(table).prefix_with('IGNORE', dialect='mysql').prefix_with('OR IGNORE', dialect='sqlite')
+
+def _bill_chunk(leases, as_of, until, now):
+    """Create the missing invoices for one chunk of leases.
+
+    Returns the invoice rows actually inserted and the number of leases whose
+    whole term is prepaid.
+    """
+    booking_ids = [lease.id for lease in leases]
+    existing = set(db.session.query(Payment.booking_id, Payment.billing_period).filter(
+        Payment.booking_id.in_(booking_ids),
+        Payment.payment_type == 'monthly_rent',
+        Payment.billing_period.isnot(None)
+    ).all())
+
+    rows = []
+    fully_prepaid = 0
+    for lease in leases:
+        start_date = lease.contract_start_date or lease.start_date
+        end_date = lease.contract_end_date or lease.end_date
+        prepaid = prepaid_months(lease)
+        if add_months(start_date, prepaid) >= end_date:
+            fully_prepaid += 1
+            continue
+        for period in billing_periods(start_date, end_date, until, since=as_of, prepaid_months=prepaid):
+            if (lease.id, period) in existing:
+                continue
+            rows.append({
+                'booking_id': lease.id,
+                'payment_code': generate_invoice_code(lease.id, period),
+                'payment_type': 'monthly_rent',
+                'amount': lease.monthly_rent,
+                'payment_status': 'pending',
+                'due_date': period,
+                'billing_period': period,
+                'notes': f"Sewa bulanan periode {period.strftime('%Y-%m')}",
+                'created_at': now,
+                'updated_at': now,
+                '_tenant_id': lease.tenant_id
+            })
+
+    if rows:
+        # The unique (booking_id, payment_type, billing_period) key makes a concurrent
+        # or repeated run skip rows instead of double billing
+        db.session.execute(
+            _insert_ignore(Payment.__table__),
+            [{key: value for key, value in row.items() if not key.startswith('_')} for row in rows]
+        )
+        # Rows another run inserted first were skipped; only the ones stamped with
+        # this run's created_at are ours to count and notify
+        inserted = {code for (code,) in db.session.query(Payment.payment_code).filter(
+            Payment.payment_code.in_([row['payment_code'] for row in rows]),
+            Payment.created_at == now
+        ).all()}
+        rows = [row for row in rows if row['payment_code'] in inserted]
+    db.session.commit()
+    return rows, fully_prepaid
+
+def generate_rent_invoices(as_of=None, lead_days=7, chunk_size=BILLING_CHUNK_SIZE, notify=True):
+    """Generate monthly_rent payments for every active lease.
+
+    Every rent period that starts on or before `as_of + lead_days` gets one
+    pending invoice, due on the first day of the period. Periods already paid
+    with the booking's upfront payment (see prepaid_months) are not billed,
+    so bookings made through the API, which pay their whole term upfront,
+    get invoices only once their lease is extended past it; neither are periods that ended on or before `as_of`, so the first run
+    does not back-bill a lease's past months. Leases are read in keyset-ordered
+    chunks of plain columns, locked for the chunk's transaction so concurrent
+    runs take turns; each chunk costs one lookup of already billed periods, one
+    multi-row INSERT, one check of the inserted rows and one commit, so reruns
+    are cheap and idempotent.
+
+    Returns a summary with the number of leases scanned, leases whose whole
+    term is prepaid, and invoices created.
+    """
+    started = time.perf_counter()
+    as_of = as_of or datetime.now().date()
+    until = as_of + timedelta(days=lead_days)
+    # Whole seconds, so the stamp compares equal after a DATETIME round trip
+    now = datetime.utcnow().replace(microsecond=0)
+
+    scanned = 0
+    prepaid = 0
+    created = 0
+    last_id = 0
+    while True:
+        leases = db.session.query(
+            Booking.id,
+            Booking.tenant_id,
+            Booking.start_date,
+            Booking.end_date,
+            Booking.contract_start_date,
+            Booking.contract_end_date,
+            Booking.monthly_rent,
+            Booking.total_amount,
+            Booking.discount_amount,
+            Booking.deposit_paid,
+            Booking.utility_deposit,
+            Booking.admin_fee
+        ).filter(
+            Booking.status == 'active',
+            Booking.id > last_id
+        ).order_by(Booking.id).limit(chunk_size).with_for_update().all()
+
+        if not leases:
+            break
+
+        last_id = leases[-1].id
+        scanned += len(leases)
+        rows, fully_prepaid = _bill_chunk(leases, as_of, until, now)
+        prepaid += fully_prepaid
+        created += len(rows)
+
+        if notify and rows:
+            create_notifications([{
+                'user_id': row['_tenant_id'],
+                'title': 'Tagihan Sewa Bulanan',
+                'message': f"Tagihan {row['payment_code']} jatuh tempo {row['due_date'].isoformat()}",
+                'notification_type': 'payment'
+            } for row in rows])
+
+    return {
+        'as_of': as_of.isoformat(),
+        'billed_until': until.isoformat(),
+        'leases_scanned': scanned,
+        'leases_prepaid': prepaid,
+        'invoices_created': created,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
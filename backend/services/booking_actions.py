@@ -0,0 +1,129 @@
+from datetime import datetime
+from sqlalchemy import insert
+from models import db, ActivityLog, Apartment, Booking
+from services.redemptions import release_redemptions
+from utils import create_notifications
+
+# Status a booking must have for each action, and the status it moves to
+BOOKING_ACTIONS = {
+    'approve': (('pending',), 'confirmed'),
+    'reject': (('pending',), 'rejected'),
+    'cancel': (('pending', 'confirmed'), 'cancelled')
+}
+
+class BookingActionError(Exception):
+    """The batch as a whole is invalid (unknown action, bad or too many ids)"""
+
+def _notification(action, booking, unit_number, reason):
+    if action == 'approve':
+        title = 'Booking Disetujui'
+        message = f'Booking Anda untuk {unit_number} telah disetujui!'
+    elif action == 'reject':
+        title = 'Booking Ditolak'
+        message = f'Booking Anda untuk {unit_number} ditolak. Alasan: {reason}'
+    else:
+        title = 'Booking Dibatalkan'
+        message = f'Booking Anda untuk {unit_number} telah dibatalkan'
+    return {
+        'user_id': booking.tenant_id,
+        'title': title,
+        'message': message,
+        'notification_type': 'booking',
+        'related_id': booking.id
+    }
+
+def apply_booking_action(action, booking_ids, user, reason=None, max_items=1000):
+    """Approve, reject or cancel many bookings in one transaction.
+
+    The bookings are locked (SELECT ... FOR UPDATE) and checked one by one
+    like the single-booking endpoints do (ownership, current status); the
+    eligible ones change with one conditional UPDATE, their promotion
+    redemptions are released in bulk, and their activity log rows and tenant
+    notifications are inserted together with the status change. Returns one
+    result per requested id, in request order.
+    """
+    if action not in BOOKING_ACTIONS:
+        raise BookingActionError(f'Unknown action: {action}')
+    if not isinstance(booking_ids, list) or not booking_ids:
+        raise BookingActionError('booking_ids must be a non-empty list')
+    try:
+        booking_ids = list(dict.fromkeys(int(booking_id) for booking_id in booking_ids))
+    except (TypeError, ValueError):
+        raise BookingActionError('booking_ids must be integers')
+    if len(booking_ids) > max_items:
+        raise BookingActionError(f'At most {max_items} bookings can be processed at once')
+
+    from_statuses, to_status = BOOKING_ACTIONS[action]
+    if action == 'reject':
+        reason = reason or 'No reason provided'
+
+    bookings = {
+        booking.id: booking
+        for booking in Booking.query.filter(Booking.id.in_(booking_ids)).with_for_update().all()
+    }
+    apartments = dict(db.session.query(Apartment.id, Apartment).filter(
+        Apartment.id.in_({booking.apartment_id for booking in bookings.values()})
+    ).all()) if bookings else {}
+
+    results = []
+    eligible = []
+    for booking_id in booking_ids:
+        booking = bookings.get(booking_id)
+        if booking is None:
+            results.append({'booking_id': booking_id, 'success': False, 'message': 'Booking not found'})
+            continue
+        apartment = apartments[booking.apartment_id]
+        if user.role == 'owner' and apartment.owner_id != user.id:
+            results.append({'booking_id': booking_id, 'success': False, 'message': 'Access denied'})
+            continue
+        if booking.status not in from_statuses:
+            results.append({
+                'booking_id': booking_id,
+                'success': False,
+                'message': f'Booking is already {booking.status}'
+            })
+            continue
+        eligible.append(booking)
+        results.append({'booking_id': booking_id, 'success': True, 'status': to_status})
+
+    if not eligible:
+        db.session.rollback()
+        return results
+
+    now = datetime.utcnow()
+    eligible_ids = [booking.id for booking in eligible]
+    values = {Booking.status: to_status}
+    if action in ('approve', 'reject'):
+        values[Booking.approved_by] = user.id
+        values[Booking.approved_at] = now
+    if action == 'reject':
+        values[Booking.rejection_reason] = reason
+    Booking.query.filter(
+        Booking.id.in_(eligible_ids),
+        Booking.status.in_(from_statuses)
+    ).update(values, synchronize_session=False)
+
+    if action in ('reject', 'cancel'):
+        release_redemptions(eligible_ids)
+
+    db.session.execute(insert(ActivityLog), [
+        {
+            'user_id': user.id,
+            'action': action,
+            'entity_type': 'booking',
+            'entity_id': booking.id,
+            'old_data': {'status': booking.status},
+            'new_data': {'status': to_status},
+            'ip_address': None,
+            'user_agent': None,
+            'created_at': now
+        }
+        for booking in eligible
+    ])
+
+    # Commits the status changes, audit rows and notifications together
+    create_notifications([
+        _notification(action, booking, apartments[booking.apartment_id].unit_number, reason)
+        for booking in eligible
+    ])
+    return results
@@ -0,0 +1,343 @@
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import func, insert, update
+from werkzeug.security import generate_password_hash
+from models import db, User, Apartment, Booking, Payment, Notification, ActivityLog
+from utils import add_months
+
+DATAGEN_CHUNK_SIZE = 10000
+
+UNIT_TYPES = [
+    ('Studio', 1, 1, 25, 3500000),
+    ('1BR', 1, 1, 35, 4500000),
+    ('2BR', 2, 1, 50, 6500000),
+    ('2BR', 2, 2, 55, 7500000),
+    ('3BR', 3, 2, 75, 10000000)
+]
+VIEWS = ['Utara', 'Selatan', 'Timur', 'Barat']
+FIRST_NAMES = ['Andi', 'Budi', 'Citra', 'Dewi', 'Eka', 'Fajar', 'Gita', 'Hadi', 'Intan', 'Joko', 'Kartika', 'Lestari']
+LAST_NAMES = ['Pratama', 'Saputra', 'Wijaya', 'Santoso', 'Hidayat', 'Kusuma', 'Nugroho', 'Putri', 'Siregar', 'Lubis']
+PAYMENT_METHODS = ['bank_transfer', 'credit_card', 'e_wallet', 'cash']
+NOTIFICATION_TYPES = [
+    ('booking', 'Booking Dikonfirmasi', 'Booking Anda telah dikonfirmasi'),
+    ('payment', 'Pembayaran Diverifikasi', 'Pembayaran Anda telah diverifikasi'),
+    ('payment', 'Tagihan Sewa Bulanan', 'Tagihan sewa bulan ini telah terbit'),
+    ('system', 'Selamat Datang', 'Akun Anda berhasil dibuat'),
+    ('promotion', 'Promo Baru', 'Ada promo baru untuk unit favorit Anda')
+]
+ACTIVITY_ACTIONS = [('create', 'booking'), ('approve', 'booking'), ('verify', 'payment'), ('update', 'apartment'), ('login', 'user')]
+
+# Leases of one apartment are this many days apart, so they never overlap
+LEASE_SPACING_DAYS = 200
+LEASE_MONTHS = 6
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+def _bulk_insert(model, rows, chunk_size):
+    """Insert rows from an iterator in multi-row batches, one commit per batch. Returns the row count"""
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == chunk_size:
+            db.session.execute(insert(model.__table__), batch)
+            db.session.commit()
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(model.__table__), batch)
+        db.session.commit()
+        count += len(batch)
+    return count
+
+class DatasetGenerator:
+    """Deterministic synthetic data for scale testing.
+
+    Rows are produced lazily and written with multi-row INSERTs in chunks, so
+    memory stays flat at millions of rows. Primary keys are assigned up front
+    from the current MAX(id) of each table, so children reference their
+    parents without reading them back, and the same seed on the same starting
+    database yields the same rows. Each apartment's leases are spaced
+    LEASE_SPACING_DAYS apart going back from today: the newest one is active or
+    upcoming and older ones are completed or cancelled, each with its deposit
+    and one rent payment per elapsed month.
+    """
+
+    def __init__(self, seed=42, chunk_size=DATAGEN_CHUNK_SIZE, progress=None):
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.progress = progress or (lambda table, count, seconds: None)
+        self.today = date.today()
+        self.now = datetime.utcnow()
+
+    def _rng(self, table):
+        # One stream per table so changing one count does not reshuffle the others
+        return random.Random(f'{self.seed}:{table}')
+
+    def _write(self, model, rows):
+        started = time.perf_counter()
+        count = _bulk_insert(model, rows, self.chunk_size)
+        self.progress(model.__tablename__, count, time.perf_counter() - started)
+        return count
+
+    def _users(self, first_id, count, owners, admins):
+        rng = self._rng('users')
+        password = generate_password_hash('password123', method='pbkdf2:sha256')
+        for user_id in range(first_id, first_id + count):
+            index = user_id - first_id
+            role = 'admin' if index < admins else 'owner' if index < admins + owners else 'tenant'
+            created_at = self.now - timedelta(days=rng.randint(0, 1500), seconds=rng.randint(0, 86399))
+            yield {
+                'id': user_id,
+                'username': f'gen_{role}_{user_id}',
+                'email': f'gen_{user_id}@example.com',
+                'password': password,
+                'full_name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                'phone': f'08{rng.randint(1000000000, 9999999999)}',
+                'role': role,
+                'status': 'active' if rng.random() < 0.97 else 'inactive',
+                'email_verified_at': created_at if rng.random() < 0.8 else None,
+                'last_login': self.now - timedelta(days=rng.randint(0, 90)),
+                'created_at': created_at,
+                'updated_at': created_at
+            }
+
+    def _apartments(self, first_id, count, owner_ids):
+        rng = self._rng('apartments')
+        for apartment_id in range(first_id, first_id + count):
+            unit_type, bedrooms, bathrooms, size, price = rng.choice(UNIT_TYPES)
+            price += rng.randrange(0, 2000000, 250000)
+            floor = rng.randint(1, 30)
+            view = rng.choice(VIEWS)
+            created_at = self.now - timedelta(days=rng.randint(0, 1500))
+            yield {
+                'id': apartment_id,
+                'unit_number': f'{"ABCDEF"[apartment_id % 6]}-{apartment_id:06d}',
+                'unit_type': unit_type,
+                'floor': floor,
+                'size_sqm': Decimal(size),
+                'bedrooms': bedrooms,
+                'bathrooms': bathrooms,
+                'price_per_month': Decimal(price),
+                'deposit_amount': Decimal(price),
+                'minimum_stay_months': rng.choice([1, 3, 6]),
+                'description': f'Unit {unit_type} lantai {floor} dengan pemandangan {view.lower()}',
+                'furnished': rng.random() < 0.7,
+                'view_direction': view,
+                'electricity_watt': rng.choice([1300, 2200, 3500]),
+                'water_source': 'PDAM',
+                'parking_slots': rng.randint(0, 2),
+                'pet_friendly': rng.random() < 0.3,
+                'smoking_allowed': rng.random() < 0.1,
+                'availability_status': 'available',
+                'is_archived': False,
+                'owner_id': owner_ids[apartment_id % len(owner_ids)],
+                'total_views': rng.randint(0, 5000),
+                'created_at': created_at,
+                'updated_at': created_at
+            }
+
+    def _leases(self, first_id, count, apartment_ids, tenant_ids, prices):
+        """Booking rows with the apartment's rent (for the payment pass)"""
+        rng = self._rng('bookings')
+        for booking_id in range(first_id, first_id + count):
+            index = booking_id - first_id
+            apartment_id = apartment_ids[index % len(apartment_ids)]
+            generation = index // len(apartment_ids)  # 0 = newest lease of the apartment
+            offset = apartment_id * 37 % LEASE_SPACING_DAYS
+            start_date = self.today - timedelta(days=generation * LEASE_SPACING_DAYS + offset)
+            if generation == 0 and rng.random() < 0.2:
+                start_date = self.today + timedelta(days=rng.randint(7, 60))
+            end_date = add_months(start_date, LEASE_MONTHS)
+
+            if start_date > self.today:
+                status = rng.choice(['pending', 'confirmed'])
+            elif end_date > self.today:
+                status = 'active'
+            else:
+                status = 'completed' if rng.random() < 0.9 else 'cancelled'
+
+            rent = prices[apartment_id]
+            created_at = datetime.combine(start_date - timedelta(days=rng.randint(3, 30)), datetime.min.time())
+            signed = status in ('active', 'completed')
+            yield {
+                'id': booking_id,
+                'apartment_id': apartment_id,
+                'tenant_id': rng.choice(tenant_ids),
+                'booking_code': f'GBK{booking_id:010d}',
+                'start_date': start_date,
+                'end_date': end_date,
+                'total_months': LEASE_MONTHS,
+                'monthly_rent': rent,
+                'deposit_paid': rent,
+                'utility_deposit': rent * Decimal('0.2'),
+                'admin_fee': Decimal('500000'),
+                'discount_amount': Decimal('0'),
+                'total_amount': rent * 2 + rent * Decimal('0.2') + Decimal('500000'),
+                'status': status,
+                'contract_start_date': start_date if signed else None,
+                'contract_end_date': end_date if signed else None,
+                'approved_at': created_at + timedelta(days=1) if status != 'pending' else None,
+                'created_at': created_at,
+                'updated_at': created_at
+            }
+
+    def _payments(self, first_id, bookings, rng):
+        payment_id = first_id
+        for booking in bookings:
+            paid = booking['status'] in ('active', 'completed')
+            yield {
+                'id': payment_id,
+                'booking_id': booking['id'],
+                'payment_code': f'GPY{payment_id:010d}',
+                'payment_type': 'deposit',
+                'amount': booking['deposit_paid'],
+                'payment_method': rng.choice(PAYMENT_METHODS),
+                'payment_status': 'completed' if paid else 'pending',
+                'payment_date': booking['created_at'] + timedelta(days=2) if paid else None,
+                'due_date': booking['start_date'],
+                'billing_period': None,
+                'notes': None,
+                'created_at': booking['created_at'],
+                'updated_at': booking['created_at']
+            }
+            payment_id += 1
+            if not paid:
+                continue
+
+            for month in range(LEASE_MONTHS):
+                period = add_months(booking['start_date'], month)
+                if period > self.today:
+                    break
+                overdue = (self.today - period).days > 10
+                status = 'completed' if overdue or rng.random() < 0.5 else 'pending'
+                yield {
+                    'id': payment_id,
+                    'booking_id': booking['id'],
+                    'payment_code': f'GPY{payment_id:010d}',
+                    'payment_type': 'monthly_rent',
+                    'amount': booking['monthly_rent'],
+                    'payment_method': rng.choice(PAYMENT_METHODS),
+                    'payment_status': status,
+                    'payment_date': datetime.combine(period, datetime.min.time()) + timedelta(days=rng.randint(0, 5))
+                    if status == 'completed' else None,
+                    'due_date': period,
+                    'billing_period': period,
+                    'notes': f"Sewa bulanan periode {period.strftime('%Y-%m')}",
+                    'created_at': datetime.combine(period, datetime.min.time()) - timedelta(days=7),
+                    'updated_at': self.now
+                }
+                payment_id += 1
+
+    def _notifications(self, first_id, count, user_ids):
+        rng = self._rng('notifications')
+        for notification_id in range(first_id, first_id + count):
+            notification_type, title, message = rng.choice(NOTIFICATION_TYPES)
+            age = rng.randint(0, 365 * 24 * 60)
+            yield {
+                'id': notification_id,
+                'user_id': rng.choice(user_ids),
+                'title': title,
+                'message': message,
+                'type': notification_type,
+                'is_read': age > 7 * 24 * 60 or rng.random() < 0.5,
+                'send_email': False,
+                'created_at': self.now - timedelta(minutes=age),
+                'updated_at': self.now - timedelta(minutes=age)
+            }
+
+    def _activity_logs(self, first_id, count, user_ids, entity_ranges):
+        rng = self._rng('activity_logs')
+        for log_id in range(first_id, first_id + count):
+            action, entity_type = rng.choice(ACTIVITY_ACTIONS)
+            low, high = entity_ranges[entity_type]
+            yield {
+                'id': log_id,
+                'user_id': rng.choice(user_ids),
+                'action': action,
+                'entity_type': entity_type,
+                'entity_id': rng.randint(low, high) if high >= low else None,
+                'ip_address': f'10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}',
+                'user_agent': 'Mozilla/5.0 (datagen)',
+                'created_at': self.now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+            }
+
+    def run(self, users, apartments, bookings, notifications, activity_logs):
+        """Generate the dataset. Returns the number of rows written per table"""
+        owners = max(1, users // 20)
+        admins = max(1, users // 1000)
+        if users < owners + admins + 1:
+            raise ValueError('users must leave room for at least one admin, owner and tenant')
+
+        counts = {}
+        first_user = _next_id(User)
+        counts['users'] = self._write(User, self._users(first_user, users, owners, admins))
+        user_ids = range(first_user, first_user + users)
+        owner_ids = range(first_user + admins, first_user + admins + owners)
+        tenant_ids = range(first_user + admins + owners, first_user + users)
+
+        first_apartment = _next_id(Apartment)
+        prices = {}
+
+        def apartment_rows():
+            for row in self._apartments(first_apartment, apartments, owner_ids):
+                prices[row['id']] = row['price_per_month']
+                yield row
+        counts['apartments'] = self._write(Apartment, apartment_rows())
+        apartment_ids = range(first_apartment, first_apartment + apartments)
+
+        # Bookings and payments are written in the same chunks so a lease's
+        # payments only need the lease rows that are still in memory
+        first_booking = _next_id(Booking)
+        first_payment = _next_id(Payment)
+        counts['bookings'] = 0
+        counts['payments'] = 0
+        started = time.perf_counter()
+        leases = self._leases(first_booking, bookings, apartment_ids, tenant_ids, prices)
+        payments_rng = self._rng('payments')
+        next_payment = first_payment
+        while True:
+            chunk = [row for _, row in zip(range(self.chunk_size), leases)]
+            if not chunk:
+                break
+            db.session.execute(insert(Booking.__table__), chunk)
+            payments = list(self._payments(next_payment, chunk, payments_rng))
+            for start in range(0, len(payments), self.chunk_size):
+                db.session.execute(insert(Payment.__table__), payments[start:start + self.chunk_size])
+            db.session.commit()
+            counts['bookings'] += len(chunk)
+            counts['payments'] += len(payments)
+            next_payment += len(payments)
+        self.progress('bookings', counts['bookings'], time.perf_counter() - started)
+        self.progress('payments', counts['payments'], time.perf_counter() - started)
+
+        # Units with a running lease are occupied
+        if counts['bookings']:
+            db.session.execute(
+                update(Apartment.__table__)
+                .where(Apartment.__table__.c.id.in_(
+                    db.select(Booking.apartment_id).where(
+                        Booking.id >= first_booking,
+                        Booking.status == 'active'
+                    )
+                ))
+                .values(availability_status='occupied')
+            )
+            db.session.commit()
+
+        counts['notifications'] = self._write(
+            Notification, self._notifications(_next_id(Notification), notifications, user_ids)
+        )
+        entity_ranges = {
+            'booking': (first_booking, first_booking + bookings - 1),
+            'payment': (first_payment, next_payment - 1),
+            'apartment': (first_apartment, first_apartment + apartments - 1),
+            'user': (first_user, first_user + users - 1)
+        }
+        counts['activity_logs'] = self._write(
+            ActivityLog, self._activity_logs(_next_id(ActivityLog), activity_logs, user_ids, entity_ranges)
+        )
+        return counts
@@ -0,0 +1,142 @@
+import bisect
+import itertools
+import threading
+import time
+from collections import deque
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds (ms) of the checkout wait histogram buckets
+WAIT_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+class PoolMetrics:
+    """Checkout latency and saturation counters for one engine's pool"""
+
+    def __init__(self, sample_size=1000):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=sample_size)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.peak_checked_out = 0
+        self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, seconds, checked_out):
+        ms = seconds * 1000
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total_ms += ms
+            self.wait_max_ms = max(self.wait_max_ms, ms)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self.buckets[bisect.bisect_left(WAIT_BUCKETS_MS, ms)] += 1
+            self._samples.append(ms)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def _percentile(self, ordered, percent):
+        if not ordered:
+            return None
+        index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+        return round(ordered[index], 3)
+
+    def snapshot(self, pool):
+        """Counters plus the live state of `pool`"""
+        with self._lock:
+            ordered = sorted(self._samples)
+            data = {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'peak_checked_out': self.peak_checked_out,
+                'wait_ms': {
+                    'avg': round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else None,
+                    'max': round(self.wait_max_ms, 3),
+                    'p50': self._percentile(ordered, 50),
+                    'p95': self._percentile(ordered, 95),
+                    'p99': self._percentile(ordered, 99),
+                    # Cumulative, like Prometheus buckets
+                    'histogram': dict(zip(
+                        [f'le_{bound}' for bound in WAIT_BUCKETS_MS] + ['le_inf'],
+                        itertools.accumulate(self.buckets)
+                    ))
+                }
+            }
+
+        data['pool'] = {'class': type(pool).__name__, 'status': pool.status()}
+        if isinstance(pool, QueuePool):
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            checked_out = pool.checkedout()
+            data['pool'].update({
+                'size': pool.size(),
+                'max_overflow': pool._max_overflow,
+                'checked_out': checked_out,
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow(),
+                'capacity': capacity,
+                'saturation': round(checked_out / capacity, 3) if capacity > 0 else None
+            })
+        return data
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection"""
+
+    metrics = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics:
+                self.metrics.record_timeout()
+            raise
+        if self.metrics:
+            self.metrics.observe_wait(time.perf_counter() - started, self.checkedout())
+        return connection
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+pool_metrics = {}
+
+def configure_engine_options(app):
+    """Use the instrumented pool for every engine. Call before db.init_app()"""
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    options.setdefault('poolclass', InstrumentedQueuePool)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+def instrument_engines(app, db):
+    """Attach metrics to the engines created by db.init_app()"""
+    with app.app_context():
+        for name, engine in db.engines.items():
+            metrics = PoolMetrics()
+            pool_metrics[name or 'default'] = (engine, metrics)
+            if isinstance(engine.pool, InstrumentedQueuePool):
+                engine.pool.metrics = metrics
+
+            event.listen(engine, 'connect', lambda *args, metrics=metrics: metrics.record_connect())
+            event.listen(engine, 'invalidate', lambda *args, metrics=metrics: metrics.record_invalidation())
+
+def get_pool_stats():
+    """Metrics snapshot for every engine"""
+    return {
+        name: metrics.snapshot(engine.pool)
+        for name, (engine, metrics) in pool_metrics.items()
+    }
@@ -0,0 +1,186 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from flask import g, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+READ_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+STICKY_COOKIE = 'vv_read_primary'
+
+class RoutingSession(Session):
+    """Session that sends reads to a replica when the request allows it.
+
+    A session only reads from a replica while `info['read_replica']` is set
+    (done per request by ReplicaRouter) and nothing has been written through it
+    yet. Flushes, bulk INSERT/UPDATE/DELETE and SELECT ... FOR UPDATE always go
+    to the primary, and once any of them ran every later statement of the
+    session does too, so a request reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('read_replica') and not self.info.get('wrote'):
+            if self._flushing or _is_write(clause):
+                self.info['wrote'] = True
+            else:
+                engine = replica_router.pick(self._db)
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def _is_write(clause):
+    if clause is None:
+        return False
+    return getattr(clause, 'is_dml', False) or getattr(clause, '_for_update_arg', None) is not None
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_flush(session, flush_context):
+    session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+class ReplicaRouter:
+    """Chooses replica engines and keeps writers on the primary for a while.
+
+    Replicas are the SQLALCHEMY_BINDS listed in REPLICA_BINDS. They are used
+    round-robin; one that fails is skipped for REPLICA_RETRY_SECONDS and then
+    re-probed, and with no healthy replica everything falls back to the primary.
+    After a request writes, the same user (JWT identity, or a short-lived
+    cookie for anonymous clients) reads from the primary for
+    REPLICA_STICKY_SECONDS so replication lag never hides their own changes.
+    """
+
+    def __init__(self, max_sticky_users=10000):
+        self.binds = []
+        self.sticky_seconds = 5
+        self.retry_seconds = 30
+        self.max_sticky_users = max_sticky_users
+        self._cycle = None
+        self._lock = threading.Lock()
+        self._down_until = {}
+        self._sticky = OrderedDict()
+
+    def init_app(self, app, db):
+        self.binds = list(app.config['REPLICA_BINDS'])
+        self.sticky_seconds = app.config['REPLICA_STICKY_SECONDS']
+        self.retry_seconds = app.config['REPLICA_RETRY_SECONDS']
+        self._cycle = itertools.cycle(self.binds) if self.binds else None
+        self._down_until.clear()
+
+        if not self.binds:
+            return
+
+        with app.app_context():
+            for name in self.binds:
+                event.listen(db.engines[name], 'handle_error', self._on_error(name))
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _on_error(self, name):
+        def handle_error(context):
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(name)
+        return handle_error
+
+    def mark_down(self, name):
+        with self._lock:
+            self._down_until[name] = time.monotonic() + self.retry_seconds
+
+    def _is_up(self, db, name):
+        with self._lock:
+            down_until = self._down_until.get(name)
+        if down_until is None:
+            return True
+        if time.monotonic() < down_until:
+            return False
+        # Retry window passed: probe before sending real traffic again
+        try:
+            with db.engines[name].connect() as connection:
+                connection.execute(text('SELECT 1'))
+        except Exception:
+            self.mark_down(name)
+            return False
+        with self._lock:
+            self._down_until.pop(name, None)
+        return True
+
+    def pick(self, db):
+        """Next healthy replica engine, or None to use the primary"""
+        if not self._cycle:
+            return None
+        for _ in range(len(self.binds)):
+            with self._lock:
+                name = next(self._cycle)
+            if self._is_up(db, name):
+                return db.engines[name]
+        return None
+
+    def status(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: 'down' if self._down_until.get(name, 0) > now else 'up'
+                for name in self.binds
+            }
+
+    def _identity(self):
+        from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+        try:
+            verify_jwt_in_request(optional=True)
+            return get_jwt_identity()
+        except Exception:
+            return None
+
+    def _is_sticky(self, identity):
+        if request.cookies.get(STICKY_COOKIE):
+            return True
+        if identity is None:
+            return False
+        with self._lock:
+            until = self._sticky.get(identity)
+            if until is None:
+                return False
+            if until < time.monotonic():
+                del self._sticky[identity]
+                return False
+            return True
+
+    def _before_request(self):
+        from models import db
+        if request.method not in READ_METHODS:
+            return
+        g.db_identity = self._identity()
+        db.session.info['read_replica'] = not self._is_sticky(g.db_identity)
+
+    def _after_request(self, response):
+        from models import db
+        if request.method in READ_METHODS or not db.session.info.get('wrote'):
+            return response
+
+        identity = g.get('db_identity') or self._identity()
+        if identity is not None:
+            with self._lock:
+                self._sticky[identity] = time.monotonic() + self.sticky_seconds
+                self._sticky.move_to_end(identity)
+                while len(self._sticky) > self.max_sticky_users:
+                    self._sticky.popitem(last=False)
+        response.set_cookie(STICKY_COOKIE, '1', max_age=self.sticky_seconds, httponly=True, samesite='Lax')
+        return response
+
+replica_router = ReplicaRouter()
+
+@contextmanager
+def replica_reads(session):
+    """Let `session` read from a replica outside a request (e.g. report builders)"""
+    previous = session.info.get('read_replica')
+    session.info['read_replica'] = True
+    try:
+        yield session
+    finally:
+        session.info['read_replica'] = previous
@@ -0,0 +1,91 @@
+import csv
+import io
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from flask import Response, stream_with_context
+
+EXPORT_BATCH_SIZE = 1000
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _xlsx_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def iter_rows(query, batch_size=EXPORT_BATCH_SIZE):
+    """Iterate query rows through a server-side cursor in fixed-size batches"""
+    return query.yield_per(batch_size)
+
+def stream_csv(headers, rows, batch_size=EXPORT_BATCH_SIZE):
+    """Yield CSV text in chunks of `batch_size` rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+
+    pending = 0
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+
+    yield buffer.getvalue()
+
+def build_xlsx(headers, rows, sheet_title='Export'):
+    """Write rows to a write-only workbook and return the finished file, rewound.
+
+    Not streamed: an XLSX is a ZIP whose sheet XML openpyxl only packs on
+    save(), so every row is read before the first byte can be sent. Write-only
+    mode keeps the rows out of memory (openpyxl writes them to a temporary
+    file as they are appended) and the packed file spills to disk past 8 MB.
+    """
+    from openpyxl import Workbook  # optional dependency, only needed for XLSX exports
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title[:31])
+    sheet.append(headers)
+    for row in rows:
+        sheet.append([_xlsx_value(value) for value in row])
+
+    output = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+def _stream_file(handle, chunk_size=64 * 1024):
+    try:
+        while True:
+            chunk = handle.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        handle.close()
+
+def export_response(query, headers, filename, fmt='csv'):
+    """Build a download response for a column query.
+
+    CSV is streamed while the query is read; XLSX is built first (see
+    build_xlsx) and then sent in chunks.
+    """
+    if fmt == 'xlsx':
+        handle = build_xlsx(headers, iter_rows(query), sheet_title=filename)
+        return Response(
+            _stream_file(handle),
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            headers={'Content-Disposition': f'attachment; filename={filename}.xlsx'}
+        )
+
+    return Response(
+        stream_with_context(stream_csv(headers, iter_rows(query))),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}.csv'}
+    )
@@ -0,0 +1,142 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_, func, insert, select
+from sqlalchemy.orm import joinedload
+from models import db, Apartment, Favorite
+from services.sync import record_tombstone
+
+class FavoriteCursorError(Exception):
+    """The client sent a page cursor this server cannot read"""
+
+def encode_cursor(favorite):
+    """Opaque cursor pointing just past a favorite (newest first order)"""
+    data = [favorite.created_at.isoformat(), favorite.id]
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode()).decode()
+
+def decode_cursor(token):
+    try:
+        created_at, favorite_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return datetime.fromisoformat(created_at), int(favorite_id)
+    except (ValueError, TypeError):
+        raise FavoriteCursorError('Invalid cursor')
+
+def favorites_query(user_id):
+    """A user's favorites, newest first, with everything the apartment cards show.
+
+    The apartment and its owner come in the same joined query; photos and
+    facilities are loaded with one batched SELECT ... IN each, whatever the
+    page size.
+    """
+    return Favorite.query.options(
+        joinedload(Favorite.apartment).options(*Apartment.relation_loaders())
+    ).filter(Favorite.user_id == user_id).order_by(Favorite.created_at.desc(), Favorite.id.desc())
+
+def favorites_page(user_id, cursor=None, limit=20):
+    """One page of favorites after `cursor` and the cursor of the next page (None on the last).
+
+    Keyset pagination over (created_at, id), so every page is one index range
+    scan on (user_id, created_at) no matter how deep the client scrolls.
+    """
+    query = favorites_query(user_id)
+    if cursor:
+        created_at, favorite_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Favorite.created_at < created_at,
+            and_(Favorite.created_at == created_at, Favorite.id < favorite_id)
+        ))
+
+    favorites = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(favorites) > limit:
+        favorites = favorites[:limit]
+        next_cursor = encode_cursor(favorites[-1])
+    return favorites, next_cursor
+
+def favorited_ids(user_id, apartment_ids=None):
+    """Ids of the apartments a user has favorited, optionally only among `apartment_ids`.
+
+    Reads only the (user_id, apartment_id) unique index, no apartment rows.
+    """
+    query = db.session.query(Favorite.apartment_id).filter(Favorite.user_id == user_id)
+    if apartment_ids is not None:
+        if not apartment_ids:
+            return []
+        query = query.filter(Favorite.apartment_id.in_(apartment_ids))
+    return sorted(apartment_id for (apartment_id,) in query.all())
+
+# Saving and removing
+
+def _apply_count(condition, delta):
+    """Add delta to apartments.favorites_count with column arithmetic.
+
+    Like view counts, updated_at is kept as is and the catalog version is not
+    bumped, so a favorite does not invalidate cached listings or ETags; the
+    count is left out of Apartment.to_dict() for that reason.
+    """
+    query = Apartment.query.filter(condition)
+    if delta < 0:
+        query = query.filter(Apartment.favorites_count > 0)
+    query.execution_options(catalog_version=False).update(
+        {
+            Apartment.favorites_count: Apartment.favorites_count + delta,
+            Apartment.updated_at: Apartment.updated_at
+        },
+        synchronize_session=False
+    )
+
+def add_favorite(user_id, apartment_id):
+    """Save an apartment for a user; returns False if it was already saved.
+
+    A single INSERT IGNORE (INSERT OR IGNORE on SQLite) against the
+    (user_id, apartment_id) unique key, so double taps and concurrent
+    requests never read-then-write or hit a duplicate key error; only the
+    request whose row was inserted bumps the count. The caller commits.
+    """
+    inserted = db.session.execute(
+        insert(Favorite.__table__)
+        .prefix_with('IGNORE', dialect='mysql')
+        .prefix_with('OR IGNORE', dialect='sqlite')
+        .values(user_id=user_id, apartment_id=apartment_id, created_at=datetime.utcnow())
+    ).rowcount
+    if inserted:
+        _apply_count(Apartment.id == apartment_id, 1)
+    return bool(inserted)
+
+def remove_favorite(user_id, apartment_id):
+    """Remove a saved apartment; returns False if it was not saved.
+
+    The DELETE's row count decides which of several concurrent requests
+    decrements the count and records the delta-sync tombstone. The caller
+    commits.
+    """
+    favorite_id = db.session.query(Favorite.id).filter_by(user_id=user_id, apartment_id=apartment_id).scalar()
+    if favorite_id is None:
+        return False
+    deleted = Favorite.query.filter(Favorite.id == favorite_id).delete(synchronize_session=False)
+    if deleted:
+        _apply_count(Apartment.id == apartment_id, -1)
+        record_tombstone(user_id, 'favorites', favorite_id)
+    return bool(deleted)
+
+def discard_user_favorites(user_id):
+    """Take a user's favorites out of the apartment counts before the user is deleted"""
+    _apply_count(Apartment.id.in_(select(Favorite.apartment_id).where(Favorite.user_id == user_id)), -1)
+
+def recompute_favorite_counts():
+    """Rebuild apartments.favorites_count from the favorites table.
+
+    One UPDATE with a correlated COUNT per apartment (apartments without
+    favorites get zero); updated_at is kept as is. Returns the number of
+    apartments processed.
+    """
+    count = select(func.count(Favorite.id)).where(Favorite.apartment_id == Apartment.id).scalar_subquery()
+    processed = Apartment.query.execution_options(catalog_version=False).update(
+        {
+            Apartment.favorites_count: count,
+            Apartment.updated_at: Apartment.updated_at
+        },
+        synchronize_session=False
+    )
+    db.session.commit()
+    return processed
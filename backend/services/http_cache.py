@@ -0,0 +1,164 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+from flask import current_app, make_response, request
+from sqlalchemy import event, inspect, insert, update
+from models import db, CatalogVersion
+
+# Catalog namespaces whose cached representations change when a table changes
+TABLE_NAMESPACES = {
+    'apartments': ('apartments',),
+    'unit_photos': ('apartments',),
+    'apartment_facilities': ('apartments',),
+    'facilities': ('facilities', 'apartments'),
+    'reviews': ('reviews', 'apartments'),
+    'apartment_rating_aggregates': ('reviews',),
+    'promotions': ('promotions',),
+    # Owner and reviewer details are embedded in apartment and review payloads
+    'users': ('apartments', 'reviews')
+}
+
+# Tables that only appear embedded in other payloads: just updates to these columns
+# (the User.to_dict fields) bump versions; a new row is not referenced by anything yet
+EMBEDDED_COLUMNS = {
+    'users': {'username', 'email', 'full_name', 'phone', 'role', 'profile_photo', 'address', 'birth_date', 'status'}
+}
+
+# Columns that are not part of any cached representation (or change too often to matter)
+IGNORED_COLUMNS = {
+    'apartments': {'total_views', 'favorites_count'}
+}
+
+def _changed_namespaces(obj, check_columns):
+    table = obj.__table__.name
+    namespaces = TABLE_NAMESPACES.get(table)
+    if not namespaces or not check_columns:
+        return namespaces or ()
+
+    embedded = EMBEDDED_COLUMNS.get(table)
+    ignored = IGNORED_COLUMNS.get(table, ())
+    state = inspect(obj)
+    for attr in state.mapper.column_attrs:
+        tracked = attr.key in embedded if embedded is not None else attr.key not in ignored
+        if tracked and state.attrs[attr.key].history.has_changes():
+            return namespaces
+    return ()
+
+def bump_versions(connection, names):
+    """Increment catalog versions inside the caller's transaction"""
+    names = sorted(set(names))
+    if not names:
+        return
+    now = datetime.utcnow()
+    result = connection.execute(
+        update(CatalogVersion.__table__)
+        .where(CatalogVersion.__table__.c.name.in_(names))
+        .values(version=CatalogVersion.__table__.c.version + 1, updated_at=now)
+    )
+    if result.rowcount < len(names):
+        connection.execute(
+            insert(CatalogVersion.__table__)
+            .prefix_with('IGNORE', dialect='mysql')
+            .prefix_with('OR IGNORE', dialect='sqlite'),
+            [{'name': name, 'version': 1, 'updated_at': now} for name in names]
+        )
+
+def _after_flush(session, flush_context):
+    names = set()
+    for obj in session.new:
+        if obj.__table__.name not in EMBEDDED_COLUMNS:
+            names.update(_changed_namespaces(obj, False))
+    for obj in session.deleted:
+        names.update(_changed_namespaces(obj, False))
+    for obj in session.dirty:
+        names.update(_changed_namespaces(obj, True))
+    if names:
+        bump_versions(session.connection(), names)
+
+def _do_orm_execute(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    if orm_execute_state.execution_options.get('catalog_version') is False:
+        return
+    mapper = orm_execute_state.bind_mapper
+    table = mapper.local_table.name if mapper is not None else getattr(orm_execute_state.statement.table, 'name', None)
+    if orm_execute_state.is_insert and table in EMBEDDED_COLUMNS:
+        return
+    names = TABLE_NAMESPACES.get(table)
+    if names:
+        bump_versions(orm_execute_state.session.connection(), names)
+
+def register_version_tracking(session_class):
+    """Bump catalog versions on every ORM flush and bulk statement touching catalog tables"""
+    if not event.contains(session_class, 'after_flush', _after_flush):
+        event.listen(session_class, 'after_flush', _after_flush)
+        event.listen(session_class, 'do_orm_execute', _do_orm_execute)
+
+def get_versions(names):
+    """Current version of each namespace (0 when never bumped)"""
+    rows = db.session.query(CatalogVersion.name, CatalogVersion.version).filter(
+        CatalogVersion.name.in_(names)
+    ).all()
+    versions = dict(rows)
+    return [versions.get(name, 0) for name in names]
+
+def _make_etag(parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+def conditional(namespaces, fingerprint=None, on_not_modified=None):
+    """Weak ETag / Cache-Control support for public GET endpoints.
+
+    The ETag combines the catalog versions of `namespaces`, the endpoint's
+    `fingerprint(**view_args)` (typically MAX(updated_at) and a row count) and
+    the query string. A matching If-None-Match gets a 304 before the view runs,
+    so nothing is loaded or serialized. A fingerprint of None skips caching for
+    that request (e.g. archived units with per-user access checks);
+    `on_not_modified(**view_args)` runs for 304s that still need a side effect.
+    Requests with an Authorization header are answered with private caching and
+    an identity-specific ETag.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            authorization = request.headers.get('Authorization')
+            try:
+                fingerprint_value = fingerprint(**kwargs) if fingerprint else ''
+                versions = get_versions(namespaces) if fingerprint_value is not None else None
+            except Exception as e:
+                # Caching is an optimization; serve the request uncached instead of failing it
+                current_app.logger.warning(f'ETag computation failed: {e}')
+                db.session.rollback()
+                fingerprint_value = None
+
+            if fingerprint_value is None:
+                return fn(*args, **kwargs)
+
+            etag = _make_etag((
+                request.endpoint,
+                versions,
+                fingerprint_value,
+                sorted(request.args.items(multi=True)),
+                authorization
+            ))
+
+            if request.if_none_match.contains_weak(etag):
+                if on_not_modified:
+                    on_not_modified(**kwargs)
+                response = make_response('', 304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if authorization:
+                response.headers['Cache-Control'] = 'private, no-cache'
+            else:
+                max_age = current_app.config['CATALOG_CACHE_MAX_AGE']
+                response.headers['Cache-Control'] = (
+                    f'public, max-age={max_age}, stale-while-revalidate={max_age * 5}'
+                )
+            response.vary.add('Authorization')
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,60 @@
+import threading
+import time
+from collections import OrderedDict
+from models import Notification
+
+class UnreadCounter:
+    """Per-user unread notification counts cached in process memory.
+
+    Counts are adjusted incrementally by the notification write paths and
+    reconciled against the database once an entry is older than `ttl` seconds,
+    which also corrects drift caused by writes handled in other workers.
+    At most `max_entries` users are kept (least recently used are evicted).
+    """
+
+    def __init__(self, ttl=30, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._counts = OrderedDict()
+
+    def _count_from_db(self, user_id):
+        return Notification.query.filter_by(user_id=user_id, is_read=False).count()
+
+    def get(self, user_id):
+        """Get unread count, loading it from the database when missing or stale"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._counts.get(user_id)
+            if entry and now - entry[1] <= self.ttl:
+                self._counts.move_to_end(user_id)
+                return entry[0]
+
+        count = self._count_from_db(user_id)
+        self.set(user_id, count)
+        return count
+
+    def set(self, user_id, count):
+        """Store an exact count for a user"""
+        with self._lock:
+            self._counts[user_id] = (max(count, 0), time.monotonic())
+            self._counts.move_to_end(user_id)
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+
+    def incr(self, user_id, delta=1):
+        """Adjust a cached count (users not in the cache are loaded on next read)"""
+        with self._lock:
+            entry = self._counts.get(user_id)
+            if entry:
+                self._counts[user_id] = (max(entry[0] + delta, 0), entry[1])
+
+    def invalidate(self, user_id=None):
+        """Drop one user's count, or all counts"""
+        with self._lock:
+            if user_id is None:
+                self._counts.clear()
+            else:
+                self._counts.pop(user_id, None)
+
+unread_counter = UnreadCounter()
@@ -0,0 +1,150 @@
+import json
+import queue
+import threading
+
+class StreamLimitError(Exception):
+    """This worker already holds its maximum number of open streams"""
+
+class LocalBroker:
+    """In-process pub/sub for pushing notifications to connected clients.
+
+    Each open stream owns a bounded queue; publishing never blocks, and a
+    subscriber that stops reading simply drops events (the client catches up
+    through Last-Event-ID on reconnect). With a single worker this is all that
+    is needed, and it doubles as the stand-in for RedisBroker in development.
+    At most `max_connections` streams are open at once (0: no limit).
+    """
+
+    def __init__(self, max_queue_size=100, max_connections=0):
+        self.max_queue_size = max_queue_size
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, user_id):
+        """Register a stream for a user and return its queue.
+
+        Raises StreamLimitError when max_connections streams are already open.
+        """
+        subscriber = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            if self.max_connections and self._count() >= self.max_connections:
+                raise StreamLimitError('Too many open notification streams, poll instead')
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, user_id, subscriber):
+        """Remove a stream registered with `subscribe()`"""
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, payload):
+        """Send a payload to every stream of a user"""
+        self._dispatch(user_id, payload)
+
+    def _dispatch(self, user_id, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(payload)
+            except queue.Full:
+                pass
+
+    def _count(self):
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def connection_count(self):
+        """Number of open streams in this worker"""
+        with self._lock:
+            return self._count()
+
+class RedisBroker(LocalBroker):
+    """Fan-out across workers through Redis pub/sub.
+
+    Publishes go to Redis; one listener thread per worker receives every
+    message and hands it to the local streams of that worker.
+    """
+
+    channel_prefix = 'notifications:'
+
+    def __init__(self, url, max_queue_size=100, max_connections=0):
+        super().__init__(max_queue_size, max_connections)
+        import redis  # optional dependency, only needed for multi-worker fan-out
+        self._redis = redis.Redis.from_url(url)
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        with self._listener_lock:
+            if self._listener and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen, daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f'{self.channel_prefix}*')
+        for message in pubsub.listen():
+            try:
+                channel = message['channel']
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                user_id = int(channel[len(self.channel_prefix):])
+                self._dispatch(user_id, json.loads(message['data']))
+            except (KeyError, ValueError):
+                continue
+
+    def subscribe(self, user_id):
+        self._ensure_listener()
+        return super().subscribe(user_id)
+
+    def publish(self, user_id, payload):
+        self._redis.publish(f'{self.channel_prefix}{user_id}', json.dumps(payload))
+
+notification_broker = LocalBroker()
+
+def configure_broker(url=None, max_queue_size=100, max_connections=0):
+    """Select the broker backend (Redis when a URL is configured, otherwise in-process)"""
+    global notification_broker
+    if url:
+        notification_broker = RedisBroker(url, max_queue_size, max_connections)
+    else:
+        notification_broker = LocalBroker(max_queue_size, max_connections)
+    return notification_broker
+
+def get_broker():
+    """Get the active broker"""
+    return notification_broker
+
+def format_event(data, event=None, event_id=None):
+    """Format one server-sent event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event:
+        lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+def stream_events(user_id, subscriber, backlog=None, heartbeat=15):
+    """Generator yielding SSE frames from a subscribed queue until the client disconnects"""
+    broker = get_broker()
+    try:
+        yield 'retry: 5000\n\n'
+        for notification in backlog or []:
+            yield format_event(notification, 'notification', notification['id'])
+        while True:
+            try:
+                notification = subscriber.get(timeout=heartbeat)
+            except queue.Empty:
+                # Comment line keeps proxies from closing idle connections
+                yield ': keepalive\n\n'
+                continue
+            yield format_event(notification, 'notification', notification.get('id'))
+    finally:
+        broker.unsubscribe(user_id, subscriber)
@@ -0,0 +1,267 @@
+import hashlib
+import hmac
+import json
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from models import db, Payment, PaymentTransaction
+from utils import generate_transaction_reference
+
+class GatewayError(Exception):
+    """Raised for gateway requests or callbacks that cannot be processed"""
+
+# Transaction statuses a webhook may still move out of
+OPEN_STATUSES = ('initiated', 'pending')
+
+class GatewayAdapter:
+    """Interface every payment gateway integration implements"""
+
+    name = None
+    currency = 'IDR'
+    # Adapters that move no real money are refused outside debug and testing
+    development_only = False
+
+    def __init__(self, secret, expiry_minutes=60):
+        self.secret = secret
+        self.expiry_minutes = expiry_minutes
+
+    def create_charge(self, transaction):
+        """Register a charge with the gateway.
+
+        Returns a dict with gateway_transaction_id, payment_url and expired_at.
+        """
+        raise NotImplementedError
+
+    def verify_signature(self, body, headers):
+        """Check that a webhook body was sent by the gateway"""
+        raise NotImplementedError
+
+    def parse_webhook(self, payload):
+        """Normalize a webhook payload to reference, status, gateway_transaction_id, amount, currency and paid_at"""
+        raise NotImplementedError
+
+class MockGateway(GatewayAdapter):
+    """Local gateway for development and tests.
+
+    Webhooks are JSON bodies signed with HMAC-SHA256 over the raw body in the
+    X-Mock-Signature header; `build_webhook()` produces them.
+    """
+
+    name = 'mock'
+    signature_header = 'X-Mock-Signature'
+    development_only = True
+
+    def sign(self, body):
+        return hmac.new(self.secret.encode(), body, hashlib.sha256).hexdigest()
+
+    def create_charge(self, transaction):
+        gateway_transaction_id = f'MOCK-{uuid.uuid4().hex}'
+        return {
+            'gateway_transaction_id': gateway_transaction_id,
+            'payment_url': f'https://mock-gateway.local/pay/{gateway_transaction_id}',
+            'expired_at': datetime.utcnow() + timedelta(minutes=self.expiry_minutes)
+        }
+
+    def verify_signature(self, body, headers):
+        signature = headers.get(self.signature_header, '')
+        return hmac.compare_digest(self.sign(body), signature)
+
+    def parse_webhook(self, payload):
+        status = payload.get('status')
+        if status not in ('success', 'failed', 'expired', 'pending'):
+            raise GatewayError(f'Unknown status: {status}')
+        try:
+            amount = Decimal(str(payload['amount'])) if payload.get('amount') is not None else None
+        except InvalidOperation:
+            raise GatewayError('Invalid amount')
+        return {
+            'reference': payload.get('reference'),
+            'status': status,
+            'gateway_transaction_id': payload.get('transaction_id'),
+            'amount': amount,
+            'currency': payload.get('currency'),
+            'paid_at': datetime.fromisoformat(payload['paid_at']) if payload.get('paid_at') else None
+        }
+
+    def build_webhook(self, transaction, status='success'):
+        """Build a signed webhook (body bytes, headers) as the gateway would send it"""
+        body = json.dumps({
+            'reference': transaction.transaction_reference,
+            'transaction_id': transaction.gateway_transaction_id,
+            'status': status,
+            'amount': float(transaction.amount),
+            'currency': self.currency,
+            'paid_at': datetime.utcnow().isoformat() if status == 'success' else None
+        }).encode()
+        return body, {self.signature_header: self.sign(body), 'Content-Type': 'application/json'}
+
+GATEWAYS = {
+    MockGateway.name: MockGateway
+}
+
+_gateways = {}
+
+def configure_gateways(app):
+    """Instantiate the enabled gateway adapters from config.
+
+    Outside debug and testing, development-only adapters (mock) and the
+    placeholder webhook secret are refused, since anyone who has read the
+    code could sign webhooks with it.
+    """
+    from config import DEFAULT_PAYMENT_GATEWAY_SECRET
+    _gateways.clear()
+    trusted_env = app.debug or app.testing
+    for name in app.config['PAYMENT_GATEWAYS']:
+        if name not in GATEWAYS:
+            raise RuntimeError(f'Unknown payment gateway: {name}')
+        if not trusted_env and GATEWAYS[name].development_only:
+            raise RuntimeError(f'Payment gateway {name!r} is for development and testing only')
+        if not trusted_env and app.config['PAYMENT_GATEWAY_SECRET'] == DEFAULT_PAYMENT_GATEWAY_SECRET:
+            raise RuntimeError('Set PAYMENT_GATEWAY_SECRET before enabling payment gateways')
+        _gateways[name] = GATEWAYS[name](
+            app.config['PAYMENT_GATEWAY_SECRET'],
+            app.config['PAYMENT_GATEWAY_EXPIRY_MINUTES']
+        )
+
+def get_gateway(name):
+    """Get a configured gateway adapter, or None"""
+    return _gateways.get(name)
+
+def mark_payment_completed(payment):
+    """Apply the effects of a completed payment (shared by manual and gateway verification)"""
+    payment.payment_status = 'completed'
+
+    # If this is deposit payment, update booking status and set contract dates
+    if payment.payment_type == 'deposit':
+        booking = payment.booking
+        booking.status = 'active'
+        # Update apartment status
+        booking.apartment.availability_status = 'occupied'
+
+        # Set contract dates - contract starts from booking start_date
+        booking.contract_start_date = booking.start_date
+        booking.contract_end_date = booking.end_date
+
+def initiate_transaction(payment, gateway):
+    """Open a gateway transaction for a payment. The caller commits"""
+    transaction = PaymentTransaction(
+        payment_id=payment.id,
+        transaction_reference=generate_transaction_reference(),
+        gateway_name=gateway.name,
+        amount=payment.amount,
+        status='initiated'
+    )
+    db.session.add(transaction)
+    db.session.flush()
+
+    charge = gateway.create_charge(transaction)
+    transaction.gateway_transaction_id = charge['gateway_transaction_id']
+    transaction.payment_url = charge['payment_url']
+    transaction.expired_at = charge['expired_at']
+    transaction.status = 'pending'
+
+    payment.payment_gateway_ref = transaction.transaction_reference
+    return transaction
+
+def _amount_mismatch(gateway, event, transaction):
+    """Why a success webhook's amount/currency does not match the transaction, or None"""
+    if event.get('amount') is None or not event.get('currency'):
+        return 'Webhook has no amount or currency'
+    if event['currency'].upper() != gateway.currency:
+        return f"Paid in {event['currency']}, expected {gateway.currency}"
+    if event['amount'] != transaction.amount:
+        return f"Paid {event['amount']} {gateway.currency}, expected {transaction.amount} {gateway.currency}"
+    return None
+
+def _flag_for_review(transaction, reason):
+    PaymentTransaction.query.filter_by(id=transaction.id).update({
+        PaymentTransaction.status: 'review',
+        PaymentTransaction.error_message: reason
+    }, synchronize_session=False)
+
+def process_webhook(gateway, event, payload):
+    """Apply a verified webhook exactly once.
+
+    The transaction is found through its unique reference and moved out of
+    'initiated'/'pending' with a conditional UPDATE; a redelivered or concurrent
+    duplicate matches zero rows and is acknowledged without side effects. The
+    payment itself is also only completed from 'pending'/'verifying', so it can
+    never be applied twice even across different transactions.
+
+    A success is also accepted for a transaction that already expired (money
+    captured late). It is not applied but flagged for review, with the
+    transaction in status 'review' and the reason in error_message, when:
+    - its amount or currency differs from the transaction; the payment then
+      moves to 'verifying' for manual verification
+    - the payment is no longer open (failed by the sweeper, or already paid),
+      so the captured money has to be refunded or the booking reinstated
+
+    Returns (result, transaction) where result is 'applied', 'review' or 'duplicate'.
+    """
+    transaction = PaymentTransaction.query.filter_by(
+        transaction_reference=event['reference']
+    ).first()
+
+    if not transaction or transaction.gateway_name != gateway.name:
+        raise GatewayError('Unknown transaction reference')
+
+    if event['status'] == 'pending':
+        return 'duplicate', transaction
+
+    values = {
+        PaymentTransaction.status: event['status'],
+        PaymentTransaction.callback_data: payload
+    }
+    if event.get('gateway_transaction_id'):
+        values[PaymentTransaction.gateway_transaction_id] = event['gateway_transaction_id']
+    claimable = OPEN_STATUSES
+    if event['status'] == 'success':
+        values[PaymentTransaction.paid_at] = event.get('paid_at') or datetime.utcnow()
+        claimable = OPEN_STATUSES + ('expired',)
+
+    claimed = PaymentTransaction.query.filter(
+        PaymentTransaction.id == transaction.id,
+        PaymentTransaction.status.in_(claimable)
+    ).update(values, synchronize_session=False)
+
+    if claimed != 1:
+        db.session.rollback()
+        return 'duplicate', transaction
+
+    result = 'applied'
+    if event['status'] == 'success':
+        mismatch = _amount_mismatch(gateway, event, transaction)
+        if mismatch:
+            _flag_for_review(transaction, mismatch)
+            Payment.query.filter(
+                Payment.id == transaction.payment_id,
+                Payment.payment_status == 'pending'
+            ).update({
+                Payment.payment_status: 'verifying',
+                Payment.notes: f'Gateway payment needs review: {mismatch}'
+            }, synchronize_session=False)
+            result = 'review'
+        else:
+            completed = Payment.query.filter(
+                Payment.id == transaction.payment_id,
+                Payment.payment_status.in_(['pending', 'verifying'])
+            ).update({
+                Payment.payment_status: 'completed',
+                Payment.payment_date: values[PaymentTransaction.paid_at],
+                Payment.transaction_id: transaction.transaction_reference,
+                Payment.payment_gateway_ref: transaction.transaction_reference,
+                Payment.payment_gateway_response: payload
+            }, synchronize_session=False)
+
+            if completed == 1:
+                payment = db.session.get(Payment, transaction.payment_id)
+                db.session.refresh(payment)
+                mark_payment_completed(payment)
+            else:
+                status = db.session.query(Payment.payment_status).filter_by(id=transaction.payment_id).scalar()
+                _flag_for_review(transaction, f'Paid after the payment was {status}: refund or reinstate')
+                result = 'review'
+
+    db.session.commit()
+    db.session.refresh(transaction)
+    return result, transaction
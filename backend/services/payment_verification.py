@@ -0,0 +1,120 @@
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload
+from models import db, ActivityLog, Booking, Payment
+from services.payment_gateway import mark_payment_completed
+from utils import create_notifications
+
+# Payments still waiting for a decision
+VERIFIABLE_STATUSES = ('pending', 'verifying')
+
+class PaymentVerificationError(Exception):
+    """The batch as a whole is invalid (malformed or too many decisions)"""
+
+def _parse_decisions(decisions, max_items):
+    if not isinstance(decisions, list) or not decisions:
+        raise PaymentVerificationError('decisions must be a non-empty list')
+    if len(decisions) > max_items:
+        raise PaymentVerificationError(f'At most {max_items} payments can be verified at once')
+
+    parsed = {}
+    for decision in decisions:
+        if not isinstance(decision, dict):
+            raise PaymentVerificationError('Each decision must be an object with payment_id')
+        try:
+            payment_id = int(decision['payment_id'])
+        except (KeyError, TypeError, ValueError):
+            raise PaymentVerificationError('Each decision needs an integer payment_id')
+        if payment_id in parsed:
+            raise PaymentVerificationError(f'Payment {payment_id} appears more than once')
+        parsed[payment_id] = (bool(decision.get('approved', True)), decision.get('notes'))
+    return parsed
+
+def verify_payments(decisions, user, max_items=500):
+    """Approve or reject many payments in one transaction.
+
+    `decisions` are {"payment_id", "approved" (default true), "notes"} dicts.
+    Payments are loaded and locked together with their booking and apartment
+    in one query; approvals go through mark_payment_completed(), so a
+    verified deposit activates the booking and marks the unit occupied, and
+    rejections mark the payment failed. Activity log rows and tenant
+    notifications are written in the same transaction. Returns one result per
+    decision (in request order) and the ids of apartments whose status changed.
+    """
+    parsed = _parse_decisions(decisions, max_items)
+
+    payments = {
+        payment.id: payment
+        for payment in Payment.query.options(
+            joinedload(Payment.booking).joinedload(Booking.apartment)
+        ).filter(Payment.id.in_(list(parsed))).with_for_update().all()
+    }
+
+    now = datetime.utcnow()
+    results = []
+    audit_rows = []
+    notifications = []
+    occupied_apartments = set()
+    for payment_id, (approved, notes) in parsed.items():
+        payment = payments.get(payment_id)
+        if payment is None:
+            results.append({'payment_id': payment_id, 'success': False, 'message': 'Payment not found'})
+            continue
+        booking = payment.booking
+        if user.role == 'owner' and booking.apartment.owner_id != user.id:
+            results.append({'payment_id': payment_id, 'success': False, 'message': 'Access denied'})
+            continue
+        if payment.payment_status not in VERIFIABLE_STATUSES:
+            results.append({
+                'payment_id': payment_id,
+                'success': False,
+                'message': f'Payment is already {payment.payment_status}'
+            })
+            continue
+
+        old_status = payment.payment_status
+        if approved:
+            mark_payment_completed(payment)
+            if payment.payment_type == 'deposit':
+                occupied_apartments.add(booking.apartment_id)
+            notifications.append({
+                'user_id': booking.tenant_id,
+                'title': 'Pembayaran Diverifikasi',
+                'message': f'Pembayaran {payment.payment_code} telah diverifikasi',
+                'notification_type': 'payment',
+                'related_id': payment.id
+            })
+        else:
+            payment.payment_status = 'failed'
+            payment.notes = notes or 'Payment verification failed'
+            notifications.append({
+                'user_id': booking.tenant_id,
+                'title': 'Pembayaran Ditolak',
+                'message': f'Pembayaran {payment.payment_code} ditolak. Silakan hubungi admin.',
+                'notification_type': 'payment',
+                'related_id': payment.id
+            })
+
+        audit_rows.append({
+            'user_id': user.id,
+            'action': 'verify',
+            'entity_type': 'payment',
+            'entity_id': payment.id,
+            'old_data': {'payment_status': old_status},
+            'new_data': {'payment_status': payment.payment_status},
+            'ip_address': None,
+            'user_agent': None,
+            'created_at': now
+        })
+        results.append({'payment_id': payment_id, 'success': True, 'status': payment.payment_status})
+
+    if not audit_rows:
+        db.session.rollback()
+        return results, []
+
+    db.session.flush()
+    db.session.execute(insert(ActivityLog), audit_rows)
+
+    # Commits the payment, booking and apartment changes together with the notifications
+    create_notifications(notifications)
+    return results, sorted(occupied_apartments)
@@ -0,0 +1,225 @@
+import bisect
+import itertools
+import threading
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from services.query_budget import check_request
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+class RequestProfile:
+    """Timings of the current request, kept on `flask.g.profile`"""
+
+    def __init__(self, max_statements=50):
+        self.started = time.perf_counter()
+        self.max_statements = max_statements
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.statements = []
+        self.statement_counts = Counter()
+
+    def record_sql(self, statement, seconds):
+        self.sql_count += 1
+        self.sql_seconds += seconds
+        self.statement_counts[statement] += 1
+        if len(self.statements) < self.max_statements:
+            self.statements.append((statement, seconds))
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+def current_profile():
+    """Profile of the running request, or None outside requests / when profiling is off"""
+    if not has_request_context():
+        return None
+    return g.get('profile')
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that adds encoding time to the request profile"""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            profile = current_profile()
+            if profile is not None:
+                profile.serialize_seconds += time.perf_counter() - started
+
+class RouteMetrics:
+    """Latency histogram and SQL totals for one (method, route) pair"""
+
+    __slots__ = ('blueprint', 'buckets', 'count', 'seconds', 'sql_count', 'sql_seconds', 'statuses')
+
+    def __init__(self, blueprint):
+        self.blueprint = blueprint
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.statuses = {}
+
+class RequestProfiler:
+    """Per-request wall time, SQL and serialization timing.
+
+    Every request gets a RequestProfile; SQLAlchemy cursor events add each
+    statement's count and duration and the app's JSON provider adds encoding
+    time. The totals are sent back as a Server-Timing header, aggregated into
+    per-route Prometheus histograms served at /metrics, and requests slower
+    than SLOW_REQUEST_MS are logged together with the SQL they ran.
+
+    The statement counting also backs the per-route query budgets, so with
+    PROFILING_ENABLED off but QUERY_BUDGET_MODE not 'off' only the counting
+    and the budget check are installed.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.slow_request_ms = 500
+        self.max_statements = 50
+        self.server_timing = True
+        self.metrics_token = None
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def init_app(self, app, db):
+        self.enabled = app.config['PROFILING_ENABLED']
+        self.slow_request_ms = app.config['SLOW_REQUEST_MS']
+        self.max_statements = app.config['PROFILING_MAX_STATEMENTS']
+        self.server_timing = app.config['PROFILING_SERVER_TIMING']
+        self.metrics_token = app.config['METRICS_TOKEN']
+        self._routes = {}
+
+        if not self.enabled and app.config['QUERY_BUDGET_MODE'] == 'off':
+            return
+
+        with app.app_context():
+            for engine in db.engines.values():
+                if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+                    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+                    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        if not self.enabled:
+            return
+
+        app.json = TimedJSONProvider(app)
+        # Outside debug and testing /metrics is only served behind METRICS_TOKEN
+        if self.metrics_token or app.debug or app.testing:
+            app.add_url_rule('/metrics', 'metrics', self._metrics_view)
+        else:
+            app.logger.warning('METRICS_TOKEN is not set, /metrics is disabled')
+
+    def _before_request(self):
+        g.profile = RequestProfile(self.max_statements)
+
+    def _after_request(self, response):
+        profile = g.pop('profile', None)
+        if profile is None or request.endpoint == 'metrics':
+            return response
+        if not self.enabled:
+            check_request(profile, request.endpoint)
+            return response
+
+        seconds = profile.elapsed()
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        self.observe(request.method, route, request.blueprint, response.status_code, seconds, profile)
+
+        if self.server_timing:
+            response.headers.add('Server-Timing', ', '.join([
+                f'app;dur={seconds * 1000:.1f}',
+                f'db;dur={profile.sql_seconds * 1000:.1f};desc="{profile.sql_count} queries"',
+                f'serialize;dur={profile.serialize_seconds * 1000:.1f}'
+            ]))
+
+        if seconds * 1000 >= self.slow_request_ms:
+            self._log_slow(request.method, request.full_path.rstrip('?'), response.status_code, seconds, profile)
+
+        check_request(profile, request.endpoint)
+        return response
+
+    def _log_slow(self, method, path, status, seconds, profile):
+        from flask import current_app
+        lines = [
+            f'Slow request {method} {path} -> {status} in {seconds * 1000:.1f}ms '
+            f'({profile.sql_count} queries, {profile.sql_seconds * 1000:.1f}ms SQL, '
+            f'{profile.serialize_seconds * 1000:.1f}ms serialization)'
+        ]
+        for statement, statement_seconds in sorted(profile.statements, key=lambda s: -s[1]):
+            lines.append(f'  {statement_seconds * 1000:8.1f}ms  {" ".join(statement.split())}')
+        if profile.sql_count > len(profile.statements):
+            lines.append(f'  ... {profile.sql_count - len(profile.statements)} more statements')
+        current_app.logger.warning('\n'.join(lines))
+
+    def observe(self, method, route, blueprint, status, seconds, profile):
+        with self._lock:
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = RouteMetrics(blueprint or '')
+            metrics.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            metrics.count += 1
+            metrics.seconds += seconds
+            metrics.sql_count += profile.sql_count
+            metrics.sql_seconds += profile.sql_seconds
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def render_metrics(self):
+        """Prometheus text exposition of the per-route metrics of this worker"""
+        lines = [
+            '# HELP http_request_duration_seconds Request wall time',
+            '# TYPE http_request_duration_seconds histogram'
+        ]
+        sql_lines = [
+            '# HELP http_request_sql_queries_total SQL statements executed by requests',
+            '# TYPE http_request_sql_queries_total counter'
+        ]
+        sql_time_lines = [
+            '# HELP http_request_sql_seconds_total Time spent in SQL by requests',
+            '# TYPE http_request_sql_seconds_total counter'
+        ]
+        status_lines = [
+            '# HELP http_requests_total Requests by status code',
+            '# TYPE http_requests_total counter'
+        ]
+        with self._lock:
+            for (method, route), metrics in sorted(self._routes.items()):
+                labels = f'method="{method}",route="{_escape(route)}",blueprint="{metrics.blueprint}"'
+                bounds = [str(bound) for bound in LATENCY_BUCKETS] + ['+Inf']
+                for bound, count in zip(bounds, itertools.accumulate(metrics.buckets)):
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'http_request_duration_seconds_sum{{{labels}}} {metrics.seconds:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{{labels}}} {metrics.count}')
+                sql_lines.append(f'http_request_sql_queries_total{{{labels}}} {metrics.sql_count}')
+                sql_time_lines.append(f'http_request_sql_seconds_total{{{labels}}} {metrics.sql_seconds:.6f}')
+                for status, count in sorted(metrics.statuses.items()):
+                    status_lines.append(f'http_requests_total{{{labels},status="{status}"}} {count}')
+        return '\n'.join(lines + sql_lines + sql_time_lines + status_lines) + '\n'
+
+    def _metrics_view(self):
+        from flask import Response, jsonify
+        if self.metrics_token and request.headers.get('Authorization') != f'Bearer {self.metrics_token}':
+            return jsonify({'message': 'Invalid metrics token'}), 401
+        return Response(self.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile() is not None:
+        conn.info['query_started'] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile()
+    started = conn.info.pop('query_started', None)
+    if profile is None or started is None:
+        return
+    profile.record_sql(statement, time.perf_counter() - started)
+
+request_profiler = RequestProfiler()
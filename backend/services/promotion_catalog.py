@@ -0,0 +1,145 @@
+import threading
+import time
+from datetime import datetime
+from models import Promotion
+
+class CachedPromotion:
+    """Detached, read-only snapshot of an active promotion"""
+
+    __slots__ = ('id', 'code', 'apartment_id', 'start_date', 'end_date',
+                 'usage_limit', 'redemption_count', 'type', 'value', 'created_at', 'data')
+
+    def __init__(self, promotion):
+        self.id = promotion.id
+        self.code = promotion.code
+        self.apartment_id = promotion.apartment_id
+        self.start_date = promotion.start_date
+        self.end_date = promotion.end_date
+        self.usage_limit = promotion.usage_limit
+        self.redemption_count = promotion.redemption_count or 0
+        self.type = promotion.type
+        self.value = promotion.value
+        self.created_at = promotion.created_at
+        self.data = promotion.to_dict()
+
+    def is_running(self, on_date):
+        """Check if the promotion date window covers the given date"""
+        if self.start_date and on_date < self.start_date:
+            return False
+        if self.end_date and on_date > self.end_date:
+            return False
+        return True
+
+    def to_dict(self):
+        return dict(self.data)
+
+class PromotionCatalog:
+    """In-process cache of active promotions indexed by id, code and apartment.
+
+    The catalog is rebuilt lazily after `invalidate()` (called by the promotion
+    write endpoints) or once `ttl` seconds have passed, so other workers pick up
+    changes made elsewhere. Usage counters mirror promotions.redemption_count and
+    serve as a cheap pre-check; the authoritative limit check is the conditional
+    UPDATE in services.redemptions.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._loaded_at = None
+        self._by_id = {}
+        self._by_code = {}
+        self._by_apartment = {}
+        self._usage = {}
+
+    def invalidate(self):
+        """Force a reload on next access"""
+        with self._lock:
+            self._loaded_at = None
+
+    def _is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def _load(self):
+        """Rebuild indexes from the database (one query)"""
+        promotions = Promotion.query.filter(Promotion.active == True).all()
+
+        by_id = {}
+        by_code = {}
+        by_apartment = {}
+        for promotion in promotions:
+            entry = CachedPromotion(promotion)
+            by_id[entry.id] = entry
+            if entry.code:
+                by_code[entry.code.upper()] = entry
+            by_apartment.setdefault(entry.apartment_id, []).append(entry)
+
+        # Keep per-apartment lists ordered by window start for date scans
+        for entries in by_apartment.values():
+            entries.sort(key=lambda e: (e.start_date is not None, e.start_date))
+
+        self._by_id = by_id
+        self._by_code = by_code
+        self._by_apartment = by_apartment
+        self._usage = {entry.id: entry.redemption_count for entry in by_id.values()}
+        self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self._is_stale():
+            with self._lock:
+                if self._is_stale():
+                    self._load()
+
+    def all(self):
+        """Get all active promotions, newest first"""
+        self._ensure_loaded()
+        return sorted(self._by_id.values(), key=lambda e: e.created_at or datetime.min, reverse=True)
+
+    def get(self, promotion_id):
+        """Get active promotion by id"""
+        self._ensure_loaded()
+        return self._by_id.get(promotion_id)
+
+    def get_by_code(self, code):
+        """Get active promotion by code (case insensitive)"""
+        self._ensure_loaded()
+        return self._by_code.get((code or '').upper().strip())
+
+    def for_apartment(self, apartment_id, on_date=None):
+        """Get promotions running on a date for an apartment, including global ones"""
+        self._ensure_loaded()
+        on_date = on_date or datetime.now().date()
+        entries = self._by_apartment.get(apartment_id, []) + self._by_apartment.get(None, [])
+        return [entry for entry in entries if entry.is_running(on_date)]
+
+    def usage(self, promotion_id):
+        """Get current redemption count for a promotion"""
+        self._ensure_loaded()
+        return self._usage.get(promotion_id, 0)
+
+    def has_capacity(self, entry):
+        """Check if a promotion still has redemptions left"""
+        return entry.usage_limit is None or self.usage(entry.id) < entry.usage_limit
+
+    def validate(self, entry, apartment_id=None, on_date=None):
+        """Validate a promotion for use. Returns an error message or None"""
+        on_date = on_date or datetime.now().date()
+        if not entry:
+            return 'Invalid promo code'
+        if entry.start_date and on_date < entry.start_date:
+            return 'Promo code not yet active'
+        if entry.end_date and on_date > entry.end_date:
+            return 'Promo code has expired'
+        if apartment_id is not None and entry.apartment_id and entry.apartment_id != apartment_id:
+            return 'Promo code is not valid for this apartment'
+        if not self.has_capacity(entry):
+            return 'Promo code usage limit reached'
+        return None
+
+    def note_redemption(self, promotion_id, delta):
+        """Apply a redemption (+1) or release (-1) recorded in the database to the local counter"""
+        with self._lock:
+            if promotion_id in self._usage:
+                self._usage[promotion_id] = max(self._usage[promotion_id] + delta, 0)
+
+promotion_catalog = PromotionCatalog()
@@ -0,0 +1,61 @@
+from flask import current_app
+
+class QueryBudgetExceeded(Exception):
+    """A request ran more SQL than its route allows, or repeated a statement"""
+
+def query_budget(max_queries):
+    """Declare the maximum number of SQL statements a route may run per request.
+
+    The count includes everything the request executes (authentication
+    lookups, pagination counts, lazy loads), so a serialization loop that
+    starts lazy loading exceeds it as soon as the page has a few rows.
+    """
+    def decorator(fn):
+        fn.query_budget = max_queries
+        return fn
+    return decorator
+
+def find_repeated_statements(profile, threshold):
+    """SQL texts executed at least `threshold` times in one request (the N+1 pattern).
+
+    Statements are counted by SQL text only, parameters are not recorded: the
+    same lookup repeated with identical parameters counts as well.
+    """
+    return sorted(
+        ((statement, count) for statement, count in profile.statement_counts.items() if count >= threshold),
+        key=lambda item: -item[1]
+    )
+
+def check_request(profile, endpoint):
+    """Compare a finished request against its route's budget and the repeat threshold.
+
+    QUERY_BUDGET_MODE selects what happens on a violation: 'warn' logs it,
+    'raise' raises QueryBudgetExceeded (used by the testing config, so the
+    offending request errors out in tests), 'off' skips the check.
+    """
+    mode = current_app.config['QUERY_BUDGET_MODE']
+    if mode == 'off' or endpoint is None:
+        return
+
+    problems = []
+    view = current_app.view_functions.get(endpoint)
+    budget = getattr(view, 'query_budget', None)
+    if budget is not None and profile.sql_count > budget:
+        problems.append(f'{endpoint} ran {profile.sql_count} queries (budget {budget})')
+
+    for statement, count in find_repeated_statements(profile, current_app.config['QUERY_REPEAT_THRESHOLD']):
+        problems.append(f'{endpoint} repeated {count}x: {" ".join(statement.split())[:300]}')
+
+    if not problems:
+        return
+    message = 'Query budget violation: ' + '; '.join(problems)
+    if mode == 'raise':
+        raise QueryBudgetExceeded(message)
+    current_app.logger.warning(message)
+
+def get_route_budgets(app):
+    """Declared budget of every endpoint (None when a route has none)"""
+    return {
+        endpoint: getattr(view, 'query_budget', None)
+        for endpoint, view in sorted(app.view_functions.items())
+    }
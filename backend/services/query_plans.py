@@ -0,0 +1,75 @@
+from datetime import date
+from models import db, Favorite, Notification, Payment, Review
+
+# (name, expected index, builder returning a query with representative parameters)
+HOT_QUERIES = [
+    (
+        'booking availability overlap',
+        'idx_apartment_status_dates',
+        lambda: _availability_query()
+    ),
+    (
+        'payments of a booking',
+        'idx_booking_created',
+        lambda: Payment.query.filter_by(booking_id=1).order_by(Payment.created_at.desc())
+    ),
+    (
+        'notifications of a user',
+        'idx_user_created',
+        lambda: Notification.query.filter_by(user_id=1).order_by(Notification.created_at.desc()).limit(20)
+    ),
+    (
+        'approved reviews of an apartment',
+        'idx_apartment_approved_created',
+        lambda: Review.query.filter_by(apartment_id=1, is_approved=True).order_by(Review.created_at.desc()).limit(10)
+    ),
+    (
+        'favorites of a user',
+        'idx_user_favorited',
+        lambda: Favorite.query.filter_by(user_id=1).order_by(Favorite.created_at.desc(), Favorite.id.desc()).limit(21)
+    ),
+]
+
+def _availability_query():
+    from utils import conflicting_bookings_query
+    return conflicting_bookings_query(1, date(2025, 1, 1), date(2025, 6, 30)).limit(1)
+
+def explain(query, engine=None):
+    """Plan of a query on the given engine (default: the primary) as a list of row dicts.
+
+    MySQL rows are EXPLAIN's (`key` is the chosen index, `Extra` reports
+    filesorts); SQLite rows are EXPLAIN QUERY PLAN's (`detail` names the index).
+    """
+    engine = engine or db.engine
+    statement = getattr(query, 'statement', query)
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    with engine.connect() as connection:
+        result = connection.exec_driver_sql(prefix + sql)
+        return [dict(row._mapping) for row in result]
+
+def _plan_uses_index(plan, index):
+    return any(index in str(value) for row in plan for value in row.values())
+
+def _plan_sorts(plan):
+    text = ' '.join(str(value) for row in plan for value in row.values())
+    return 'Using filesort' in text or 'TEMP B-TREE FOR ORDER BY' in text
+
+def check_query_plans(engine=None):
+    """EXPLAIN every hot query and report whether it uses its index.
+
+    The optimizer decides from table statistics, so on MySQL run this against
+    a realistically sized database (e.g. after `flask generate-data`); on
+    near-empty tables a full scan is often the cheaper plan.
+    """
+    results = []
+    for name, index, build in HOT_QUERIES:
+        plan = explain(build(), engine)
+        results.append({
+            'query': name,
+            'index': index,
+            'uses_index': _plan_uses_index(plan, index),
+            'sorts': _plan_sorts(plan),
+            'plan': plan
+        })
+    return results
@@ -0,0 +1,131 @@
+from sqlalchemy import func, case, select
+from sqlalchemy.exc import IntegrityError
+from models import db, Apartment, Review, ApartmentRatingAggregate
+
+def _star_column(rating):
+    """Get histogram column for a star rating"""
+    return getattr(ApartmentRatingAggregate, f'star_{int(rating)}')
+
+def _ensure_aggregate(apartment_id):
+    """Create the aggregate row for an apartment if it does not exist yet"""
+    if db.session.get(ApartmentRatingAggregate, apartment_id):
+        return
+    try:
+        # Savepoint so a concurrent insert of the same row doesn't abort the caller's transaction
+        with db.session.begin_nested():
+            db.session.add(ApartmentRatingAggregate(
+                apartment_id=apartment_id,
+                rating_sum=0,
+                rating_count=0,
+                star_1=0, star_2=0, star_3=0, star_4=0, star_5=0
+            ))
+    except IntegrityError:
+        pass
+
+def _sync_avg_rating(apartment_id):
+    """Copy the aggregate average into apartments.avg_rating"""
+    average = select(
+        func.coalesce(
+            ApartmentRatingAggregate.rating_sum * 1.0 / func.nullif(ApartmentRatingAggregate.rating_count, 0),
+            0
+        )
+    ).where(ApartmentRatingAggregate.apartment_id == apartment_id).scalar_subquery()
+
+    Apartment.query.filter_by(id=apartment_id).update(
+        {Apartment.avg_rating: average},
+        synchronize_session=False
+    )
+
+def apply_rating(apartment_id, rating, delta=1):
+    """Add (delta=1) or remove (delta=-1) one approved rating from the apartment aggregate.
+
+    Counters are updated with column arithmetic in a single UPDATE, so concurrent
+    approvals never overwrite each other. The caller is responsible for committing.
+    """
+    _ensure_aggregate(apartment_id)
+
+    star_column = _star_column(rating)
+    ApartmentRatingAggregate.query.filter_by(apartment_id=apartment_id).update({
+        ApartmentRatingAggregate.rating_sum: ApartmentRatingAggregate.rating_sum + delta * int(rating),
+        ApartmentRatingAggregate.rating_count: ApartmentRatingAggregate.rating_count + delta,
+        star_column: star_column + delta
+    }, synchronize_session=False)
+
+    _sync_avg_rating(apartment_id)
+
+    # Drop stale in-session copies so the next read sees the new values
+    aggregate = db.session.get(ApartmentRatingAggregate, apartment_id)
+    if aggregate:
+        db.session.expire(aggregate)
+    apartment = db.session.get(Apartment, apartment_id)
+    if apartment:
+        db.session.expire(apartment, ['avg_rating'])
+
+def record_review(review):
+    """Count a review in its apartment aggregate (only approved reviews are counted)"""
+    if review.is_approved:
+        apply_rating(review.apartment_id, review.rating, 1)
+
+def discard_review(review):
+    """Remove a review from its apartment aggregate before it is deleted or unapproved"""
+    if review.is_approved:
+        apply_rating(review.apartment_id, review.rating, -1)
+
+def get_rating_summary(apartment_id):
+    """Get average, count and star histogram for an apartment"""
+    aggregate = db.session.get(ApartmentRatingAggregate, apartment_id)
+    if not aggregate:
+        return ApartmentRatingAggregate(
+            apartment_id=apartment_id,
+            rating_sum=0,
+            rating_count=0
+        ).to_dict()
+    return aggregate.to_dict()
+
+def recompute_rating_aggregates():
+    """Rebuild aggregates for all apartments from approved reviews.
+
+    Uses one grouped query over reviews; apartments without approved reviews are reset to zero.
+    Returns the number of apartments processed.
+    """
+    star_sums = [
+        func.sum(case((Review.rating == star, 1), else_=0)).label(f'star_{star}')
+        for star in range(1, 6)
+    ]
+    rows = db.session.query(
+        Review.apartment_id,
+        func.sum(Review.rating).label('rating_sum'),
+        func.count(Review.id).label('rating_count'),
+        *star_sums
+    ).filter(
+        Review.is_approved == True
+    ).group_by(Review.apartment_id).all()
+
+    totals = {row.apartment_id: row for row in rows}
+    apartment_ids = [apartment_id for (apartment_id,) in db.session.query(Apartment.id).all()]
+
+    aggregates = []
+    averages = []
+    for apartment_id in apartment_ids:
+        row = totals.get(apartment_id)
+        rating_sum = int(row.rating_sum) if row else 0
+        rating_count = int(row.rating_count) if row else 0
+        aggregate = {
+            'apartment_id': apartment_id,
+            'rating_sum': rating_sum,
+            'rating_count': rating_count
+        }
+        for star in range(1, 6):
+            aggregate[f'star_{star}'] = int(getattr(row, f'star_{star}')) if row else 0
+        aggregates.append(aggregate)
+        averages.append({
+            'id': apartment_id,
+            'avg_rating': round(rating_sum / rating_count, 2) if rating_count else 0
+        })
+
+    ApartmentRatingAggregate.query.delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(ApartmentRatingAggregate, aggregates)
+    db.session.bulk_update_mappings(Apartment, averages)
+    db.session.commit()
+
+    return len(apartment_ids)
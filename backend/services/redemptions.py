@@ -0,0 +1,136 @@
+from datetime import datetime
+from models import db, Promotion, PromotionRedemption
+from services.promotion_catalog import promotion_catalog
+
+def lock_promotion(promotion_id, apartment_id=None, on_date=None):
+    """Re-read a promotion inside the booking transaction before redeeming it.
+
+    The catalog entry used for the pre-check can be up to its TTL old, so the
+    row is locked (SELECT ... FOR UPDATE) and checked again: a promotion that
+    was deactivated, edited or ran out in the meantime is caught here, and the
+    caller computes the discount from the fresh row. Returns (promotion, error
+    message or None); on an error the caller should roll back.
+    """
+    promotion = Promotion.query.filter_by(id=promotion_id).with_for_update().first()
+    on_date = on_date or datetime.now().date()
+    if promotion is None:
+        return None, 'Invalid promo code'
+    if not promotion.active:
+        return promotion, 'Promo code is no longer active'
+    if promotion.start_date and on_date < promotion.start_date:
+        return promotion, 'Promo code not yet active'
+    if promotion.end_date and on_date > promotion.end_date:
+        return promotion, 'Promo code has expired'
+    if apartment_id is not None and promotion.apartment_id and promotion.apartment_id != apartment_id:
+        return promotion, 'Promo code is not valid for this apartment'
+    if promotion.usage_limit is not None and (promotion.redemption_count or 0) >= promotion.usage_limit:
+        return promotion, 'Promo code usage limit reached'
+    return promotion, None
+
+def reserve_redemption(promotion_id, booking_id, user_id):
+    """Take one redemption of a promotion for a booking.
+
+    The counter is bumped with a conditional UPDATE that only matches while the
+    promotion is under its usage_limit, so concurrent bookings can never
+    over-redeem: the database row lock serializes them and the losers match zero
+    rows. Runs inside the caller's transaction; returns False when the limit is
+    reached (the caller should roll back).
+    """
+    updated = Promotion.query.filter(
+        Promotion.id == promotion_id,
+        Promotion.active == True,
+        db.or_(
+            Promotion.usage_limit.is_(None),
+            Promotion.redemption_count < Promotion.usage_limit
+        )
+    ).update(
+        {Promotion.redemption_count: Promotion.redemption_count + 1},
+        synchronize_session=False
+    )
+
+    if updated != 1:
+        return False
+
+    db.session.add(PromotionRedemption(
+        promotion_id=promotion_id,
+        booking_id=booking_id,
+        user_id=user_id,
+        status='reserved'
+    ))
+    promotion_catalog.note_redemption(promotion_id, 1)
+    return True
+
+def release_redemption(booking_id):
+    """Give back the redemption held by a booking (rejected/cancelled).
+
+    Idempotent: the ledger row is flipped from 'reserved' to 'released' with a
+    conditional UPDATE and the counter is only decremented when that flip won.
+    Returns True if a redemption was released.
+    """
+    redemption = PromotionRedemption.query.filter_by(
+        booking_id=booking_id,
+        status='reserved'
+    ).first()
+
+    if not redemption:
+        return False
+
+    flipped = PromotionRedemption.query.filter_by(
+        id=redemption.id,
+        status='reserved'
+    ).update({
+        PromotionRedemption.status: 'released',
+        PromotionRedemption.released_at: datetime.utcnow()
+    }, synchronize_session=False)
+
+    if flipped != 1:
+        return False
+
+    Promotion.query.filter(
+        Promotion.id == redemption.promotion_id,
+        Promotion.redemption_count > 0
+    ).update(
+        {Promotion.redemption_count: Promotion.redemption_count - 1},
+        synchronize_session=False
+    )
+    promotion_catalog.note_redemption(redemption.promotion_id, -1)
+    return True
+
+def release_redemptions(booking_ids):
+    """Bulk version of release_redemption() for batch jobs.
+
+    The reserved ledger rows are locked, flipped in one UPDATE and the counters
+    decremented once per promotion. Returns the number of released redemptions.
+    """
+    if not booking_ids:
+        return 0
+
+    redemptions = PromotionRedemption.query.filter(
+        PromotionRedemption.booking_id.in_(booking_ids),
+        PromotionRedemption.status == 'reserved'
+    ).with_for_update().all()
+
+    if not redemptions:
+        return 0
+
+    PromotionRedemption.query.filter(
+        PromotionRedemption.id.in_([r.id for r in redemptions])
+    ).update({
+        PromotionRedemption.status: 'released',
+        PromotionRedemption.released_at: datetime.utcnow()
+    }, synchronize_session=False)
+
+    per_promotion = {}
+    for redemption in redemptions:
+        per_promotion[redemption.promotion_id] = per_promotion.get(redemption.promotion_id, 0) + 1
+
+    for promotion_id, count in per_promotion.items():
+        Promotion.query.filter(Promotion.id == promotion_id).update(
+            {Promotion.redemption_count: db.case(
+                (Promotion.redemption_count > count, Promotion.redemption_count - count),
+                else_=0
+            )},
+            synchronize_session=False
+        )
+        promotion_catalog.note_redemption(promotion_id, -count)
+    return len(redemptions)
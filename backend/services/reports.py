@@ -0,0 +1,313 @@
+import csv
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait as wait_futures
+from datetime import datetime, timedelta, time as dt_time
+from sqlalchemy import func, extract, case
+from models import db, User, Apartment, Booking, Payment, Report
+from services.db_routing import replica_reads
+
+def _period_bounds(period_start, period_end):
+    """Convert report dates to an inclusive datetime range"""
+    return (datetime.combine(period_start, dt_time.min),
+            datetime.combine(period_end, dt_time.max))
+
+def _owner_scope(query, owner_id):
+    """Restrict a payment query to an owner's apartments"""
+    if not owner_id:
+        return query
+    return query.join(Booking, Payment.booking_id == Booking.id).join(
+        Apartment, Booking.apartment_id == Apartment.id
+    ).filter(Apartment.owner_id == owner_id)
+
+def build_financial_report(period_start, period_end, owner_id=None):
+    """Revenue per month and payment type, plus totals per payment status"""
+    start, end = _period_bounds(period_start, period_end)
+    year = extract('year', Payment.payment_date)
+    month = extract('month', Payment.payment_date)
+
+    monthly_query = db.session.query(
+        year.label('year'),
+        month.label('month'),
+        Payment.payment_type,
+        func.count(Payment.id).label('count'),
+        func.sum(Payment.amount).label('total')
+    ).filter(
+        Payment.payment_status == 'completed',
+        Payment.payment_date.between(start, end)
+    )
+    monthly_query = _owner_scope(monthly_query, owner_id)
+    monthly_rows = monthly_query.group_by(year, month, Payment.payment_type).order_by(year, month).all()
+
+    status_query = db.session.query(
+        Payment.payment_status,
+        func.count(Payment.id),
+        func.sum(Payment.amount)
+    ).filter(
+        Payment.created_at.between(start, end)
+    )
+    status_query = _owner_scope(status_query, owner_id)
+    status_rows = status_query.group_by(Payment.payment_status).all()
+
+    rows = []
+    by_type = {}
+    by_month = {}
+    for row in monthly_rows:
+        total = float(row.total or 0)
+        period = f'{int(row.year):04d}-{int(row.month):02d}'
+        rows.append({
+            'period': period,
+            'payment_type': row.payment_type,
+            'count': row.count,
+            'total': total
+        })
+        by_type[row.payment_type] = by_type.get(row.payment_type, 0) + total
+        by_month[period] = by_month.get(period, 0) + total
+
+    return {
+        'summary': {
+            'total_revenue': sum(by_month.values()),
+            'by_type': by_type,
+            'by_month': by_month,
+            'by_status': {
+                status: {'count': count, 'total': float(total or 0)}
+                for status, count, total in status_rows
+            }
+        },
+        'rows': rows
+    }
+
+def build_occupancy_report(period_start, period_end, owner_id=None):
+    """Unit counts per type with occupancy and bookings overlapping the period"""
+    unit_query = db.session.query(
+        Apartment.unit_type,
+        func.count(Apartment.id).label('total'),
+        func.sum(case((Apartment.availability_status == 'occupied', 1), else_=0)).label('occupied')
+    ).filter(Apartment.is_archived == False)
+    if owner_id:
+        unit_query = unit_query.filter(Apartment.owner_id == owner_id)
+    unit_rows = unit_query.group_by(Apartment.unit_type).all()
+
+    booking_query = db.session.query(
+        Apartment.unit_type,
+        func.count(Booking.id)
+    ).join(Apartment, Booking.apartment_id == Apartment.id).filter(
+        Booking.status.in_(['confirmed', 'active', 'completed']),
+        Booking.start_date <= period_end,
+        Booking.end_date >= period_start
+    )
+    if owner_id:
+        booking_query = booking_query.filter(Apartment.owner_id == owner_id)
+    bookings_by_type = dict(booking_query.group_by(Apartment.unit_type).all())
+
+    rows = []
+    for row in unit_rows:
+        occupied = int(row.occupied or 0)
+        rows.append({
+            'unit_type': row.unit_type,
+            'total': row.total,
+            'occupied': occupied,
+            'available': row.total - occupied,
+            'occupancy_rate': round(occupied / row.total * 100, 2) if row.total else 0,
+            'bookings_in_period': bookings_by_type.get(row.unit_type, 0)
+        })
+
+    total = sum(r['total'] for r in rows)
+    occupied = sum(r['occupied'] for r in rows)
+    return {
+        'summary': {
+            'total': total,
+            'occupied': occupied,
+            'available': total - occupied,
+            'occupancy_rate': round(occupied / total * 100, 2) if total else 0
+        },
+        'rows': rows
+    }
+
+def build_tenant_report(period_start, period_end, owner_id=None):
+    """Bookings and completed payments per tenant for bookings overlapping the period"""
+    paid = func.sum(case((Payment.payment_status == 'completed', Payment.amount), else_=0))
+    query = db.session.query(
+        User.id,
+        User.full_name,
+        User.email,
+        func.count(func.distinct(Booking.id)).label('bookings'),
+        paid.label('paid')
+    ).join(Booking, Booking.tenant_id == User.id).outerjoin(
+        Payment, Payment.booking_id == Booking.id
+    ).filter(
+        Booking.start_date <= period_end,
+        Booking.end_date >= period_start
+    )
+    if owner_id:
+        query = query.join(Apartment, Booking.apartment_id == Apartment.id).filter(Apartment.owner_id == owner_id)
+    results = query.group_by(User.id, User.full_name, User.email).order_by(paid.desc()).all()
+
+    rows = [{
+        'tenant_id': row.id,
+        'full_name': row.full_name,
+        'email': row.email,
+        'bookings': row.bookings,
+        'paid': float(row.paid or 0)
+    } for row in results]
+
+    return {
+        'summary': {
+            'tenants': len(rows),
+            'total_paid': sum(r['paid'] for r in rows)
+        },
+        'rows': rows
+    }
+
+REPORT_BUILDERS = {
+    'monthly_income': build_financial_report,
+    'financial': build_financial_report,
+    'yearly': build_financial_report,
+    'occupancy': build_occupancy_report,
+    'tenant': build_tenant_report
+}
+
+def export_report_csv(report, rows, folder):
+    """Write report rows to a CSV file and return its filename"""
+    os.makedirs(folder, exist_ok=True)
+    filename = f'{report.report_code}.csv'
+    with open(os.path.join(folder, filename), 'w', newline='', encoding='utf-8') as f:
+        fieldnames = list(rows[0].keys()) if rows else ['message']
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        if rows:
+            writer.writerows(rows)
+        else:
+            writer.writerow({'message': 'No data for the selected period'})
+    return filename
+
+def generate_report(report_id, folder):
+    """Compute a report, store its data and export file. Runs inside an app context"""
+    report = db.session.get(Report, report_id)
+    if not report:
+        return
+
+    try:
+        filters = report.filters or {}
+        builder = REPORT_BUILDERS[report.report_type]
+        with replica_reads(db.session):
+            data = builder(report.period_start, report.period_end, filters.get('owner_id'))
+
+        report.report_data = data
+        report.file_path = export_report_csv(report, data['rows'], folder)
+        report.status = 'completed'
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        report = db.session.get(Report, report_id)
+        report.status = 'failed'
+        report.report_data = {'error': str(e)}
+        db.session.commit()
+
+REPORT_TIMEOUT_ERROR = 'Report generation timed out'
+
+def find_recent_report(report_type, period_start, period_end, generated_by, filters, max_age_seconds, now=None):
+    """A matching report still generating, or completed in the last max_age_seconds, else None"""
+    now = now or datetime.utcnow()
+    candidates = Report.query.filter(
+        Report.report_type == report_type,
+        Report.period_start == period_start,
+        Report.period_end == period_end,
+        Report.generated_by == generated_by,
+        Report.status.in_(['generating', 'completed'])
+    ).order_by(Report.id.desc()).all()
+    for report in candidates:
+        if (report.filters or {}) != filters:
+            continue
+        if report.status == 'generating' or report.updated_at >= now - timedelta(seconds=max_age_seconds):
+            return report
+    return None
+
+def fail_stale_reports(batch_size, timeout_minutes, now=None):
+    """Fail one batch of reports left 'generating' longer than timeout_minutes.
+
+    A job whose worker process died (crash, deploy) never finishes, so the
+    report would otherwise poll as 'generating' forever. Returns the failed
+    (id, report_code, generated_by) rows.
+    """
+    now = now or datetime.utcnow()
+    rows = db.session.query(Report.id, Report.report_code, Report.generated_by).filter(
+        Report.status == 'generating',
+        Report.created_at < now - timedelta(minutes=timeout_minutes)
+    ).order_by(Report.created_at, Report.id).limit(batch_size).with_for_update(skip_locked=True).all()
+    if rows:
+        Report.query.filter(
+            Report.id.in_([row[0] for row in rows]),
+            Report.status == 'generating'
+        ).update({
+            Report.status: 'failed',
+            Report.report_data: {'error': REPORT_TIMEOUT_ERROR}
+        }, synchronize_session=False)
+    return rows
+
+_worker_app = None
+
+def _init_worker(config_name):
+    """Build one app per worker process (fresh engine, no inherited connections).
+
+    Background services stay in the web process; a worker only generates reports.
+    """
+    global _worker_app
+    from app import create_app
+    _worker_app = create_app(config_name, start_background=False)
+
+def _run_in_worker(report_id):
+    with _worker_app.app_context():
+        generate_report(report_id, _worker_app.config['REPORT_FOLDER'])
+        db.session.remove()
+
+class ReportJobRunner:
+    """Runs report generation off the request path.
+
+    With REPORT_WORKERS > 0 jobs go to a process pool whose workers each hold
+    their own app and connection pool. With 0 workers jobs run inline, which is
+    what tests with an in-memory database need.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+        self.app = None
+        self.config_name = None
+        self.workers = 0
+
+    def init_app(self, app, config_name):
+        self.app = app
+        self.config_name = config_name
+        self.workers = app.config['REPORT_WORKERS']
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: workers must not inherit the parent's pooled DB connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.config_name,)
+                )
+            return self._executor
+
+    def submit(self, report_id, wait=0):
+        """Queue a report for generation, waiting up to `wait` seconds for it to finish"""
+        if self.workers <= 0:
+            generate_report(report_id, self.app.config['REPORT_FOLDER'])
+            return None
+        future = self._get_executor().submit(_run_in_worker, report_id)
+        if wait > 0:
+            wait_futures([future], timeout=wait)
+        return future
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+report_runner = ReportJobRunner()
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+class LocalCache:
+    """In-process LRU cache of serialized responses with a memory cap.
+
+    Values are stored as the encoded response body, so a hit costs no
+    serialization and the cap counts real bytes. Entries live in namespaces
+    (e.g. the apartment listing) that can be dropped as a whole; the least
+    recently used entries are evicted once `max_bytes` is exceeded, and every
+    entry expires after `ttl` seconds so workers that missed an invalidation
+    catch up.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=60):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._namespaces = {}
+        self._bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0, 'invalidations': 0}
+        self.namespace_stats = {}
+
+    def _count(self, namespace, outcome):
+        self.stats[outcome] += 1
+        counters = self.namespace_stats.setdefault(namespace, {'hits': 0, 'misses': 0})
+        counters[outcome] += 1
+
+    def _drop(self, entry_key):
+        body, _ = self._entries.pop(entry_key)
+        self._bytes -= len(body)
+        keys = self._namespaces.get(entry_key[0])
+        if keys is not None:
+            keys.discard(entry_key)
+            if not keys:
+                del self._namespaces[entry_key[0]]
+
+    def get(self, namespace, key):
+        """Cached body, or None"""
+        entry_key = (namespace, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    self._drop(entry_key)
+                self._count(namespace, 'misses')
+                return None
+            self._entries.move_to_end(entry_key)
+            self._count(namespace, 'hits')
+            return entry[0]
+
+    def set(self, namespace, key, body):
+        """Store a body, evicting least recently used entries to stay under the cap"""
+        if len(body) > self.max_bytes:
+            return
+        entry_key = (namespace, key)
+        with self._lock:
+            if entry_key in self._entries:
+                self._drop(entry_key)
+            self._entries[entry_key] = (body, time.monotonic() + self.ttl)
+            self._namespaces.setdefault(namespace, set()).add(entry_key)
+            self._bytes += len(body)
+            self.stats['sets'] += 1
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+
+    def delete(self, namespace, key):
+        """Drop one entry"""
+        with self._lock:
+            if (namespace, key) in self._entries:
+                self._drop((namespace, key))
+            self.stats['invalidations'] += 1
+
+    def clear_namespace(self, namespace):
+        """Drop every entry of a namespace"""
+        with self._lock:
+            for entry_key in list(self._namespaces.get(namespace, ())):
+                self._drop(entry_key)
+            self.stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._namespaces.clear()
+            self._bytes = 0
+
+    def snapshot(self):
+        """Hit/miss counters and memory usage"""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                'backend': 'local',
+                **self.stats,
+                'hit_ratio': round(self.stats['hits'] / lookups, 3) if lookups else None,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'namespaces': {name: dict(counters) for name, counters in self.namespace_stats.items()}
+            }
+
+class RedisCache(LocalCache):
+    """Response cache shared by all workers through Redis.
+
+    Each namespace has a generation counter that is part of its keys, so
+    clearing a namespace is a single INCR and old entries age out. The memory
+    cap and LRU eviction are Redis's own (`maxmemory` with
+    `maxmemory-policy allkeys-lru`); entries bigger than `max_bytes` are not
+    stored. Hit/miss counters are per worker.
+    """
+
+    key_prefix = 'response_cache:'
+
+    def __init__(self, url, max_bytes=32 * 1024 * 1024, ttl=60):
+        super().__init__(max_bytes, ttl)
+        import redis  # optional dependency, only needed for a shared cache
+        self._redis = redis.Redis.from_url(url)
+
+    def _key(self, namespace, key):
+        generation = self._redis.get(f'{self.key_prefix}gen:{namespace}') or b'0'
+        return f'{self.key_prefix}{namespace}:{generation.decode()}:{key}'
+
+    def get(self, namespace, key):
+        body = self._redis.get(self._key(namespace, key))
+        with self._lock:
+            self._count(namespace, 'hits' if body is not None else 'misses')
+        return body
+
+    def set(self, namespace, key, body):
+        if len(body) > self.max_bytes:
+            return
+        self._redis.set(self._key(namespace, key), body, ex=self.ttl)
+        with self._lock:
+            self.stats['sets'] += 1
+
+    def delete(self, namespace, key):
+        self._redis.delete(self._key(namespace, key))
+        with self._lock:
+            self.stats['invalidations'] += 1
+
+    def clear_namespace(self, namespace):
+        self._redis.incr(f'{self.key_prefix}gen:{namespace}')
+        with self._lock:
+            self.stats['invalidations'] += 1
+
+    def clear(self):
+        for key in self._redis.scan_iter(f'{self.key_prefix}*'):
+            self._redis.delete(key)
+
+    def snapshot(self):
+        data = super().snapshot()
+        data['backend'] = 'redis'
+        info = self._redis.info('memory')
+        data['entries'] = None
+        data['bytes'] = info.get('used_memory')
+        data['max_bytes'] = info.get('maxmemory') or None
+        return data
+
+response_cache = LocalCache()
+
+def configure_response_cache(app):
+    """Select the cache backend (Redis when RESPONSE_CACHE_URL is set, otherwise in-process)"""
+    global response_cache
+    url = app.config['RESPONSE_CACHE_URL']
+    max_bytes = app.config['RESPONSE_CACHE_MAX_BYTES']
+    ttl = app.config['RESPONSE_CACHE_TTL']
+    if url:
+        response_cache = RedisCache(url, max_bytes, ttl)
+    else:
+        response_cache = LocalCache(max_bytes, ttl)
+    return response_cache
+
+def get_response_cache():
+    """Get the active cache"""
+    return response_cache
+
+def make_key(params):
+    """Stable key for a dict of normalized parameters"""
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+def encode_json(data):
+    """Encode a payload exactly like jsonify() does"""
+    return (current_app.json.dumps(data) + '\n').encode()
+
+def json_response(body):
+    """Response for an encoded payload"""
+    return current_app.response_class(body, mimetype='application/json')
+
+# Apartment catalog entries
+
+LISTING_NAMESPACE = 'apartments:list'
+DETAIL_NAMESPACE = 'apartments:detail'
+
+def invalidate_apartment(apartment_id):
+    """Drop the cached detail of an apartment and every listing page.
+
+    Any change to an apartment can move it between listing pages (price,
+    status, rating, archiving), so all listings are dropped with it.
+    """
+    response_cache.delete(DETAIL_NAMESPACE, apartment_id)
+    response_cache.clear_namespace(LISTING_NAMESPACE)
+
+def invalidate_apartments(apartment_ids):
+    """Bulk version of invalidate_apartment(): drops each detail and the listings once"""
+    for apartment_id in apartment_ids:
+        response_cache.delete(DETAIL_NAMESPACE, apartment_id)
+    if apartment_ids:
+        response_cache.clear_namespace(LISTING_NAMESPACE)
+
+def invalidate_listings():
+    """Drop every cached listing page (e.g. after a new apartment is created)"""
+    response_cache.clear_namespace(LISTING_NAMESPACE)
@@ -0,0 +1,287 @@
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from models import db, Booking, Payment, PaymentTransaction
+from services.redemptions import release_redemptions
+from services.reports import fail_stale_reports
+from utils import create_notifications
+
+EXPIRED_PAYMENT_NOTE = 'Expired: not paid before due date'
+STALE_BOOKING_NOTE = 'Cancelled automatically: not confirmed before start date'
+
+def _claim(query, batch_size):
+    """Lock the next batch of rows, skipping rows other transactions hold"""
+    return query.limit(batch_size).with_for_update(skip_locked=True).all()
+
+def expire_overdue_payments(batch_size, today=None):
+    """Fail one batch of overdue pending deposit payments and cancel their bookings.
+
+    The candidates come from a range scan on (payment_status, due_date); the batch
+    is locked with SKIP LOCKED so concurrent sweeps and user requests never wait
+    on each other. Deposits with a gateway checkout still open and unexpired
+    are left alone, so a tenant who is paying right now keeps the booking; they
+    are picked up once that transaction expires. Returns (payments expired,
+    notifications to send).
+    """
+    today = today or datetime.now().date()
+    checkout_open = db.session.query(PaymentTransaction.id).filter(
+        PaymentTransaction.payment_id == Payment.id,
+        PaymentTransaction.status.in_(['initiated', 'pending']),
+        PaymentTransaction.expired_at > datetime.utcnow()
+    ).exists()
+    rows = _claim(
+        db.session.query(Payment.id, Payment.payment_code, Booking.id, Booking.tenant_id, Booking.status).join(
+            Booking, Payment.booking_id == Booking.id
+        ).filter(
+            Payment.payment_status == 'pending',
+            Payment.due_date < today,
+            Payment.payment_type == 'deposit',
+            ~checkout_open
+        ).order_by(Payment.due_date, Payment.id),
+        batch_size
+    )
+    if not rows:
+        return 0, []
+
+    payment_ids = [row[0] for row in rows]
+    Payment.query.filter(
+        Payment.id.in_(payment_ids),
+        Payment.payment_status == 'pending'
+    ).update({
+        Payment.payment_status: 'failed',
+        Payment.notes: EXPIRED_PAYMENT_NOTE
+    }, synchronize_session=False)
+
+    PaymentTransaction.query.filter(
+        PaymentTransaction.payment_id.in_(payment_ids),
+        PaymentTransaction.status.in_(['initiated', 'pending'])
+    ).update({PaymentTransaction.status: 'expired'}, synchronize_session=False)
+
+    booking_ids = [row[2] for row in rows if row[4] in ('pending', 'confirmed')]
+    if booking_ids:
+        Booking.query.filter(
+            Booking.id.in_(booking_ids),
+            Booking.status.in_(['pending', 'confirmed'])
+        ).update({
+            Booking.status: 'cancelled',
+            Booking.rejection_reason: EXPIRED_PAYMENT_NOTE
+        }, synchronize_session=False)
+        release_redemptions(booking_ids)
+
+    notifications = [{
+        'user_id': tenant_id,
+        'title': 'Pembayaran Kedaluwarsa',
+        'message': f'Pembayaran {payment_code} melewati batas waktu. Booking Anda dibatalkan.',
+        'notification_type': 'payment',
+        'related_id': payment_id
+    } for payment_id, payment_code, booking_id, tenant_id, status in rows]
+    return len(rows), notifications
+
+def cancel_stale_bookings(batch_size, today=None):
+    """Cancel one batch of pending bookings whose start date passed without approval.
+
+    Uses the (status, start_date) index. Their open payments are failed along
+    with them. Returns (bookings cancelled, notifications to send).
+    """
+    today = today or datetime.now().date()
+    rows = _claim(
+        db.session.query(Booking.id, Booking.booking_code, Booking.tenant_id).filter(
+            Booking.status == 'pending',
+            Booking.start_date < today
+        ).order_by(Booking.start_date, Booking.id),
+        batch_size
+    )
+    if not rows:
+        return 0, []
+
+    booking_ids = [row[0] for row in rows]
+    Booking.query.filter(
+        Booking.id.in_(booking_ids),
+        Booking.status == 'pending'
+    ).update({
+        Booking.status: 'cancelled',
+        Booking.rejection_reason: STALE_BOOKING_NOTE
+    }, synchronize_session=False)
+
+    Payment.query.filter(
+        Payment.booking_id.in_(booking_ids),
+        Payment.payment_status == 'pending'
+    ).update({
+        Payment.payment_status: 'failed',
+        Payment.notes: STALE_BOOKING_NOTE
+    }, synchronize_session=False)
+    release_redemptions(booking_ids)
+
+    notifications = [{
+        'user_id': tenant_id,
+        'title': 'Booking Dibatalkan',
+        'message': f'Booking {booking_code} dibatalkan karena belum dikonfirmasi sampai tanggal mulai.',
+        'notification_type': 'booking',
+        'related_id': booking_id
+    } for booking_id, booking_code, tenant_id in rows]
+    return len(rows), notifications
+
+def expire_gateway_transactions(batch_size, now=None):
+    """Mark one batch of open gateway transactions past expired_at as expired"""
+    now = now or datetime.utcnow()
+    rows = _claim(
+        db.session.query(PaymentTransaction.id).filter(
+            PaymentTransaction.status.in_(['initiated', 'pending']),
+            PaymentTransaction.expired_at < now
+        ).order_by(PaymentTransaction.expired_at, PaymentTransaction.id),
+        batch_size
+    )
+    if not rows:
+        return 0, []
+
+    PaymentTransaction.query.filter(
+        PaymentTransaction.id.in_([row[0] for row in rows]),
+        PaymentTransaction.status.in_(['initiated', 'pending'])
+    ).update({PaymentTransaction.status: 'expired'}, synchronize_session=False)
+    return len(rows), []
+
+def purge_tombstones(batch_size, now=None):
+    """Delete one batch of delta-sync tombstones past SYNC_TOMBSTONE_RETENTION_DAYS"""
+    from services.sync import purge_sync_tombstones
+    return purge_sync_tombstones(batch_size, current_app.config['SYNC_TOMBSTONE_RETENTION_DAYS'], now), []
+
+def expire_stale_reports(batch_size, now=None):
+    """Fail one batch of report jobs still 'generating' after REPORT_TIMEOUT_MINUTES"""
+    rows = fail_stale_reports(batch_size, current_app.config['REPORT_TIMEOUT_MINUTES'], now)
+    notifications = [{
+        'user_id': generated_by,
+        'title': 'Laporan Gagal',
+        'message': f'Laporan {report_code} gagal dibuat karena melewati batas waktu. Silakan buat ulang.',
+        'notification_type': 'system',
+        'related_id': report_id
+    } for report_id, report_code, generated_by in rows]
+    return len(rows), notifications
+
+SWEEP_TASKS = {
+    'expired_payments': expire_overdue_payments,
+    'stale_bookings': cancel_stale_bookings,
+    'gateway_transactions': expire_gateway_transactions,
+    'sync_tombstones': purge_tombstones,
+    'stale_reports': expire_stale_reports
+}
+
+class MaintenanceSweeper:
+    """Runs the sweep tasks in bounded batches and keeps runtime statistics.
+
+    Every batch is its own short transaction, and a run stops after
+    max_batches per task so a large backlog is worked off over several runs
+    instead of one long one. With SWEEPER_ENABLED the web server process runs
+    a daemon thread that sweeps every SWEEPER_INTERVAL seconds; otherwise run
+    it from cron with `flask sweep`.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.batch_size = 200
+        self.max_batches = 50
+        self.interval = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {
+            'runs': 0,
+            'running': False,
+            'last_started_at': None,
+            'last_duration_ms': None,
+            'last_error': None,
+            'tasks': {
+                name: {'last_count': 0, 'total': 0, 'last_batches': 0, 'last_duration_ms': None}
+                for name in SWEEP_TASKS
+            }
+        }
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config['SWEEPER_BATCH_SIZE']
+        self.max_batches = app.config['SWEEPER_MAX_BATCHES']
+        self.interval = app.config['SWEEPER_INTERVAL']
+
+    def _run_task(self, name, task):
+        count = 0
+        batches = 0
+        started = time.perf_counter()
+        while batches < self.max_batches:
+            try:
+                processed, notifications = task(self.batch_size)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            if not processed:
+                break
+            batches += 1
+            count += processed
+            # One insert transaction per batch instead of one commit per notification
+            create_notifications(notifications)
+            if processed < self.batch_size:
+                break
+        return count, batches, (time.perf_counter() - started) * 1000
+
+    def run(self):
+        """Run every task once. Must be called inside an app context"""
+        if not self._lock.acquire(blocking=False):
+            return None
+
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        self._stats['running'] = True
+        self._stats['last_started_at'] = started_at.isoformat()
+        results = {}
+        try:
+            for name, task in SWEEP_TASKS.items():
+                count, batches, duration = self._run_task(name, task)
+                task_stats = self._stats['tasks'][name]
+                task_stats['last_count'] = count
+                task_stats['total'] += count
+                task_stats['last_batches'] = batches
+                task_stats['last_duration_ms'] = round(duration, 2)
+                results[name] = count
+            self._stats['last_error'] = None
+        except Exception as e:
+            self._stats['last_error'] = str(e)
+            self.app.logger.exception('Maintenance sweep failed')
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            self._stats['runs'] += 1
+            self._stats['running'] = False
+            self._stats['last_duration_ms'] = round(duration, 2)
+            self._lock.release()
+
+        self.app.logger.info(f'Maintenance sweep finished in {duration:.1f}ms: {results}')
+        return results
+
+    def stats(self):
+        """Snapshot of runtime statistics for this process"""
+        return {
+            **self._stats,
+            'interval': self.interval,
+            'batch_size': self.batch_size,
+            'max_batches': self.max_batches,
+            'scheduled': bool(self._thread and self._thread.is_alive()),
+            'tasks': {name: dict(values) for name, values in self._stats['tasks'].items()}
+        }
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            with self.app.app_context():
+                self.run()
+                db.session.remove()
+
+    def start(self):
+        """Start the periodic sweep thread (no-op when SWEEPER_INTERVAL is 0)"""
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='maintenance-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+sweeper = MaintenanceSweeper()
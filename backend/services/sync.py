@@ -0,0 +1,214 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import event, insert, or_, and_, select, true
+from models import db, Apartment, Booking, Favorite, Notification, Payment, SyncTombstone
+
+class SyncCursorError(Exception):
+    """The client sent a cursor this server cannot read"""
+
+# Synced entity name -> model; the change timestamp is updated_at, or created_at for
+# favorites, which are only ever inserted and deleted
+SYNC_ENTITIES = {
+    'bookings': Booking,
+    'payments': Payment,
+    'notifications': Notification,
+    'favorites': Favorite
+}
+
+# Entities an admin syncs for every user (notifications and favorites stay per user)
+ADMIN_WIDE_ENTITIES = ('bookings', 'payments')
+
+def _changed_at(model):
+    return model.created_at if model is Favorite else model.updated_at
+
+def _changed_at_value(row):
+    return row.created_at if isinstance(row, Favorite) else row.updated_at
+
+def _scoped(query, name, user):
+    """Limit a query to the rows the user's list endpoints show"""
+    if name in ('notifications', 'favorites'):
+        model = SYNC_ENTITIES[name]
+        return query.filter(model.user_id == user.id)
+    if user.role == 'admin':
+        return query
+    if name == 'bookings':
+        if user.role == 'owner':
+            return query.join(Apartment, Booking.apartment_id == Apartment.id).filter(Apartment.owner_id == user.id)
+        return query.filter(Booking.tenant_id == user.id)
+    query = query.join(Booking, Payment.booking_id == Booking.id)
+    if user.role == 'owner':
+        return query.join(Apartment, Booking.apartment_id == Apartment.id).filter(Apartment.owner_id == user.id)
+    return query.filter(Booking.tenant_id == user.id)
+
+def encode_cursor(positions):
+    """Opaque cursor for {entity: (timestamp, id)} positions"""
+    data = {name: [ts.isoformat(), row_id] for name, (ts, row_id) in positions.items()}
+    return base64.urlsafe_b64encode(json.dumps({'v': 1, 'p': data}, separators=(',', ':')).encode()).decode()
+
+def decode_cursor(token):
+    if not token:
+        return {}
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token.encode()))
+        if data.get('v') != 1:
+            raise ValueError
+        return {name: (datetime.fromisoformat(ts), int(row_id)) for name, (ts, row_id) in data['p'].items()}
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise SyncCursorError('Invalid sync cursor, start a full sync without one')
+
+def _after(column, id_column, position):
+    """Rows strictly after a (timestamp, id) keyset position"""
+    if position is None:
+        return true()
+    ts, row_id = position
+    return or_(column > ts, and_(column == ts, id_column > row_id))
+
+def build_delta(user, cursor=None, entities=None, limit=500, overlap_seconds=10, retention_days=30, now=None):
+    """Rows changed and deleted since the client's cursor.
+
+    Each entity is read with one range query over (change timestamp, id)
+    and deletions with one range query over sync_tombstones, at most `limit`
+    rows each; `has_more` tells the client to call again right away with the
+    returned cursor. Once an entity is drained its position moves to
+    `overlap_seconds` before the start of the request, so rows committed by
+    slightly slower transactions (or servers with a slightly different clock)
+    are picked up next time; clients upsert by id, so repeats are harmless.
+    A cursor older than the tombstone retention cannot see every delete, so
+    the client is told to reset and gets a full sync instead.
+    """
+    now = now or datetime.utcnow()
+    entities = entities or list(SYNC_ENTITIES)
+    positions = decode_cursor(cursor)
+
+    reset = False
+    horizon = now - timedelta(days=retention_days)
+    if positions and any(ts < horizon for ts, _ in positions.values()):
+        positions = {}
+        reset = True
+
+    changes = {}
+    next_positions = {}
+    has_more = False
+    drained_position = (now - timedelta(seconds=overlap_seconds), 0)
+
+    for name in entities:
+        model = SYNC_ENTITIES[name]
+        changed_at = _changed_at(model)
+        position = positions.get(name)
+        rows = _scoped(model.query, name, user).filter(
+            _after(changed_at, model.id, position)
+        ).order_by(changed_at, model.id).limit(limit + 1).all()
+
+        if len(rows) > limit:
+            rows = rows[:limit]
+            has_more = True
+            last = rows[-1]
+            next_positions[name] = (_changed_at_value(last), last.id)
+        else:
+            next_positions[name] = drained_position
+        changes[name] = [row.to_dict() for row in rows]
+
+    position = positions.get('tombstones')
+    query = SyncTombstone.query.filter(
+        SyncTombstone.entity_type.in_(entities),
+        _after(SyncTombstone.deleted_at, SyncTombstone.id, position)
+    )
+    if user.role == 'admin':
+        query = query.filter(or_(
+            SyncTombstone.user_id == user.id,
+            SyncTombstone.entity_type.in_(ADMIN_WIDE_ENTITIES)
+        ))
+    else:
+        query = query.filter(SyncTombstone.user_id == user.id)
+    tombstones = query.order_by(SyncTombstone.deleted_at, SyncTombstone.id).limit(limit + 1).all()
+    if len(tombstones) > limit:
+        tombstones = tombstones[:limit]
+        has_more = True
+        next_positions['tombstones'] = (tombstones[-1].deleted_at, tombstones[-1].id)
+    else:
+        next_positions['tombstones'] = drained_position
+
+    deleted = {name: [] for name in entities}
+    for tombstone in tombstones:
+        if tombstone.entity_id not in deleted[tombstone.entity_type]:
+            deleted[tombstone.entity_type].append(tombstone.entity_id)
+
+    return {
+        'changes': changes,
+        'deleted': deleted,
+        'cursor': encode_cursor(next_positions),
+        'has_more': has_more,
+        'reset': reset,
+        'server_time': now.isoformat()
+    }
+
+# Tombstones
+
+def _tombstone_rows(session):
+    """Tombstones for the synced rows a flush is about to delete, one per user that can see them"""
+    deleted = [obj for obj in session.deleted if isinstance(obj, tuple(SYNC_ENTITIES.values()))]
+    if not deleted:
+        return []
+
+    connection = session.connection()
+    booking_ids = {obj.booking_id for obj in deleted if isinstance(obj, Payment)}
+    apartment_ids = {obj.apartment_id for obj in deleted if isinstance(obj, Booking)}
+    booking_audience = {
+        booking_id: (tenant_id, owner_id)
+        for booking_id, tenant_id, owner_id in connection.execute(
+            select(Booking.id, Booking.tenant_id, Apartment.owner_id)
+            .join(Apartment, Booking.apartment_id == Apartment.id)
+            .where(Booking.id.in_(booking_ids))
+        )
+    } if booking_ids else {}
+    apartment_owners = dict(connection.execute(
+        select(Apartment.id, Apartment.owner_id).where(Apartment.id.in_(apartment_ids))
+    ).all()) if apartment_ids else {}
+
+    now = datetime.utcnow()
+    rows = []
+    for obj in deleted:
+        if isinstance(obj, Booking):
+            name, audience = 'bookings', {obj.tenant_id, apartment_owners.get(obj.apartment_id)}
+        elif isinstance(obj, Payment):
+            name, audience = 'payments', set(booking_audience.get(obj.booking_id, ()))
+        elif isinstance(obj, Notification):
+            name, audience = 'notifications', {obj.user_id}
+        else:
+            name, audience = 'favorites', {obj.user_id}
+        rows.extend(
+            {'user_id': user_id, 'entity_type': name, 'entity_id': obj.id, 'deleted_at': now}
+            for user_id in audience if user_id is not None
+        )
+    return rows
+
+def _before_flush(session, flush_context, instances):
+    rows = _tombstone_rows(session)
+    if rows:
+        session.connection().execute(insert(SyncTombstone.__table__), rows)
+
+def record_tombstone(user_id, entity_type, entity_id):
+    """Tombstone for a row deleted with a bulk DELETE, which the flush listener does not see"""
+    db.session.execute(insert(SyncTombstone), [
+        {'user_id': user_id, 'entity_type': entity_type, 'entity_id': entity_id, 'deleted_at': datetime.utcnow()}
+    ])
+
+def register_tombstones(session_class):
+    """Record a tombstone whenever the ORM deletes a synced row.
+
+    Rows removed by database cascades (ON DELETE CASCADE when a user or
+    apartment is deleted) leave no tombstone; clients drop those on reset.
+    """
+    if not event.contains(session_class, 'before_flush', _before_flush):
+        event.listen(session_class, 'before_flush', _before_flush)
+
+def purge_sync_tombstones(batch_size, retention_days, now=None):
+    """Delete one batch of tombstones older than the retention window. Returns the count"""
+    now = now or datetime.utcnow()
+    ids = [row[0] for row in db.session.query(SyncTombstone.id).filter(
+        SyncTombstone.deleted_at < now - timedelta(days=retention_days)
+    ).order_by(SyncTombstone.deleted_at).limit(batch_size).all()]
+    if ids:
+        SyncTombstone.query.filter(SyncTombstone.id.in_(ids)).delete(synchronize_session=False)
+    return len(ids)
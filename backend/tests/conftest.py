@@ -0,0 +1,88 @@
+from datetime import date, datetime
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from models import (
+    db, User, Apartment, ApartmentFacility, Facility, UnitPhoto, Favorite, Booking,
+    Payment, Promotion, PromotionRedemption, Review, Notification
+)
+
+# Rows per list; comfortably above QUERY_REPEAT_THRESHOLD so per-row lazy loads show up
+SEED_ROWS = 12
+
+@pytest.fixture
+def app():
+    """Testing app (QUERY_BUDGET_MODE='raise') on a fresh in-memory database"""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def seed(app):
+    """Owner, admin and tenant with SEED_ROWS apartments, bookings, payments and favorites.
+
+    Every apartment has a photo, a facility, a review and a favorite; each has
+    a pending booking holding a promotion reservation and a confirmed booking
+    with a deposit waiting for verification.
+    """
+    owner = User(username='owner', email='owner@example.com', password='x', role='owner', full_name='Owner')
+    admin = User(username='admin', email='admin@example.com', password='x', role='admin', full_name='Admin')
+    tenant = User(username='tenant', email='tenant@example.com', password='x', role='tenant', full_name='Tenant')
+    db.session.add_all([owner, admin, tenant])
+    facilities = [Facility(name=f'Facility {i}') for i in range(3)]
+    db.session.add_all(facilities)
+    promotion = Promotion(code='WELCOME', title='Welcome', type='percent', value=5, active=True, redemption_count=SEED_ROWS)
+    db.session.add(promotion)
+    db.session.flush()
+
+    apartments, pending, payments = [], [], []
+    for i in range(SEED_ROWS):
+        apartment = Apartment(unit_number=f'A{i}', unit_type='studio', price_per_month=1000, owner_id=owner.id)
+        db.session.add(apartment)
+        db.session.flush()
+        apartments.append(apartment.id)
+        db.session.add(UnitPhoto(apartment_id=apartment.id, photo_url=f'/uploads/apartments/{i}.png', is_cover=True))
+        db.session.add(ApartmentFacility(apartment_id=apartment.id, facility_id=facilities[i % 3].id))
+        db.session.add(Favorite(user_id=tenant.id, apartment_id=apartment.id))
+
+        booking = Booking(
+            apartment_id=apartment.id, tenant_id=tenant.id, booking_code=f'BP{i}',
+            start_date=date(2030, 1, 1), end_date=date(2030, 7, 1), total_months=6,
+            monthly_rent=1000, status='pending', promotion_id=promotion.id
+        )
+        confirmed = Booking(
+            apartment_id=apartment.id, tenant_id=tenant.id, booking_code=f'BC{i}',
+            start_date=date(2029, 1, 1), end_date=date(2029, 7, 1), total_months=6,
+            monthly_rent=1000, status='confirmed'
+        )
+        db.session.add_all([booking, confirmed])
+        db.session.flush()
+        pending.append(booking.id)
+        db.session.add(PromotionRedemption(promotion_id=promotion.id, booking_id=booking.id, user_id=tenant.id))
+        payment = Payment(
+            booking_id=confirmed.id, payment_code=f'PD{i}', payment_type='deposit', amount=1000,
+            payment_status='verifying', payment_date=datetime.utcnow()
+        )
+        db.session.add(payment)
+        db.session.add(Review(apartment_id=apartment.id, tenant_id=tenant.id, booking_id=confirmed.id, rating=4, is_approved=True))
+        db.session.add(Notification(user_id=tenant.id, title='Booking', message=f'Booking BC{i} confirmed', type='booking'))
+        db.session.flush()
+        payments.append(payment.id)
+    db.session.commit()
+
+    return {
+        'headers': {
+            user.role: {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+            for user in (owner, admin, tenant)
+        },
+        'apartments': apartments,
+        'pending_bookings': pending,
+        'payments': payments
+    }
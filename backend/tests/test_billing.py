@@ -0,0 +1,86 @@
+"""Monthly rent invoices: billing periods, prepaid months and reruns"""
+from datetime import date
+from decimal import Decimal
+import pytest
+from models import db, Booking, Payment, User
+from services.billing import billing_periods, generate_rent_invoices, prepaid_months
+from utils import add_months, generate_invoice_code
+
+@pytest.mark.parametrize('start, months, expected', [
+    (date(2025, 1, 31), 1, date(2025, 2, 28)),
+    (date(2024, 1, 31), 1, date(2024, 2, 29)),
+    (date(2025, 1, 31), 3, date(2025, 4, 30)),
+    (date(2025, 3, 31), -1, date(2025, 2, 28)),
+    (date(2025, 11, 15), 2, date(2026, 1, 15)),
+])
+def test_add_months_clamps_to_month_end(start, months, expected):
+    assert add_months(start, months) == expected
+
+def test_periods_follow_the_start_day():
+    periods = billing_periods(date(2025, 1, 31), date(2025, 7, 31), until=date(2025, 12, 31))
+    assert periods == [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31),
+                       date(2025, 4, 30), date(2025, 5, 31), date(2025, 6, 30)]
+
+def test_periods_skip_prepaid_past_and_future_months():
+    start, end = date(2025, 1, 10), date(2026, 1, 10)
+    assert billing_periods(start, end, until=date(2025, 3, 15)) == [date(2025, 1, 10), date(2025, 2, 10), date(2025, 3, 10)]
+    assert billing_periods(start, end, until=date(2025, 3, 15), prepaid_months=2) == [date(2025, 3, 10)]
+    # The period running from 2025-02-10 to 2025-03-10 ended before `since`
+    assert billing_periods(start, end, until=date(2025, 4, 15), since=date(2025, 3, 10)) == [date(2025, 3, 10), date(2025, 4, 10)]
+    assert billing_periods(start, end, until=date(2026, 6, 1), prepaid_months=12) == []
+
+def test_prepaid_months_of_an_api_booking_cover_its_term():
+    lease = Booking(monthly_rent=Decimal('1000'), total_months=6, deposit_paid=Decimal('1000'),
+                    utility_deposit=Decimal('200'), admin_fee=Decimal('500'), discount_amount=Decimal('385'),
+                    total_amount=Decimal('1000') * 6 + 1000 + 200 + 500 - 385)
+    assert prepaid_months(lease) == 6
+    assert prepaid_months(Booking(monthly_rent=Decimal('1000'))) == 0
+
+@pytest.fixture
+def leases(seed):
+    """Active leases of the seeded tenant, keyed by name"""
+    tenant = User.query.filter_by(username='tenant').one()
+    apartment_id = seed['apartments'][0]
+    rows = {
+        # Imported lease without an upfront payment: billed every month
+        'unpaid': dict(start_date=date(2025, 1, 31), end_date=date(2025, 7, 31), total_months=6),
+        # Booked through the API: rent for all six months paid upfront
+        'prepaid': dict(start_date=date(2025, 1, 31), end_date=date(2025, 7, 31), total_months=6,
+                        total_amount=Decimal('7000'), deposit_paid=Decimal('1000')),
+        # Same, but an admin extended it by two months
+        'extended': dict(start_date=date(2025, 1, 31), end_date=date(2025, 9, 30), total_months=6,
+                         total_amount=Decimal('7000'), deposit_paid=Decimal('1000')),
+    }
+    bookings = {}
+    for name, values in rows.items():
+        booking = Booking(apartment_id=apartment_id, tenant_id=tenant.id, booking_code=f'BL-{name}',
+                          monthly_rent=Decimal('1000'), status='active', **values)
+        db.session.add(booking)
+        bookings[name] = booking
+    db.session.commit()
+    return {name: booking.id for name, booking in bookings.items()}
+
+def _invoices(booking_id):
+    return [payment.billing_period for payment in Payment.query.filter_by(
+        booking_id=booking_id, payment_type='monthly_rent').order_by(Payment.billing_period)]
+
+def test_generator_bills_only_unpaid_months(app, leases):
+    summary = generate_rent_invoices(as_of=date(2025, 8, 20), lead_days=15)
+
+    assert _invoices(leases['unpaid']) == []
+    assert _invoices(leases['prepaid']) == []
+    # Months past the prepaid six, from the one running at as_of up to until
+    assert _invoices(leases['extended']) == [date(2025, 7, 31), date(2025, 8, 31)]
+    assert (summary['leases_scanned'], summary['leases_prepaid'], summary['invoices_created']) == (3, 1, 2)
+
+def test_rerun_creates_nothing(app, leases):
+    first = generate_rent_invoices(as_of=date(2025, 3, 1), lead_days=7)
+    invoices = Payment.query.filter_by(payment_type='monthly_rent').count()
+
+    second = generate_rent_invoices(as_of=date(2025, 3, 1), lead_days=7)
+
+    assert first['invoices_created'] == invoices > 0
+    assert second['invoices_created'] == 0
+    assert Payment.query.filter_by(payment_type='monthly_rent').count() == invoices
+    codes = {payment.payment_code for payment in Payment.query.filter_by(booking_id=leases['unpaid'], payment_type='monthly_rent')}
+    assert codes == {generate_invoice_code(leases['unpaid'], date(2025, 2, 28))}
@@ -0,0 +1,82 @@
+"""Bulk approve/reject/cancel: per-item results and the notifications they publish"""
+from models import db, Booking, Notification, Promotion, PromotionRedemption, User
+from services.notification_stream import get_broker
+
+def _drain(subscriber):
+    payloads = []
+    while not subscriber.empty():
+        payloads.append(subscriber.get_nowait())
+    return payloads
+
+def test_bulk_approve_reports_each_item(client, seed):
+    pending = seed['pending_bookings']
+    confirmed_id = Booking.query.filter_by(booking_code='BC0').one().id
+    missing_id = max(pending) + 1000
+    booking_ids = [pending[0], confirmed_id, missing_id, pending[1]]
+
+    response = client.post('/api/bookings/bulk/approve', headers=seed['headers']['owner'],
+                           json={'booking_ids': booking_ids})
+    body = response.get_json()
+
+    assert response.status_code == 200, body
+    assert (body['succeeded'], body['failed']) == (2, 2)
+    assert body['results'] == [
+        {'booking_id': pending[0], 'success': True, 'status': 'confirmed'},
+        {'booking_id': confirmed_id, 'success': False, 'message': 'Booking is already confirmed'},
+        {'booking_id': missing_id, 'success': False, 'message': 'Booking not found'},
+        {'booking_id': pending[1], 'success': True, 'status': 'confirmed'},
+    ]
+    statuses = dict(db.session.query(Booking.id, Booking.status).filter(Booking.id.in_(booking_ids)))
+    assert statuses == {pending[0]: 'confirmed', confirmed_id: 'confirmed', pending[1]: 'confirmed'}
+
+def test_bulk_reject_releases_redemptions(client, seed):
+    pending = seed['pending_bookings'][:3]
+
+    response = client.post('/api/bookings/bulk/reject', headers=seed['headers']['admin'],
+                           json={'booking_ids': pending, 'reason': 'Unit unavailable'})
+
+    assert response.get_json()['succeeded'] == 3
+    redemptions = PromotionRedemption.query.filter(PromotionRedemption.booking_id.in_(pending)).all()
+    assert {redemption.status for redemption in redemptions} == {'released'}
+    assert Promotion.query.filter_by(code='WELCOME').one().redemption_count == len(seed['pending_bookings']) - 3
+    assert {booking.rejection_reason for booking in Booking.query.filter(Booking.id.in_(pending))} == {'Unit unavailable'}
+
+def test_bulk_action_skips_bookings_of_other_owners(client, seed):
+    from flask_jwt_extended import create_access_token
+    other = User(username='other', email='other@example.com', password='x', role='owner', full_name='Other')
+    db.session.add(other)
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(other.id))}'}
+
+    response = client.post('/api/bookings/bulk/cancel', headers=headers,
+                           json={'booking_ids': seed['pending_bookings'][:2]})
+    body = response.get_json()
+
+    assert body['succeeded'] == 0
+    assert {result['message'] for result in body['results']} == {'Access denied'}
+    assert Booking.query.filter(Booking.id.in_(seed['pending_bookings'][:2]), Booking.status == 'pending').count() == 2
+
+def test_bulk_action_rejects_invalid_batches(client, seed):
+    headers = seed['headers']['owner']
+    assert client.post('/api/bookings/bulk/approve', headers=headers, json={'booking_ids': []}).status_code == 400
+    assert client.post('/api/bookings/bulk/approve', headers=headers, json={'booking_ids': ['x']}).status_code == 400
+
+def test_bulk_action_publishes_the_inserted_notifications(client, seed):
+    tenant = User.query.filter_by(username='tenant').one()
+    broker = get_broker()
+    subscriber = broker.subscribe(tenant.id)
+    try:
+        response = client.post('/api/bookings/bulk/approve', headers=seed['headers']['owner'],
+                               json={'booking_ids': seed['pending_bookings']})
+        assert response.get_json()['succeeded'] == len(seed['pending_bookings'])
+        payloads = _drain(subscriber)
+    finally:
+        broker.unsubscribe(tenant.id, subscriber)
+
+    assert len(payloads) == len(seed['pending_bookings'])
+    assert sorted(payload['related_id'] for payload in payloads) == sorted(seed['pending_bookings'])
+    for payload in payloads:
+        notification = db.session.get(Notification, payload['id'])
+        assert notification is not None
+        assert (notification.user_id, notification.related_id, notification.message) == \
+            (payload['user_id'], payload['related_id'], payload['message'])
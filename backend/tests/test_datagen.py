@@ -0,0 +1,49 @@
+"""DatasetGenerator: deterministic output and consistent leases"""
+from models import db, Apartment, Booking, Payment, User
+from services.datagen import DatasetGenerator
+
+COUNTS = dict(users=60, apartments=12, bookings=40, notifications=30, activity_logs=30)
+
+def _snapshot():
+    """Generated rows without hashed passwords and wall-clock timestamps"""
+    return {
+        'users': db.session.query(User.id, User.username, User.full_name, User.role, User.status).order_by(User.id).all(),
+        'apartments': db.session.query(
+            Apartment.id, Apartment.unit_type, Apartment.price_per_month, Apartment.owner_id, Apartment.availability_status
+        ).order_by(Apartment.id).all(),
+        'bookings': db.session.query(
+            Booking.id, Booking.apartment_id, Booking.tenant_id, Booking.start_date, Booking.end_date, Booking.status
+        ).order_by(Booking.id).all(),
+        'payments': db.session.query(
+            Payment.id, Payment.booking_id, Payment.payment_type, Payment.amount, Payment.payment_status, Payment.billing_period
+        ).order_by(Payment.id).all()
+    }
+
+def _generate(seed):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    counts = DatasetGenerator(seed=seed, chunk_size=7).run(**COUNTS)
+    return counts, _snapshot()
+
+def test_same_seed_gives_the_same_rows(app):
+    counts, first = _generate(7)
+    assert {table: counts[table] for table in COUNTS} == COUNTS
+
+    assert _generate(7)[1] == first
+    assert _generate(8)[1] != first
+
+def test_every_booking_has_a_deposit(app):
+    _generate(7)
+
+    deposits = db.session.query(Payment.booking_id).filter(Payment.payment_type == 'deposit')
+    assert sorted(booking_id for (booking_id,) in deposits) == [booking_id for (booking_id,) in
+                                                              db.session.query(Booking.id).order_by(Booking.id)]
+
+def test_active_leases_mark_their_unit_occupied(app):
+    _generate(7)
+
+    active = {apartment_id for (apartment_id,) in db.session.query(Booking.apartment_id).filter(Booking.status == 'active')}
+    occupied = {apartment_id for (apartment_id,) in db.session.query(Apartment.id).filter(Apartment.availability_status == 'occupied')}
+    assert active
+    assert occupied == active
@@ -0,0 +1,66 @@
+"""Read replica routing with REPLICA_BINDS pointing at a second SQLite database.
+
+The replica has the schema but none of the seeded rows, so a notification
+list served from it is empty while the primary's has SEED_ROWS entries.
+Requests made by the test client share the fixture's app context, so the
+session is removed before each one to start it fresh as a real request would.
+"""
+import pytest
+from config import TestingConfig
+from models import db
+from services.db_routing import STICKY_COOKIE, replica_router
+from tests.conftest import SEED_ROWS
+
+@pytest.fixture(autouse=True)
+def replica_config(monkeypatch, tmp_path):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_BINDS', {'replica_0': f'sqlite:///{tmp_path / "replica.db"}'}, raising=False)
+    monkeypatch.setattr(TestingConfig, 'REPLICA_BINDS', ['replica_0'])
+    yield
+    replica_router._sticky.clear()
+    # init_app() registered an (empty) metadata for the bind on the shared db object
+    db.metadatas.pop('replica_0', None)
+
+@pytest.fixture
+def replica(app):
+    engine = db.engines['replica_0']
+    db.metadata.create_all(engine)
+    return engine
+
+def _request(client, method, url, headers):
+    db.session.remove()
+    return getattr(client, method)(url, headers=headers)
+
+def _notification_total(client, headers):
+    response = _request(client, 'get', '/api/notifications', headers)
+    assert response.status_code == 200
+    return response.get_json()['pagination']['total']
+
+def test_reads_go_to_the_replica(client, seed, replica):
+    assert _notification_total(client, seed['headers']['tenant']) == 0
+
+def test_writer_reads_from_the_primary_afterwards(app, client, seed, replica):
+    headers = seed['headers']['tenant']
+    response = _request(client, 'post', '/api/notifications/mark-all-read', headers)
+    assert response.status_code == 200
+    assert STICKY_COOKIE in response.headers.get('Set-Cookie', '')
+
+    # Same client: the sticky cookie keeps it on the primary
+    assert _notification_total(client, headers) == SEED_ROWS
+    # A fresh client without the cookie is recognised by its JWT identity
+    assert _notification_total(app.test_client(), headers) == SEED_ROWS
+    # Other users still read from the replica
+    assert _notification_total(app.test_client(), seed['headers']['owner']) == 0
+
+def test_reads_fall_back_to_the_primary_when_the_replica_is_down(client, seed, replica):
+    replica_router.mark_down('replica_0')
+
+    assert not replica_router._is_up(db, 'replica_0')
+    assert replica_router.status() == {'replica_0': 'down'}
+    assert _notification_total(client, seed['headers']['tenant']) == SEED_ROWS
+
+def test_replica_is_used_again_after_the_retry_window(client, seed, replica, monkeypatch):
+    monkeypatch.setattr(replica_router, 'retry_seconds', 0)
+    replica_router.mark_down('replica_0')
+
+    assert _notification_total(client, seed['headers']['tenant']) == 0
+    assert replica_router.status() == {'replica_0': 'up'}
@@ -0,0 +1,43 @@
+"""CSV and XLSX exports: query-string validation and file contents"""
+import csv
+import io
+import pytest
+from openpyxl import load_workbook
+from tests.conftest import SEED_ROWS
+
+@pytest.mark.parametrize('params', [
+    {'date_from': '2026-13-01'},
+    {'date_to': 'yesterday'},
+    {'date_from': '01/02/2026'},
+    {'format': 'pdf'}
+])
+def test_bad_query_string_is_400(client, seed, params):
+    response = client.get('/api/exports/bookings', headers=seed['headers']['tenant'], query_string=params)
+
+    assert response.status_code == 400
+    assert response.get_json()['message']
+
+def test_csv_has_a_row_per_booking(client, seed):
+    response = client.get('/api/exports/bookings', headers=seed['headers']['owner'])
+
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert response.status_code == 200
+    assert rows[0][0] == 'booking_code'
+    assert len(rows) == 1 + 2 * SEED_ROWS
+
+def test_date_range_filters_by_created_at(client, seed):
+    response = client.get('/api/exports/bookings', headers=seed['headers']['owner'],
+                          query_string={'date_from': '2000-01-01', 'date_to': '2000-12-31'})
+
+    assert response.status_code == 200
+    assert len(list(csv.reader(io.StringIO(response.get_data(as_text=True))))) == 1
+
+def test_xlsx_has_a_row_per_payment(client, seed):
+    response = client.get('/api/exports/payments?format=xlsx', headers=seed['headers']['tenant'])
+
+    sheet = load_workbook(io.BytesIO(response.get_data()), read_only=True).active
+    rows = list(sheet.iter_rows(values_only=True))
+    assert response.status_code == 200
+    assert rows[0][0] == 'payment_code'
+    assert len(rows) == 1 + SEED_ROWS
+    assert rows[1][3] == 1000
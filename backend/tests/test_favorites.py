@@ -0,0 +1,118 @@
+"""Saving and removing favorites, the denormalized favorites_count and keyset pages"""
+import base64
+from datetime import datetime
+import pytest
+from models import db, Apartment, Favorite, User
+from services.favorites import recompute_favorite_counts
+
+def _count(apartment_id):
+    db.session.expire_all()
+    return db.session.get(Apartment, apartment_id).favorites_count
+
+def test_put_is_idempotent(client, seed):
+    apartment_id = seed['apartments'][0]
+    headers = seed['headers']['owner']
+
+    first = client.put(f'/api/apartments/{apartment_id}/favorite', headers=headers)
+    second = client.put(f'/api/apartments/{apartment_id}/favorite', headers=headers)
+
+    assert first.status_code == 201
+    assert second.status_code == 200
+    assert second.get_json()['message'] == 'Already in favorites'
+    assert first.get_json()['favorites_count'] == second.get_json()['favorites_count'] == _count(apartment_id) == 1
+    assert Favorite.query.filter_by(apartment_id=apartment_id).count() == 2
+
+def test_delete_is_idempotent(client, seed):
+    apartment_id = seed['apartments'][0]
+    headers = seed['headers']['owner']
+    client.put(f'/api/apartments/{apartment_id}/favorite', headers=headers)
+
+    first = client.delete(f'/api/apartments/{apartment_id}/favorite', headers=headers)
+    second = client.delete(f'/api/apartments/{apartment_id}/favorite', headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.get_json()['message'] == 'Not in favorites'
+    assert first.get_json()['is_favorite'] is second.get_json()['is_favorite'] is False
+    assert first.get_json()['favorites_count'] == second.get_json()['favorites_count'] == _count(apartment_id) == 0
+
+def test_missing_apartment_is_404(client, seed):
+    missing_id = max(seed['apartments']) + 1000
+    assert client.put(f'/api/apartments/{missing_id}/favorite', headers=seed['headers']['tenant']).status_code == 404
+
+def test_count_is_not_in_the_cached_apartment_payload(client, seed):
+    apartment_id = seed['apartments'][0]
+    detail = client.get(f'/api/apartments/{apartment_id}')
+    etag = detail.headers['ETag']
+
+    client.put(f'/api/apartments/{apartment_id}/favorite', headers=seed['headers']['owner'])
+
+    assert 'favorites_count' not in detail.get_json()
+    assert client.get(f'/api/apartments/{apartment_id}', headers={'If-None-Match': etag}).status_code == 304
+
+def test_repair_rebuilds_counts_from_favorites(app, seed):
+    # The seed inserts favorites directly, so every count starts out wrong
+    apartment_ids = seed['apartments']
+    Apartment.query.filter(Apartment.id == apartment_ids[1]).update({Apartment.favorites_count: 7})
+    db.session.delete(Favorite.query.filter_by(apartment_id=apartment_ids[2]).one())
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['repair-favorite-counts'])
+
+    assert f'recomputed for {len(apartment_ids)} apartments' in result.output
+    assert [_count(apartment_id) for apartment_id in apartment_ids[:3]] == [1, 1, 0]
+    assert recompute_favorite_counts() == len(apartment_ids)
+
+def _page(client, headers, cursor=None, limit=5):
+    params = {'limit': limit}
+    if cursor:
+        params['cursor'] = cursor
+    return client.get('/api/apartments/favorites', headers=headers, query_string=params)
+
+def _walk(client, headers, between_pages=None):
+    """Apartment ids of every page, following next_cursor to the end"""
+    ids, cursor = [], None
+    while True:
+        body = _page(client, headers, cursor).get_json()
+        ids.extend(favorite['id'] for favorite in body['favorites'])
+        cursor = body['next_cursor']
+        if cursor is None:
+            return ids
+        if between_pages:
+            between_pages()
+            between_pages = None
+
+def test_pages_cover_every_favorite_newest_first(client, seed):
+    ids = _walk(client, seed['headers']['tenant'])
+
+    assert ids == list(reversed(seed['apartments']))
+
+def test_pages_break_created_at_ties_by_id(client, seed):
+    Favorite.query.update({Favorite.created_at: datetime(2030, 1, 1)})
+    db.session.commit()
+
+    assert _walk(client, seed['headers']['tenant']) == list(reversed(seed['apartments']))
+
+def test_favorite_added_between_pages_causes_no_duplicates_or_gaps(client, seed):
+    headers = seed['headers']['tenant']
+    owner = User.query.filter_by(username='owner').one()
+    apartment = Apartment(unit_number='B1', unit_type='studio', price_per_month=900, owner_id=owner.id)
+    db.session.add(apartment)
+    db.session.commit()
+
+    ids = _walk(client, headers, lambda: client.put(f'/api/apartments/{apartment.id}/favorite', headers=headers))
+
+    # The new favorite sorts before the cursor, so it shows up on the next walk from the top
+    assert ids == list(reversed(seed['apartments']))
+    assert _walk(client, headers)[0] == apartment.id
+
+@pytest.mark.parametrize('cursor', [
+    'not-a-cursor',
+    base64.urlsafe_b64encode(b'{"a": 1}').decode(),
+    base64.urlsafe_b64encode(b'["yesterday", 1]').decode(),
+    base64.urlsafe_b64encode(b'null').decode()
+])
+def test_malformed_cursor_is_400(client, seed, cursor):
+    response = _page(client, seed['headers']['tenant'], cursor)
+
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Invalid cursor'
@@ -0,0 +1,70 @@
+"""Catalog versions behind the ETags of the public apartment endpoints"""
+from datetime import datetime
+import pytest
+from models import db, Facility, Notification, User
+from services.http_cache import get_versions
+
+def _listing_etag(client):
+    response = client.get('/api/apartments')
+    assert response.status_code == 200
+    return response.headers['ETag']
+
+def _rename_facility():
+    db.session.get(Facility, 1).name = 'Rooftop pool'
+
+def _edit_owner_profile():
+    User.query.filter_by(username='owner').one().full_name = 'Renamed Owner'
+
+def _add_notification():
+    tenant = User.query.filter_by(username='tenant').one()
+    db.session.add(Notification(user_id=tenant.id, title='Hello', message='Unrelated', type='system'))
+
+def _touch_owner_login():
+    User.query.filter_by(username='owner').one().last_login = datetime.utcnow()
+
+def test_matching_if_none_match_gets_304(client, seed):
+    etag = _listing_etag(client)
+
+    response = client.get('/api/apartments', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.data == b''
+
+def test_apartment_update_changes_the_etag(client, seed):
+    etag = _listing_etag(client)
+    response = client.put(f"/api/apartments/{seed['apartments'][0]}", headers=seed['headers']['owner'],
+                          json={'price_per_month': 1200})
+    assert response.status_code == 200
+
+    assert _listing_etag(client) != etag
+    assert client.get('/api/apartments', headers={'If-None-Match': etag}).status_code == 200
+
+@pytest.mark.parametrize('change', [_rename_facility, _edit_owner_profile])
+def test_embedded_row_change_bumps_the_version(client, seed, change):
+    versions = get_versions(['apartments'])
+    etag = _listing_etag(client)
+
+    change()
+    db.session.commit()
+
+    assert get_versions(['apartments'])[0] == versions[0] + 1
+    assert _listing_etag(client) != etag
+
+@pytest.mark.parametrize('change', [_add_notification, _touch_owner_login])
+def test_unrelated_change_keeps_the_etag(client, seed, change):
+    versions = get_versions(['apartments', 'reviews'])
+    etag = _listing_etag(client)
+
+    change()
+    db.session.commit()
+
+    assert get_versions(['apartments', 'reviews']) == versions
+    assert client.get('/api/apartments', headers={'If-None-Match': etag}).status_code == 304
+
+def test_view_count_keeps_the_detail_etag(client, seed):
+    url = f"/api/apartments/{seed['apartments'][0]}"
+    etag = client.get(url).headers['ETag']
+
+    client.get(url)
+
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
@@ -0,0 +1,79 @@
+"""Notification push: broker fan-out and the per-worker stream limit"""
+import queue
+import pytest
+from config import TestingConfig
+from models import User
+from services.notification_stream import LocalBroker, StreamLimitError, get_broker
+from utils import create_notification, create_notifications
+
+def test_published_payload_reaches_every_stream_of_the_user():
+    broker = LocalBroker()
+    first, second = broker.subscribe(1), broker.subscribe(1)
+    other = broker.subscribe(2)
+
+    broker.publish(1, {'id': 7})
+
+    assert first.get_nowait() == second.get_nowait() == {'id': 7}
+    assert other.empty()
+
+def test_full_queue_drops_instead_of_blocking():
+    broker = LocalBroker(max_queue_size=1)
+    subscriber = broker.subscribe(1)
+
+    broker.publish(1, {'id': 1})
+    broker.publish(1, {'id': 2})
+
+    assert subscriber.get_nowait() == {'id': 1}
+    assert subscriber.empty()
+
+def test_unsubscribed_stream_gets_nothing():
+    broker = LocalBroker()
+    subscriber = broker.subscribe(1)
+    broker.unsubscribe(1, subscriber)
+
+    broker.publish(1, {'id': 1})
+
+    assert subscriber.empty()
+    assert broker.connection_count() == 0
+
+def test_created_notifications_are_published(app, seed):
+    tenant = User.query.filter_by(username='tenant').one()
+    subscriber = get_broker().subscribe(tenant.id)
+    try:
+        single = create_notification(tenant.id, 'Booking', 'Approved', 'booking')
+        create_notifications([{'user_id': tenant.id, 'title': 'Payment', 'message': 'Verified'}])
+
+        pushed = [subscriber.get(timeout=1), subscriber.get(timeout=1)]
+    finally:
+        get_broker().unsubscribe(tenant.id, subscriber)
+
+    assert pushed[0]['id'] == single.id
+    assert [payload['title'] for payload in pushed] == ['Booking', 'Payment']
+    with pytest.raises(queue.Empty):
+        subscriber.get_nowait()
+
+def test_streams_past_the_limit_are_refused():
+    broker = LocalBroker(max_connections=2)
+    first = broker.subscribe(1)
+    broker.subscribe(2)
+
+    with pytest.raises(StreamLimitError):
+        broker.subscribe(3)
+    broker.unsubscribe(1, first)
+    broker.subscribe(3)
+
+@pytest.fixture
+def one_stream(monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'NOTIFICATION_STREAM_MAX_CONNECTIONS', 1)
+
+def test_stream_endpoint_answers_503_past_the_limit(one_stream, client, seed):
+    headers = seed['headers']['tenant']
+
+    opened = client.get('/api/notifications/stream', headers=headers)
+    refused = client.get('/api/notifications/stream', headers=headers)
+
+    assert opened.status_code == 200
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == '60'
+    opened.close()
+    assert get_broker().connection_count() == 0
@@ -0,0 +1,86 @@
+"""Bulk payment verification: approve/reject decisions and per-item results"""
+from models import db, Apartment, Booking, Notification, Payment, User
+from services.notification_stream import get_broker
+
+def _verify(client, seed, decisions, role='owner'):
+    response = client.post('/api/payments/bulk/verify', headers=seed['headers'][role], json={'decisions': decisions})
+    return response.status_code, response.get_json()
+
+def test_approve_and_reject_from_pending_and_verifying(client, seed):
+    approved_id, rejected_id = seed['payments'][:2]
+    db.session.get(Payment, approved_id).payment_status = 'pending'
+    db.session.commit()
+
+    status, body = _verify(client, seed, [
+        {'payment_id': approved_id},
+        {'payment_id': rejected_id, 'approved': False, 'notes': 'Transfer not received'},
+    ])
+
+    assert status == 200, body
+    assert body['results'] == [
+        {'payment_id': approved_id, 'success': True, 'status': 'completed'},
+        {'payment_id': rejected_id, 'success': True, 'status': 'failed'},
+    ]
+    approved, rejected = db.session.get(Payment, approved_id), db.session.get(Payment, rejected_id)
+    assert approved.payment_status == 'completed'
+    assert approved.booking.status == 'active'
+    assert approved.booking.contract_start_date == approved.booking.start_date
+    assert db.session.get(Apartment, approved.booking.apartment_id).availability_status == 'occupied'
+    assert (rejected.payment_status, rejected.notes) == ('failed', 'Transfer not received')
+    assert rejected.booking.status == 'confirmed'
+
+def test_already_verified_and_missing_payments_are_reported(client, seed):
+    done_id, open_id = seed['payments'][:2]
+    assert _verify(client, seed, [{'payment_id': done_id}])[1]['succeeded'] == 1
+    missing_id = max(seed['payments']) + 1000
+
+    status, body = _verify(client, seed, [
+        {'payment_id': done_id, 'approved': False},
+        {'payment_id': missing_id},
+        {'payment_id': open_id},
+    ], role='admin')
+
+    assert status == 200
+    assert (body['succeeded'], body['failed']) == (1, 2)
+    assert body['results'] == [
+        {'payment_id': done_id, 'success': False, 'message': 'Payment is already completed'},
+        {'payment_id': missing_id, 'success': False, 'message': 'Payment not found'},
+        {'payment_id': open_id, 'success': True, 'status': 'completed'},
+    ]
+    assert db.session.get(Payment, done_id).payment_status == 'completed'
+
+def test_other_owner_is_denied(client, seed):
+    from flask_jwt_extended import create_access_token
+    other = User(username='other', email='other@example.com', password='x', role='owner', full_name='Other')
+    db.session.add(other)
+    db.session.commit()
+    seed['headers']['other'] = {'Authorization': f'Bearer {create_access_token(identity=str(other.id))}'}
+
+    status, body = _verify(client, seed, [{'payment_id': seed['payments'][0]}], role='other')
+
+    assert body['results'] == [{'payment_id': seed['payments'][0], 'success': False, 'message': 'Access denied'}]
+    assert db.session.get(Payment, seed['payments'][0]).payment_status == 'verifying'
+
+def test_malformed_batches_are_rejected(client, seed):
+    payment_id = seed['payments'][0]
+    assert _verify(client, seed, [])[0] == 400
+    assert _verify(client, seed, [{'approved': True}])[0] == 400
+    assert _verify(client, seed, [{'payment_id': payment_id}, {'payment_id': payment_id}])[0] == 400
+
+def test_published_notifications_match_stored_rows(client, seed):
+    tenant = User.query.filter_by(username='tenant').one()
+    broker = get_broker()
+    subscriber = broker.subscribe(tenant.id)
+    try:
+        _verify(client, seed, [{'payment_id': payment_id} for payment_id in seed['payments']])
+        payloads = []
+        while not subscriber.empty():
+            payloads.append(subscriber.get_nowait())
+    finally:
+        broker.unsubscribe(tenant.id, subscriber)
+
+    assert sorted(payload['related_id'] for payload in payloads) == sorted(seed['payments'])
+    for payload in payloads:
+        notification = db.session.get(Notification, payload['id'])
+        assert (notification.type, notification.related_id) == ('payment', payload['related_id'])
+    assert Booking.query.filter_by(status='active').count() == len(seed['payments'])
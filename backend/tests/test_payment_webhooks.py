@@ -0,0 +1,111 @@
+"""Gateway webhooks: signatures, redelivery, amount checks and late successes"""
+import json
+from datetime import date, timedelta
+import pytest
+from models import db, Booking, Notification, Payment, PaymentTransaction
+from services.payment_gateway import get_gateway
+
+@pytest.fixture
+def checkout(client, seed):
+    """A pending deposit for a seeded pending booking, with an open mock checkout"""
+    payment = Payment(
+        booking_id=seed['pending_bookings'][0], payment_code='PW1', payment_type='deposit', amount=1000,
+        payment_status='pending', due_date=date.today() + timedelta(days=3)
+    )
+    db.session.add(payment)
+    db.session.commit()
+    response = client.post(f'/api/payments/{payment.id}/checkout', headers=seed['headers']['tenant'], json={'gateway': 'mock'})
+    assert response.status_code == 201, response.get_json()
+    transaction = db.session.get(PaymentTransaction, response.get_json()['transaction']['id'])
+    return payment, transaction
+
+def _send(client, body, headers):
+    return client.post('/api/payments/webhook/mock', data=body, headers=headers)
+
+def _signed(gateway, transaction, status='success', **changes):
+    """build_webhook() with some fields changed, re-signed"""
+    body, headers = gateway.build_webhook(transaction, status)
+    body = json.dumps(dict(json.loads(body), **changes)).encode()
+    return body, dict(headers, **{gateway.signature_header: gateway.sign(body)})
+
+def _payment_notifications(payment):
+    return Notification.query.filter_by(type='payment', related_id=payment.id).count()
+
+def test_bad_signature_is_rejected(client, checkout):
+    payment, transaction = checkout
+    body, headers = get_gateway('mock').build_webhook(transaction)
+    headers['X-Mock-Signature'] = '0' * 64
+
+    assert _send(client, body, headers).status_code == 401
+    db.session.refresh(transaction)
+    assert transaction.status == 'pending'
+    assert db.session.get(Payment, payment.id).payment_status == 'pending'
+
+def test_success_is_applied_once(client, checkout):
+    payment, transaction = checkout
+    body, headers = get_gateway('mock').build_webhook(transaction)
+
+    first = _send(client, body, headers)
+    assert first.status_code == 200, first.get_json()
+    payment = db.session.get(Payment, payment.id)
+    paid_at = payment.payment_date
+    assert payment.payment_status == 'completed'
+    assert payment.booking.status == 'active'
+    assert _payment_notifications(payment) == 1
+
+    second = _send(client, body, headers)
+    assert second.status_code == 200
+    db.session.expire_all()
+    payment = db.session.get(Payment, payment.id)
+    assert (payment.payment_status, payment.payment_date) == ('completed', paid_at)
+    assert _payment_notifications(payment) == 1
+
+def test_amount_mismatch_moves_transaction_to_review(client, checkout):
+    payment, transaction = checkout
+    body, headers = _signed(get_gateway('mock'), transaction, amount=10)
+
+    assert _send(client, body, headers).status_code == 200
+    db.session.expire_all()
+    transaction = db.session.get(PaymentTransaction, transaction.id)
+    assert transaction.status == 'review'
+    assert 'expected 1000' in transaction.error_message
+    payment = db.session.get(Payment, payment.id)
+    assert payment.payment_status == 'verifying'
+    assert payment.booking.status == 'pending'
+
+def test_late_success_on_expired_transaction_completes_open_payment(client, checkout):
+    payment, transaction = checkout
+    transaction.status = 'expired'
+    db.session.commit()
+    body, headers = get_gateway('mock').build_webhook(transaction)
+
+    assert _send(client, body, headers).status_code == 200
+    db.session.expire_all()
+    assert db.session.get(PaymentTransaction, transaction.id).status == 'success'
+    assert db.session.get(Payment, payment.id).payment_status == 'completed'
+
+def test_late_success_after_sweeper_failed_payment_is_flagged(client, checkout):
+    payment, transaction = checkout
+    transaction.status = 'expired'
+    payment.payment_status = 'failed'
+    payment.booking.status = 'cancelled'
+    db.session.commit()
+    body, headers = get_gateway('mock').build_webhook(transaction)
+
+    assert _send(client, body, headers).status_code == 200
+    db.session.expire_all()
+    transaction = db.session.get(PaymentTransaction, transaction.id)
+    assert transaction.status == 'review'
+    assert 'failed' in transaction.error_message
+    assert db.session.get(Payment, payment.id).payment_status == 'failed'
+    assert db.session.get(Booking, payment.booking_id).status == 'cancelled'
+
+def test_failure_after_success_is_ignored(client, checkout):
+    payment, transaction = checkout
+    gateway = get_gateway('mock')
+    _send(client, *gateway.build_webhook(transaction))
+
+    assert _send(client, *gateway.build_webhook(transaction, 'failed')).status_code == 200
+    db.session.expire_all()
+    assert db.session.get(PaymentTransaction, transaction.id).status == 'success'
+    assert db.session.get(Payment, payment.id).payment_status == 'completed'
@@ -0,0 +1,96 @@
+"""Promotion redemptions through POST /api/bookings: limits, releases and stale catalog entries"""
+from datetime import date, timedelta
+from decimal import Decimal
+import pytest
+from models import db, Booking, Payment, Promotion, PromotionRedemption
+from services.promotion_catalog import promotion_catalog
+from services.sweeper import sweeper
+
+@pytest.fixture
+def promotion(seed):
+    promotion = Promotion(code='LIMITED', title='Limited', type='fixed_amount', value=100, active=True, usage_limit=2)
+    db.session.add(promotion)
+    db.session.commit()
+    promotion_catalog.invalidate()
+    return promotion.id
+
+def _book(client, seed, promotion_id, index=0):
+    # Well after the seeded bookings of the apartment
+    return client.post('/api/bookings', headers=seed['headers']['tenant'], json={
+        'apartment_id': seed['apartments'][index],
+        'start_date': '2035-01-01',
+        'end_date': '2035-07-01',
+        'promotion_id': promotion_id
+    })
+
+def _redemption_count(promotion_id):
+    db.session.expire_all()
+    return db.session.get(Promotion, promotion_id).redemption_count
+
+def _redemption_status(booking_id):
+    return PromotionRedemption.query.filter_by(booking_id=booking_id).one().status
+
+def test_usage_limit_is_enforced(client, seed, promotion):
+    assert _book(client, seed, promotion, 0).status_code == 201
+    assert _book(client, seed, promotion, 1).status_code == 201
+
+    response = _book(client, seed, promotion, 2)
+
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Promo code usage limit reached'
+    assert _redemption_count(promotion) == 2
+
+def test_reject_and_cancel_release_the_redemption(client, seed, promotion):
+    rejected = _book(client, seed, promotion, 0).get_json()['booking']['id']
+    cancelled = _book(client, seed, promotion, 1).get_json()['booking']['id']
+    assert _redemption_count(promotion) == 2
+
+    client.post(f'/api/bookings/{rejected}/reject', headers=seed['headers']['owner'], json={'reason': 'Taken'})
+    client.post(f'/api/bookings/{cancelled}/cancel', headers=seed['headers']['tenant'])
+
+    assert _redemption_count(promotion) == 0
+    assert _redemption_status(rejected) == _redemption_status(cancelled) == 'released'
+    # Released redemptions can be taken again
+    assert _book(client, seed, promotion, 2).status_code == 201
+
+def test_sweeper_expiry_releases_the_redemption(client, seed, promotion):
+    booking_id = _book(client, seed, promotion, 0).get_json()['booking']['id']
+    Payment.query.filter_by(booking_id=booking_id).update({Payment.due_date: date.today() - timedelta(days=1)})
+    db.session.commit()
+
+    sweeper.run()
+
+    assert db.session.get(Booking, booking_id).status == 'cancelled'
+    assert _redemption_status(booking_id) == 'released'
+    assert _redemption_count(promotion) == 0
+
+def test_deactivated_promotion_is_refused_even_if_cached(client, seed, promotion):
+    assert promotion_catalog.get(promotion) is not None
+    # Deactivated by another worker: this worker's catalog still has it
+    Promotion.query.filter_by(id=promotion).update({Promotion.active: False})
+    db.session.commit()
+
+    response = _book(client, seed, promotion, 0)
+
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Promo code is no longer active'
+    assert _redemption_count(promotion) == 0
+    assert Booking.query.filter_by(apartment_id=seed['apartments'][0], status='pending', promotion_id=promotion).count() == 0
+
+def test_expired_promotion_is_refused_even_if_cached(client, seed, promotion):
+    assert promotion_catalog.get(promotion) is not None
+    Promotion.query.filter_by(id=promotion).update({Promotion.end_date: date.today() - timedelta(days=1)})
+    db.session.commit()
+
+    response = _book(client, seed, promotion, 0)
+
+    assert response.get_json()['message'] == 'Promo code has expired'
+
+def test_discount_comes_from_the_current_row(client, seed, promotion):
+    assert promotion_catalog.get(promotion) is not None
+    Promotion.query.filter_by(id=promotion).update({Promotion.value: 250})
+    db.session.commit()
+
+    booking = _book(client, seed, promotion, 0).get_json()['booking']
+
+    assert Decimal(str(booking['discount_amount'])) == 250
@@ -0,0 +1,61 @@
+"""Every route with a @query_budget, called against seeded data under QUERY_BUDGET_MODE='raise'.
+
+A request that runs more SQL than its budget, or repeats a statement
+QUERY_REPEAT_THRESHOLD times (a lazy load per row), raises
+QueryBudgetExceeded out of the test client.
+"""
+import pytest
+from config import TestingConfig
+from services.query_budget import QueryBudgetExceeded, get_route_budgets
+
+def _import_rows(seed):
+    return {'json': {'apartments': [
+        {'unit_number': f'IMP{i}', 'unit_type': 'studio', 'price_per_month': 900} for i in range(20)
+    ]}}
+
+# endpoint: (role, method, url, request kwargs built from the seed)
+CASES = {
+    'apartments.get_apartments': ('tenant', 'get', '/api/apartments', None),
+    'apartments.get_my_units': ('owner', 'get', '/api/apartments/my-units', None),
+    'apartments.bulk_import_apartments': ('owner', 'post', '/api/apartments/import', _import_rows),
+    'apartments.save_favorite': ('owner', 'put', '/api/apartments/{apartment}/favorite', None),
+    'apartments.delete_favorite': ('tenant', 'delete', '/api/apartments/{apartment}/favorite', None),
+    'apartments.get_favorites': ('tenant', 'get', '/api/apartments/favorites', None),
+    'apartments.get_favorite_ids': ('tenant', 'get', '/api/apartments/favorites/ids', None),
+    'bookings.get_bookings': ('tenant', 'get', '/api/bookings', None),
+    'bookings.bulk_approve_bookings': ('owner', 'post', '/api/bookings/bulk/approve',
+                                       lambda seed: {'json': {'booking_ids': seed['pending_bookings']}}),
+    'bookings.bulk_reject_bookings': ('admin', 'post', '/api/bookings/bulk/reject',
+                                      lambda seed: {'json': {'booking_ids': seed['pending_bookings'], 'reason': 'Unit unavailable'}}),
+    'bookings.bulk_cancel_bookings': ('owner', 'post', '/api/bookings/bulk/cancel',
+                                      lambda seed: {'json': {'booking_ids': seed['pending_bookings']}}),
+    'payments.get_payments': ('owner', 'get', '/api/payments', None),
+    'payments.bulk_verify_payments': ('owner', 'post', '/api/payments/bulk/verify',
+                                      lambda seed: {'json': {'decisions': [{'payment_id': payment_id} for payment_id in seed['payments']]}}),
+    'admin.get_owner_dashboard': ('owner', 'get', '/api/admin/owner-dashboard', None),
+    'sync.get_delta': ('tenant', 'get', '/api/sync', None),
+}
+
+def test_every_budgeted_route_is_covered(app):
+    budgeted = {endpoint for endpoint, budget in get_route_budgets(app).items() if budget is not None}
+    assert budgeted == set(CASES)
+
+@pytest.mark.parametrize('endpoint', sorted(CASES))
+def test_route_stays_within_budget(client, seed, endpoint):
+    role, method, url, build = CASES[endpoint]
+    kwargs = build(seed) if build else {}
+    response = getattr(client, method)(url.format(apartment=seed['apartments'][0]), headers=seed['headers'][role], **kwargs)
+    body = response.get_json()
+    assert 200 <= response.status_code < 300, body
+    # Bulk routes answer 200 with per-item results; every seeded item should go through
+    assert not body.get('failed'), body
+
+@pytest.fixture
+def profiling_disabled(monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'PROFILING_ENABLED', False)
+
+def test_budgets_enforced_without_profiling(profiling_disabled, app, client, seed, monkeypatch):
+    assert 'metrics' not in app.view_functions
+    monkeypatch.setattr(app.view_functions['apartments.get_favorite_ids'], 'query_budget', 0)
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/api/apartments/favorites/ids', headers=seed['headers']['tenant'])
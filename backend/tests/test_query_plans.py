@@ -0,0 +1,9 @@
+"""Every HOT_QUERIES entry is served by its index on the testing database"""
+import pytest
+from services.query_plans import HOT_QUERIES, check_query_plans
+
+@pytest.mark.parametrize('name', [name for name, index, build in HOT_QUERIES])
+def test_hot_query_uses_its_index(seed, name):
+    result = next(result for result in check_query_plans() if result['query'] == name)
+    assert result['uses_index'], result['plan']
+    assert not result['sorts'], result['plan']
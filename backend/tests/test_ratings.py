@@ -0,0 +1,102 @@
+"""Apartment rating aggregates kept in step with review changes, and their repair"""
+from datetime import date
+import pytest
+from sqlalchemy import func
+from models import db, Apartment, ApartmentRatingAggregate, Booking, Review, User
+from services.ratings import recompute_rating_aggregates
+
+@pytest.fixture
+def ratings(seed):
+    # The seed inserts approved reviews directly, without counting them
+    recompute_rating_aggregates()
+    return seed
+
+@pytest.fixture
+def completed_booking(ratings):
+    tenant = User.query.filter_by(username='tenant').one()
+    booking = Booking(
+        apartment_id=ratings['apartments'][0], tenant_id=tenant.id, booking_code='BDONE',
+        start_date=date(2028, 1, 1), end_date=date(2028, 7, 1), total_months=6,
+        monthly_rent=1000, status='completed'
+    )
+    db.session.add(booking)
+    db.session.commit()
+    return booking.id
+
+def _assert_matches_reviews(apartment_id):
+    """The aggregate and avg_rating equal a fresh AVG/COUNT over approved reviews"""
+    db.session.expire_all()
+    count, total, average = db.session.query(
+        func.count(Review.id), func.coalesce(func.sum(Review.rating), 0), func.coalesce(func.avg(Review.rating), 0)
+    ).filter(Review.apartment_id == apartment_id, Review.is_approved == True).one()
+    stars = dict(db.session.query(Review.rating, func.count(Review.id)).filter(
+        Review.apartment_id == apartment_id, Review.is_approved == True
+    ).group_by(Review.rating).all())
+
+    aggregate = db.session.get(ApartmentRatingAggregate, apartment_id)
+    assert (aggregate.rating_count, aggregate.rating_sum) == (count, total)
+    assert [getattr(aggregate, f'star_{star}') for star in range(1, 6)] == [stars.get(star, 0) for star in range(1, 6)]
+    assert float(db.session.get(Apartment, apartment_id).avg_rating) == pytest.approx(float(average), abs=0.01)
+
+def test_review_lifecycle_keeps_the_aggregate_exact(client, ratings, completed_booking):
+    apartment_id = ratings['apartments'][0]
+    admin = ratings['headers']['admin']
+
+    response = client.post('/api/reviews', headers=ratings['headers']['tenant'], json={
+        'apartment_id': apartment_id, 'booking_id': completed_booking, 'rating': 1
+    })
+    assert response.status_code == 201
+    review_id = response.get_json()['review']['id']
+    # Pending reviews are not counted
+    _assert_matches_reviews(apartment_id)
+
+    assert client.post(f'/api/reviews/{review_id}/approve', headers=admin).status_code == 200
+    _assert_matches_reviews(apartment_id)
+    assert db.session.get(ApartmentRatingAggregate, apartment_id).rating_count == 2
+
+    assert client.post(f'/api/reviews/{review_id}/reject', headers=admin).status_code == 200
+    _assert_matches_reviews(apartment_id)
+    assert db.session.get(ApartmentRatingAggregate, apartment_id).rating_count == 1
+
+    assert client.post(f'/api/reviews/{review_id}/approve', headers=admin).status_code == 200
+    assert client.delete(f'/api/reviews/{review_id}', headers=admin).status_code == 200
+    _assert_matches_reviews(apartment_id)
+
+def test_rejecting_or_deleting_a_pending_review_changes_nothing(client, ratings, completed_booking):
+    apartment_id = ratings['apartments'][0]
+    review_id = client.post('/api/reviews', headers=ratings['headers']['tenant'], json={
+        'apartment_id': apartment_id, 'booking_id': completed_booking, 'rating': 5
+    }).get_json()['review']['id']
+
+    response = client.post(f'/api/reviews/{review_id}/reject', headers=ratings['headers']['admin'])
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Review is not approved'
+    assert client.delete(f'/api/reviews/{review_id}', headers=ratings['headers']['tenant']).status_code == 200
+
+    _assert_matches_reviews(apartment_id)
+
+def test_deleting_the_last_review_resets_the_average(client, ratings):
+    apartment_id = ratings['apartments'][1]
+    review_id = Review.query.filter_by(apartment_id=apartment_id).one().id
+
+    assert client.delete(f'/api/reviews/{review_id}', headers=ratings['headers']['admin']).status_code == 200
+
+    _assert_matches_reviews(apartment_id)
+    assert float(db.session.get(Apartment, apartment_id).avg_rating) == 0
+
+def test_repair_ratings_fixes_a_corrupted_aggregate(app, ratings):
+    apartment_ids = ratings['apartments']
+    ApartmentRatingAggregate.query.filter_by(apartment_id=apartment_ids[0]).update({
+        ApartmentRatingAggregate.rating_sum: 999,
+        ApartmentRatingAggregate.rating_count: 50,
+        ApartmentRatingAggregate.star_1: 50
+    })
+    Apartment.query.filter_by(id=apartment_ids[0]).update({Apartment.avg_rating: 1.5})
+    ApartmentRatingAggregate.query.filter_by(apartment_id=apartment_ids[1]).delete()
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['repair-ratings'])
+
+    assert f'recomputed for {len(apartment_ids)} apartments' in result.output
+    for apartment_id in apartment_ids:
+        _assert_matches_reviews(apartment_id)
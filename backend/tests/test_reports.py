@@ -0,0 +1,128 @@
+"""Report jobs with REPORT_WORKERS=0 (run inline): status lifecycle, dashboard reports and stale jobs"""
+from datetime import datetime, timedelta
+import pytest
+from config import TestingConfig
+from models import db, Notification, Payment, Report, User
+from services import reports
+from services.reports import REPORT_TIMEOUT_ERROR, report_runner
+from services.sweeper import sweeper
+from tests.conftest import SEED_ROWS
+
+@pytest.fixture(autouse=True)
+def report_folder(monkeypatch, tmp_path):
+    monkeypatch.setattr(TestingConfig, 'REPORT_FOLDER', str(tmp_path))
+
+@pytest.fixture
+def queued(monkeypatch):
+    """Jobs are accepted but never picked up, as with a busy or dead worker pool"""
+    monkeypatch.setattr(report_runner, 'submit', lambda report_id, wait=0: None)
+
+def _submit(client, headers, **data):
+    body = {'report_type': 'occupancy', 'period_start': '2029-01-01', 'period_end': '2029-12-31', **data}
+    return client.post('/api/admin/reports', headers=headers, json=body)
+
+def _report(client, headers, report_id):
+    response = client.get(f'/api/admin/reports/{report_id}', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()['report']
+
+def test_submitted_report_completes_with_data_and_file(client, seed):
+    headers = seed['headers']['admin']
+
+    response = _submit(client, headers)
+
+    assert response.status_code == 202
+    report = _report(client, headers, response.get_json()['report']['id'])
+    assert report['status'] == 'completed'
+    assert report['report_data']['summary']['total'] == SEED_ROWS
+    download = client.get(f"/api/admin/reports/{report['id']}/download", headers=headers)
+    assert download.status_code == 200
+    assert download.get_data(as_text=True).startswith('unit_type,')
+
+def test_failing_builder_marks_the_report_failed(client, seed, monkeypatch):
+    def broken(*args):
+        raise RuntimeError('replica is down')
+    monkeypatch.setitem(reports.REPORT_BUILDERS, 'occupancy', broken)
+    headers = seed['headers']['admin']
+
+    report = _report(client, headers, _submit(client, headers).get_json()['report']['id'])
+
+    assert report['status'] == 'failed'
+    assert report['report_data'] == {'error': 'replica is down'}
+    assert client.get(f"/api/admin/reports/{report['id']}/download", headers=headers).status_code == 409
+
+def test_generating_report_has_no_data_or_download(client, seed, queued):
+    headers = seed['headers']['admin']
+
+    report = _report(client, headers, _submit(client, headers).get_json()['report']['id'])
+
+    assert report['status'] == 'generating'
+    assert 'report_data' not in report
+    assert client.get(f"/api/admin/reports/{report['id']}/download", headers=headers).status_code == 409
+
+@pytest.mark.parametrize('data', [
+    {'period_start': '2029-02-30'},
+    {'period_end': '31/12/2029'},
+    {'period_start': None},
+    {'period_start': '2029-12-31', 'period_end': '2029-01-01'},
+    {'report_type': 'weekly'}
+])
+def test_invalid_submission_is_400(client, seed, data):
+    assert _submit(client, seed['headers']['admin'], **data).status_code == 400
+
+def test_sweeper_fails_reports_stuck_generating(client, seed, queued):
+    headers = seed['headers']['owner']
+    stuck = _submit(client, headers).get_json()['report']['id']
+    recent = _submit(client, headers).get_json()['report']['id']
+    Report.query.filter_by(id=stuck).update({Report.created_at: datetime.utcnow() - timedelta(hours=2)})
+    db.session.commit()
+
+    assert sweeper.run()['stale_reports'] == 1
+
+    assert _report(client, headers, stuck)['status'] == 'failed'
+    assert _report(client, headers, stuck)['report_data'] == {'error': REPORT_TIMEOUT_ERROR}
+    assert _report(client, headers, recent)['status'] == 'generating'
+    assert Notification.query.filter_by(related_id=stuck, title='Laporan Gagal').count() == 1
+
+def test_occupancy_dashboard_runs_as_a_job(client, seed):
+    headers = seed['headers']['owner']
+
+    first = client.get('/api/admin/reports/occupancy', headers=headers)
+    second = client.get('/api/admin/reports/occupancy', headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    body = first.get_json()
+    assert body['summary']['total'] == SEED_ROWS
+    assert body['by_type'] == {'studio': {'total': SEED_ROWS, 'occupied': 0, 'available': SEED_ROWS}}
+    # The completed job is reused instead of rebuilt
+    assert second.get_json()['report_id'] == body['report_id']
+    assert Report.query.filter_by(report_type='occupancy').count() == 1
+    owner = User.query.filter_by(username='owner').one()
+    assert db.session.get(Report, body['report_id']).filters == {'owner_id': owner.id}
+
+def test_revenue_dashboard_runs_as_a_job(client, seed):
+    payment = db.session.get(Payment, seed['payments'][0])
+    payment.payment_status = 'completed'
+    db.session.commit()
+    year, month = payment.payment_date.year, payment.payment_date.month
+
+    response = client.get(f'/api/admin/reports/revenue?year={year}', headers=seed['headers']['admin'])
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['total_revenue'] == 1000
+    assert body['monthly_data'][str(month)] == 1000
+    assert db.session.get(Report, body['report_id']).report_type == 'yearly'
+
+def test_dashboard_returns_the_job_while_it_runs(client, seed, queued):
+    headers = seed['headers']['admin']
+
+    response = client.get('/api/admin/reports/revenue?year=2029', headers=headers)
+    again = client.get('/api/admin/reports/revenue?year=2029', headers=headers)
+
+    assert response.status_code == again.status_code == 202
+    assert response.get_json()['report']['status'] == 'generating'
+    assert again.get_json()['report']['id'] == response.get_json()['report']['id']
+
+def test_dashboard_with_invalid_year_is_400(client, seed):
+    assert client.get('/api/admin/reports/revenue?year=0', headers=seed['headers']['admin']).status_code == 400
@@ -0,0 +1,61 @@
+"""Apartment detail response cache: hits, invalidation and archived units"""
+from models import db, Apartment
+from services.response_cache import get_response_cache
+
+def _detail(client, apartment_id, headers=None):
+    return client.get(f'/api/apartments/{apartment_id}', headers=headers or {})
+
+def _hits():
+    return get_response_cache().snapshot()['hits']
+
+def test_detail_is_served_from_the_cache(client, seed):
+    apartment_id = seed['apartments'][0]
+    assert _detail(client, apartment_id).status_code == 200
+    hits = _hits()
+
+    response = _detail(client, apartment_id)
+
+    assert response.status_code == 200
+    assert _hits() == hits + 1
+    # A hit still counts the view
+    assert db.session.get(Apartment, apartment_id).total_views == 2
+
+def test_update_invalidates_the_detail(client, seed):
+    apartment_id = seed['apartments'][0]
+    _detail(client, apartment_id)
+
+    response = client.put(f'/api/apartments/{apartment_id}', headers=seed['headers']['owner'],
+                          json={'description': 'Renovated'})
+    assert response.status_code == 200
+
+    assert _detail(client, apartment_id).get_json()['description'] == 'Renovated'
+
+def test_archive_invalidates_the_detail(client, seed):
+    apartment_id = seed['apartments'][0]
+    _detail(client, apartment_id)
+
+    response = client.delete(f'/api/apartments/{apartment_id}?action=archive', headers=seed['headers']['owner'])
+    assert response.status_code == 200
+
+    assert _detail(client, apartment_id).status_code == 404
+    # The owner still sees the archived unit, uncached
+    assert _detail(client, apartment_id, seed['headers']['owner']).get_json()['is_archived'] is True
+
+def test_archived_unit_is_hidden_even_if_the_cache_missed_the_invalidation(client, seed):
+    apartment_id = seed['apartments'][0]
+    _detail(client, apartment_id)
+
+    # As if another worker archived it: the row changes, this worker's cache does not
+    Apartment.query.filter_by(id=apartment_id).update({Apartment.is_archived: True})
+    db.session.commit()
+
+    assert _detail(client, apartment_id).status_code == 404
+
+def test_deleted_unit_is_not_served_from_the_cache(client, seed):
+    apartment_id = seed['apartments'][0]
+    _detail(client, apartment_id)
+
+    db.session.execute(Apartment.__table__.delete().where(Apartment.id == apartment_id))
+    db.session.commit()
+
+    assert _detail(client, apartment_id).status_code == 404
@@ -0,0 +1,101 @@
+"""Maintenance sweeper: overdue deposits, stale bookings and batch bounds"""
+from datetime import date, datetime, timedelta
+import pytest
+from models import db, Booking, Notification, Payment, PaymentTransaction, Promotion, PromotionRedemption
+from services.sweeper import EXPIRED_PAYMENT_NOTE, STALE_BOOKING_NOTE, sweeper
+
+@pytest.fixture
+def overdue_deposits(seed):
+    """A pending deposit, due yesterday, for every seeded pending booking"""
+    payments = []
+    for i, booking_id in enumerate(seed['pending_bookings']):
+        payment = Payment(
+            booking_id=booking_id, payment_code=f'PO{i}', payment_type='deposit', amount=1000,
+            payment_status='pending', due_date=date.today() - timedelta(days=1)
+        )
+        db.session.add(payment)
+        db.session.flush()
+        payments.append(payment.id)
+    db.session.commit()
+    return payments
+
+@pytest.fixture
+def stale_bookings(seed):
+    """Move every seeded pending booking's start date into the past"""
+    Booking.query.filter(Booking.id.in_(seed['pending_bookings'])).update(
+        {Booking.start_date: date.today() - timedelta(days=1)}, synchronize_session=False
+    )
+    db.session.commit()
+    return seed['pending_bookings']
+
+def _reserved_count(booking_ids):
+    return PromotionRedemption.query.filter(
+        PromotionRedemption.booking_id.in_(booking_ids),
+        PromotionRedemption.status == 'reserved'
+    ).count()
+
+def test_overdue_deposits_fail_and_cancel_their_bookings(app, seed, overdue_deposits):
+    results = sweeper.run()
+
+    assert results['expired_payments'] == len(overdue_deposits)
+    payments = Payment.query.filter(Payment.id.in_(overdue_deposits)).all()
+    assert {(payment.payment_status, payment.notes) for payment in payments} == {('failed', EXPIRED_PAYMENT_NOTE)}
+    bookings = Booking.query.filter(Booking.id.in_(seed['pending_bookings'])).all()
+    assert {booking.status for booking in bookings} == {'cancelled'}
+    assert _reserved_count(seed['pending_bookings']) == 0
+    assert Promotion.query.filter_by(code='WELCOME').one().redemption_count == 0
+    notified = {row.related_id for row in Notification.query.filter_by(type='payment')}
+    assert notified == set(overdue_deposits)
+
+def test_deposit_with_open_checkout_is_skipped(app, seed, overdue_deposits):
+    paying_id = overdue_deposits[0]
+    db.session.add(PaymentTransaction(
+        payment_id=paying_id, transaction_reference='TX-OPEN', gateway_name='mock', amount=1000,
+        status='pending', expired_at=datetime.utcnow() + timedelta(minutes=30)
+    ))
+    db.session.commit()
+
+    results = sweeper.run()
+
+    assert results['expired_payments'] == len(overdue_deposits) - 1
+    paying = db.session.get(Payment, paying_id)
+    assert paying.payment_status == 'pending'
+    assert paying.booking.status == 'pending'
+    assert PaymentTransaction.query.filter_by(transaction_reference='TX-OPEN').one().status == 'pending'
+
+def test_deposit_with_expired_checkout_is_swept(app, seed, overdue_deposits):
+    db.session.add(PaymentTransaction(
+        payment_id=overdue_deposits[0], transaction_reference='TX-OLD', gateway_name='mock', amount=1000,
+        status='pending', expired_at=datetime.utcnow() - timedelta(minutes=1)
+    ))
+    db.session.commit()
+
+    results = sweeper.run()
+
+    assert results['expired_payments'] == len(overdue_deposits)
+    assert PaymentTransaction.query.filter_by(transaction_reference='TX-OLD').one().status == 'expired'
+
+def test_stale_pending_bookings_are_cancelled(app, seed, stale_bookings):
+    results = sweeper.run()
+
+    assert results['stale_bookings'] == len(stale_bookings)
+    bookings = Booking.query.filter(Booking.id.in_(stale_bookings)).all()
+    assert {(booking.status, booking.rejection_reason) for booking in bookings} == {('cancelled', STALE_BOOKING_NOTE)}
+    assert _reserved_count(stale_bookings) == 0
+    assert Promotion.query.filter_by(code='WELCOME').one().redemption_count == 0
+    # Confirmed bookings are not touched even though their start date passed long ago
+    assert Booking.query.filter_by(status='confirmed').count() == len(stale_bookings)
+
+def test_batch_size_and_max_batches_bound_a_run(app, seed, stale_bookings, monkeypatch):
+    monkeypatch.setattr(sweeper, 'batch_size', 2)
+    monkeypatch.setattr(sweeper, 'max_batches', 3)
+
+    results = sweeper.run()
+
+    assert results['stale_bookings'] == 6
+    assert sweeper.stats()['tasks']['stale_bookings']['last_batches'] == 3
+    assert Booking.query.filter(Booking.id.in_(stale_bookings), Booking.status == 'pending').count() == len(stale_bookings) - 6
+
+    # The next run picks up where this one stopped
+    assert sweeper.run()['stale_bookings'] == 6
+    assert Booking.query.filter(Booking.id.in_(stale_bookings), Booking.status == 'pending').count() == 0
@@ -0,0 +1,161 @@
+"""Delta sync through GET /api/sync: cursors, tombstones, resets and scoping.
+
+SYNC_OVERLAP_SECONDS is 0 here, so a drained cursor starts at the request
+time and an incremental sync returns only what changed after it.
+"""
+from datetime import datetime, timedelta
+import pytest
+from flask_jwt_extended import create_access_token
+from config import TestingConfig
+from models import db, Apartment, Favorite, Notification, User
+from services.sync import encode_cursor
+from tests.conftest import SEED_ROWS
+
+@pytest.fixture(autouse=True)
+def no_overlap(monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'SYNC_OVERLAP_SECONDS', 0)
+
+def _sync(client, headers, cursor=None, **params):
+    if cursor:
+        params['cursor'] = cursor
+    response = client.get('/api/sync', headers=headers, query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+def _ids(delta, name):
+    return sorted(row['id'] for row in delta['changes'][name])
+
+def _full_sync(client, headers, **params):
+    """Every page of a sync from scratch, merged; returns (ids per entity, last cursor)"""
+    ids, cursor = {}, None
+    while True:
+        delta = _sync(client, headers, cursor, **params)
+        for name, rows in delta['changes'].items():
+            ids.setdefault(name, []).extend(row['id'] for row in rows)
+        cursor = delta['cursor']
+        if not delta['has_more']:
+            return ids, cursor
+
+def _headers_for(user):
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+def test_initial_sync_returns_everything_the_tenant_sees(client, seed):
+    delta = _sync(client, seed['headers']['tenant'])
+
+    assert delta['has_more'] is False
+    assert delta['reset'] is False
+    assert {name: len(rows) for name, rows in delta['changes'].items()} == {
+        'bookings': 2 * SEED_ROWS, 'payments': SEED_ROWS, 'notifications': SEED_ROWS, 'favorites': SEED_ROWS
+    }
+    assert delta['deleted'] == {'bookings': [], 'payments': [], 'notifications': [], 'favorites': []}
+
+def test_initial_sync_pages_with_the_limit(client, seed):
+    ids, _ = _full_sync(client, seed['headers']['tenant'], limit=5)
+
+    assert len(ids['bookings']) == len(set(ids['bookings'])) == 2 * SEED_ROWS
+    assert len(ids['favorites']) == len(set(ids['favorites'])) == SEED_ROWS
+
+def test_incremental_sync_returns_only_rows_changed_after_the_cursor(client, seed):
+    headers = seed['headers']['tenant']
+    cursor = _sync(client, headers)['cursor']
+
+    cancelled = seed['pending_bookings'][0]
+    assert client.post(f'/api/bookings/{cancelled}/cancel', headers=headers).status_code == 200
+    tenant = User.query.filter_by(username='tenant').one()
+    notification = Notification(user_id=tenant.id, title='Hello', message='New', type='system')
+    db.session.add(notification)
+    db.session.commit()
+
+    delta = _sync(client, headers, cursor)
+
+    assert _ids(delta, 'bookings') == [cancelled]
+    assert delta['changes']['bookings'][0]['status'] == 'cancelled'
+    assert notification.id in _ids(delta, 'notifications')
+    assert _ids(delta, 'payments') == _ids(delta, 'favorites') == []
+    # Nothing changed since
+    assert _sync(client, headers, delta['cursor'])['changes']['bookings'] == []
+
+def test_deletes_come_back_as_tombstones(client, seed):
+    headers = seed['headers']['tenant']
+    cursor = _sync(client, headers)['cursor']
+    notification_id = Notification.query.first().id
+    favorite_id = Favorite.query.filter_by(apartment_id=seed['apartments'][0]).one().id
+
+    assert client.delete(f'/api/notifications/{notification_id}', headers=headers).status_code == 200
+    assert client.delete(f"/api/apartments/{seed['apartments'][0]}/favorite", headers=headers).status_code == 200
+
+    delta = _sync(client, headers, cursor)
+
+    assert delta['deleted']['notifications'] == [notification_id]
+    assert delta['deleted']['favorites'] == [favorite_id]
+    assert _sync(client, headers, delta['cursor'])['deleted']['favorites'] == []
+
+def test_hard_deleted_apartment_tombstones_its_favorites(client, seed):
+    headers = seed['headers']['tenant']
+    owner = User.query.filter_by(username='owner').one()
+    apartment = Apartment(unit_number='B1', unit_type='studio', price_per_month=900, owner_id=owner.id)
+    db.session.add(apartment)
+    db.session.commit()
+    client.put(f'/api/apartments/{apartment.id}/favorite', headers=headers)
+    favorite_id = Favorite.query.filter_by(apartment_id=apartment.id).one().id
+    cursor = _sync(client, headers)['cursor']
+
+    response = client.delete(f'/api/apartments/{apartment.id}?action=delete', headers=seed['headers']['owner'])
+    assert response.status_code == 200
+
+    assert _sync(client, headers, cursor)['deleted']['favorites'] == [favorite_id]
+
+def test_archived_apartment_keeps_its_rows(client, seed):
+    headers = seed['headers']['tenant']
+    cursor = _sync(client, headers)['cursor']
+
+    response = client.delete(f"/api/apartments/{seed['apartments'][0]}?action=archive", headers=seed['headers']['owner'])
+    assert response.status_code == 200
+
+    # Archiving is a soft delete of the apartment: its bookings and favorites stay on the device
+    delta = _sync(client, headers, cursor)
+    assert all(ids == [] for ids in delta['deleted'].values())
+    ids, _ = _full_sync(client, headers)
+    assert len(ids['favorites']) == SEED_ROWS
+
+def test_cursor_older_than_tombstone_retention_resets(client, seed, app):
+    retention = app.config['SYNC_TOMBSTONE_RETENTION_DAYS']
+    stale = encode_cursor({
+        'bookings': (datetime.utcnow() - timedelta(days=retention + 1), 0),
+        'tombstones': (datetime.utcnow(), 0)
+    })
+
+    delta = _sync(client, seed['headers']['tenant'], stale)
+
+    assert delta['reset'] is True
+    assert len(delta['changes']['bookings']) == 2 * SEED_ROWS
+    assert len(delta['changes']['favorites']) == SEED_ROWS
+
+def test_malformed_cursor_is_400(client, seed):
+    response = client.get('/api/sync?cursor=not-a-cursor', headers=seed['headers']['tenant'])
+
+    assert response.status_code == 400
+
+def test_each_user_syncs_only_their_rows(client, seed):
+    owner = _sync(client, seed['headers']['owner'])
+    admin = _sync(client, seed['headers']['admin'])
+    other = User(username='other', email='other@example.com', password='x', role='tenant', full_name='Other')
+    db.session.add(other)
+    db.session.commit()
+    stranger = _sync(client, _headers_for(other))
+
+    # The owner sees bookings and payments of their units, not the tenant's notifications or favorites
+    assert (len(owner['changes']['bookings']), len(owner['changes']['payments'])) == (2 * SEED_ROWS, SEED_ROWS)
+    assert owner['changes']['notifications'] == owner['changes']['favorites'] == []
+    # The admin sees every booking and payment, but only their own notifications and favorites
+    assert (len(admin['changes']['bookings']), len(admin['changes']['payments'])) == (2 * SEED_ROWS, SEED_ROWS)
+    assert admin['changes']['notifications'] == admin['changes']['favorites'] == []
+    assert all(rows == [] for rows in stranger['changes'].values())
+
+def test_tombstones_are_scoped_to_the_user(client, seed):
+    owner_cursor = _sync(client, seed['headers']['owner'])['cursor']
+    notification_id = Notification.query.first().id
+
+    client.delete(f'/api/notifications/{notification_id}', headers=seed['headers']['tenant'])
+
+    assert _sync(client, seed['headers']['owner'], owner_cursor)['deleted']['notifications'] == []
@@ -6,6 +6,7 @@ from flask import current_app
 from functools import wraps
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
 from models import User, db
+import calendar
 import random
 import string
 
@@ -45,6 +46,20 @@ def generate_payment_code():
     random_str = ''.join(random.choices(string.digits, k=6))
     return f"PAY{date_str}{random_str}"
 
+def generate_invoice_code(booking_id, billing_period):
+    """Generate deterministic payment code for a monthly rent invoice"""
+    return f"INV{billing_period.strftime('%Y%m')}{booking_id:08d}"
+
+def generate_transaction_reference():
+    """Generate unique payment gateway transaction reference"""
+    return f"TRX{datetime.now().strftime('%Y%m%d')}{uuid.uuid4().hex[:12].upper()}"
+
+def generate_report_code():
+    """Generate unique report code"""
+    date_str = datetime.now().strftime('%Y%m%d')
+    random_str = ''.join(random.choices(string.digits, k=6))
+    return f"RPT{date_str}{random_str}"
+
 def calculate_total_amount(monthly_rent, total_months, deposit, utility_deposit=0, admin_fee=0):
     """Calculate total booking amount"""
     total = (monthly_rent * total_months) + deposit + utility_deposit + admin_fee
@@ -85,6 +100,8 @@ def paginate_query(query, page=1, per_page=10):
 def create_notification(user_id, title, message, notification_type='system', related_id=None):
     """Create notification for user"""
     from models import Notification
+    from services.notification_counters import unread_counter
+    from services.notification_stream import get_broker
     
     notification = Notification(
         user_id=user_id,
@@ -95,8 +112,85 @@ def create_notification(user_id, title, message, notification_type='system', rel
     )
     db.session.add(notification)
     db.session.commit()
+    
+    unread_counter.incr(user_id)
+    
+    # Push to connected clients; delivery is best effort, the row is already saved
+    try:
+        get_broker().publish(user_id, notification.to_dict())
+    except Exception as e:
+        current_app.logger.warning(f'Notification push failed: {e}')
     return notification
 
+def _insert_notification_rows(rows):
+    """INSERT notification rows in one statement and return them with their ids.
+
+    Dialects with multi-row RETURNING (SQLite, MariaDB, PostgreSQL) return the
+    inserted rows; rows with the same content are interchangeable, so the
+    order does not matter. MySQL has no RETURNING; a multi-row INSERT with a
+    known row count is a "simple insert" for which InnoDB reserves one
+    consecutive id block, so the ids are lastrowid .. lastrowid + rowcount - 1.
+    """
+    from sqlalchemy import insert
+    from models import Notification
+
+    table = Notification.__table__
+    columns = ('user_id', 'title', 'message', 'type', 'related_id')
+    if db.session.get_bind(mapper=Notification).dialect.insert_executemany_returning:
+        result = db.session.execute(insert(table).returning(table.c.id, *(table.c[name] for name in columns)), rows)
+        return [dict(row._mapping) for row in result]
+    result = db.session.execute(insert(table).values(rows))
+    return [
+        dict({name: row[name] for name in columns}, id=result.lastrowid + offset)
+        for offset, row in enumerate(rows)
+    ]
+
+def create_notifications(entries):
+    """Create many notifications in one transaction.
+
+    `entries` are dicts with the create_notification() keyword arguments.
+    The rows go in with a single INSERT that also yields their ids (see
+    _insert_notification_rows), so nothing is read back afterwards and rows
+    inserted concurrently with the same content are never taken for ours.
+    Commits the caller's pending changes together with the notifications,
+    then counts and pushes them. Returns the pushed payloads.
+    """
+    from services.notification_counters import unread_counter
+    from services.notification_stream import get_broker
+
+    if not entries:
+        return []
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            'user_id': entry['user_id'],
+            'title': entry['title'],
+            'message': entry['message'],
+            'type': entry.get('notification_type', 'system'),
+            'related_id': entry.get('related_id'),
+            'is_read': False,
+            'send_email': False,
+            'created_at': now,
+            'updated_at': now
+        }
+        for entry in entries
+    ]
+    payloads = [
+        dict(inserted, is_read=False, created_at=now.isoformat())
+        for inserted in _insert_notification_rows(rows)
+    ]
+    db.session.commit()
+
+    broker = get_broker()
+    for payload in payloads:
+        unread_counter.incr(payload['user_id'])
+        try:
+            broker.publish(payload['user_id'], payload)
+        except Exception as e:
+            current_app.logger.warning(f'Notification push failed: {e}')
+    return payloads
+
 def log_activity(user_id, action, entity_type, entity_id=None, old_data=None, new_data=None, ip_address=None, user_agent=None):
     """Log user activity"""
     from models import ActivityLog
@@ -123,6 +217,13 @@ def calculate_months_between(start_date, end_date):
     """Calculate number of months between two dates"""
     return (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
 
+def add_months(start_date, months):
+    """Add calendar months to a date, clamping the day to the end of the month"""
+    month_index = start_date.month - 1 + months
+    year = start_date.year + month_index // 12
+    month = month_index % 12 + 1
+    return start_date.replace(year=year, month=month, day=min(start_date.day, calendar.monthrange(year, month)[1]))
+
 def get_current_user():
     """Get current authenticated user"""
     verify_jwt_in_request()
@@ -149,11 +250,11 @@ def validate_dates(start_date, end_date):
     
     return errors
 
-def check_apartment_availability(apartment_id, start_date, end_date):
-    """Check if apartment is available for given date range"""
+def conflicting_bookings_query(apartment_id, start_date, end_date):
+    """Confirmed/active bookings of an apartment that overlap a date range"""
     from models import Booking
     
-    conflicting_bookings = Booking.query.filter(
+    return Booking.query.filter(
         Booking.apartment_id == apartment_id,
         Booking.status.in_(['confirmed', 'active']),
         db.or_(
@@ -161,6 +262,10 @@ def check_apartment_availability(apartment_id, start_date, end_date):
             db.and_(Booking.start_date <= end_date, Booking.end_date >= end_date),
             db.and_(Booking.start_date >= start_date, Booking.end_date <= end_date)
         )
-    ).first()
+    )
+
+def check_apartment_availability(apartment_id, start_date, end_date):
+    """Check if apartment is available for given date range"""
+    conflicting_bookings = conflicting_bookings_query(apartment_id, start_date, end_date).first()
     
     return conflicting_bookings is None
\ No newline at end of file
@@ -51,16 +51,20 @@ CREATE TABLE apartments (
     pet_friendly BOOLEAN DEFAULT FALSE,
     smoking_allowed BOOLEAN DEFAULT FALSE,
     availability_status ENUM('available', 'occupied') DEFAULT 'available',
+    is_archived BOOLEAN DEFAULT FALSE,
+    archived_at TIMESTAMP NULL,
     owner_id INT NOT NULL,
     total_views INT DEFAULT 0,
     total_inquiries INT DEFAULT 0,
     avg_rating DECIMAL(3,2) DEFAULT 0,
+    favorites_count INT NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE,
     INDEX idx_owner (owner_id),
     INDEX idx_availability (availability_status),
-    INDEX idx_unit_type (unit_type)
+    INDEX idx_unit_type (unit_type),
+    INDEX idx_favorites_count (favorites_count)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Table: bookings
@@ -76,6 +80,8 @@ CREATE TABLE bookings (
     deposit_paid DECIMAL(12,2),
     utility_deposit DECIMAL(12,2),
     admin_fee DECIMAL(12,2),
+    promotion_id INT,
+    discount_amount DECIMAL(12,2) DEFAULT 0,
     total_amount DECIMAL(12,2),
     status ENUM('pending', 'confirmed', 'active', 'completed', 'cancelled', 'rejected') DEFAULT 'pending',
     rejection_reason TEXT,
@@ -93,7 +99,10 @@ CREATE TABLE bookings (
     FOREIGN KEY (approved_by) REFERENCES users(id) ON DELETE SET NULL,
     INDEX idx_booking_code (booking_code),
     INDEX idx_status (status),
-    INDEX idx_dates (start_date, end_date)
+    INDEX idx_dates (start_date, end_date),
+    INDEX idx_status_start (status, start_date),
+    INDEX idx_apartment_status_dates (apartment_id, status, start_date, end_date),
+    INDEX idx_tenant_updated (tenant_id, updated_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Table: payments
@@ -104,9 +113,10 @@ CREATE TABLE payments (
     payment_type ENUM('deposit', 'monthly_rent', 'penalty', 'refund', 'utility'),
     amount DECIMAL(12,2) NOT NULL,
     payment_method ENUM('bank_transfer', 'credit_card', 'e_wallet', 'cash'),
-    payment_status ENUM('pending', 'completed', 'failed', 'refunded') DEFAULT 'pending',
+    payment_status ENUM('pending', 'verifying', 'completed', 'failed', 'refunded') DEFAULT 'pending',
     payment_date TIMESTAMP NULL,
     due_date DATE,
+    billing_period DATE,
     transaction_id VARCHAR(100),
     payment_gateway_ref VARCHAR(255),
     payment_gateway_response JSON,
@@ -116,7 +126,10 @@ CREATE TABLE payments (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (booking_id) REFERENCES bookings(id) ON DELETE CASCADE,
     INDEX idx_payment_code (payment_code),
-    INDEX idx_status (payment_status)
+    INDEX idx_status (payment_status),
+    INDEX idx_status_due (payment_status, due_date),
+    INDEX idx_booking_created (booking_id, created_at),
+    UNIQUE KEY uq_booking_type_period (booking_id, payment_type, billing_period)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Table: availability_calendar
@@ -190,7 +203,22 @@ CREATE TABLE reviews (
     FOREIGN KEY (booking_id) REFERENCES bookings(id) ON DELETE CASCADE,
     FOREIGN KEY (approved_by) REFERENCES users(id) ON DELETE SET NULL,
     INDEX idx_apartment (apartment_id),
-    INDEX idx_approved (is_approved)
+    INDEX idx_approved (is_approved),
+    INDEX idx_apartment_approved_created (apartment_id, is_approved, created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Table: apartment_rating_aggregates
+CREATE TABLE apartment_rating_aggregates (
+    apartment_id INT PRIMARY KEY,
+    rating_sum INT NOT NULL DEFAULT 0,
+    rating_count INT NOT NULL DEFAULT 0,
+    star_1 INT NOT NULL DEFAULT 0,
+    star_2 INT NOT NULL DEFAULT 0,
+    star_3 INT NOT NULL DEFAULT 0,
+    star_4 INT NOT NULL DEFAULT 0,
+    star_5 INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (apartment_id) REFERENCES apartments(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Table: favorites
@@ -201,7 +229,8 @@ CREATE TABLE favorites (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (apartment_id) REFERENCES apartments(id) ON DELETE CASCADE,
-    UNIQUE KEY unique_user_apartment (user_id, apartment_id)
+    UNIQUE KEY unique_user_apartment (user_id, apartment_id),
+    INDEX idx_user_favorited (user_id, created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Table: notifications
@@ -215,9 +244,13 @@ CREATE TABLE notifications (
     is_read BOOLEAN DEFAULT FALSE,
     send_email BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     INDEX idx_user (user_id),
-    INDEX idx_read (is_read)
+    INDEX idx_read (is_read),
+    INDEX idx_user_read_created (user_id, is_read, created_at),
+    INDEX idx_user_created (user_id, created_at),
+    INDEX idx_user_updated (user_id, updated_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Table: promotions
@@ -234,6 +267,7 @@ CREATE TABLE promotions (
     min_nights INT,
     active BOOLEAN DEFAULT TRUE,
     usage_limit INT,
+    redemption_count INT NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (apartment_id) REFERENCES apartments(id) ON DELETE CASCADE,
@@ -241,6 +275,23 @@ CREATE TABLE promotions (
     INDEX idx_active (active)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+ALTER TABLE bookings ADD FOREIGN KEY (promotion_id) REFERENCES promotions(id) ON DELETE SET NULL;
+
+-- Table: promotion_redemptions
+CREATE TABLE promotion_redemptions (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    promotion_id INT NOT NULL,
+    booking_id INT NOT NULL UNIQUE,
+    user_id INT NOT NULL,
+    status ENUM('reserved', 'released') NOT NULL DEFAULT 'reserved',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    released_at TIMESTAMP NULL,
+    FOREIGN KEY (promotion_id) REFERENCES promotions(id) ON DELETE CASCADE,
+    FOREIGN KEY (booking_id) REFERENCES bookings(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX idx_promotion_status (promotion_id, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Table: reports
 CREATE TABLE reports (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -286,7 +337,7 @@ CREATE TABLE payment_transactions (
     gateway_name VARCHAR(50) NOT NULL,
     gateway_transaction_id VARCHAR(255),
     amount DECIMAL(12,2) NOT NULL,
-    status ENUM('initiated', 'pending', 'success', 'failed', 'expired') NOT NULL,
+    status ENUM('initiated', 'pending', 'success', 'failed', 'expired', 'review') NOT NULL,
     payment_url VARCHAR(500),
     callback_data JSON,
     error_message TEXT,
@@ -295,5 +346,26 @@ CREATE TABLE payment_transactions (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (payment_id) REFERENCES payments(id) ON DELETE CASCADE,
-    INDEX idx_transaction_ref (transaction_reference)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
\ No newline at end of file
+    INDEX idx_transaction_ref (transaction_reference),
+    INDEX idx_status_expired (status, expired_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+-- Table: catalog_versions (bumped on every write to public catalog data; part of HTTP ETags)
+CREATE TABLE catalog_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT INTO catalog_versions (name, version) VALUES
+('apartments', 0), ('facilities', 0), ('promotions', 0), ('reviews', 0);
+
+-- Table: sync_tombstones (deleted bookings/payments/notifications/favorites for delta sync)
+CREATE TABLE sync_tombstones (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    entity_type VARCHAR(30) NOT NULL,
+    entity_id INT NOT NULL,
+    deleted_at DATETIME NOT NULL,
+    INDEX idx_user_deleted (user_id, deleted_at),
+    INDEX idx_deleted (deleted_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
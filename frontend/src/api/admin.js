@@ -1,5 +1,21 @@
 import api from './axios';
 
+// Occupancy and revenue reports are built as background report jobs: a 202
+// means the job is still running, so ask again until it has finished
+const REPORT_POLL_INTERVAL = 2000;
+const REPORT_POLL_ATTEMPTS = 30;
+
+const getReportJob = async (url, params = {}) => {
+  for (let attempt = 0; attempt < REPORT_POLL_ATTEMPTS; attempt += 1) {
+    const response = await api.get(url, { params });
+    if (response.status !== 202) {
+      return response.data;
+    }
+    await new Promise((resolve) => setTimeout(resolve, REPORT_POLL_INTERVAL));
+  }
+  throw new Error('Report is still being generated');
+};
+
 // Admin API calls
 export const adminAPI = {
   // Get admin dashboard stats
@@ -16,14 +32,12 @@ export const adminAPI = {
 
   // Get occupancy report
   getOccupancyReport: async () => {
-    const response = await api.get('/admin/reports/occupancy');
-    return response.data;
+    return getReportJob('/admin/reports/occupancy');
   },
 
   // Get revenue report
   getRevenueReport: async (params = {}) => {
-    const response = await api.get('/admin/reports/revenue', { params });
-    return response.data;
+    return getReportJob('/admin/reports/revenue', params);
   },
 
   // Get top apartments
@@ -1,6 +1,8 @@
 import { useEffect } from 'react';
 import { useNotificationStore } from '../stores/notificationStore';
 
+const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:5001/api';
+
 const useNotifications = () => {
   const {
     notifications,
@@ -14,11 +16,65 @@ const useNotifications = () => {
     deleteNotification,
     clearError
   } = useNotificationStore();
+  const addNotification = useNotificationStore((state) => state.addNotification);
 
   useEffect(() => {
     fetchUnreadCount();
-    const interval = setInterval(fetchUnreadCount, 60000); // Refresh every minute
-    return () => clearInterval(interval);
+
+    // Prefer the server-sent events stream; fall back to polling
+    let source = null;
+    let interval = null;
+    let retryTimer = null;
+    let retryDelay = 60000;
+    let closed = false;
+
+    const startPolling = () => {
+      if (!interval) {
+        interval = setInterval(fetchUnreadCount, 60000); // Refresh every minute
+      }
+    };
+
+    const connect = () => {
+      // Read the token on every attempt so a refreshed token is used
+      const token = localStorage.getItem('access_token');
+      if (closed || !token || typeof EventSource === 'undefined') {
+        startPolling();
+        return;
+      }
+
+      source = new EventSource(`${API_URL}/notifications/stream?token=${encodeURIComponent(token)}`);
+      source.addEventListener('open', () => {
+        retryDelay = 60000;
+        if (interval) {
+          clearInterval(interval);
+          interval = null;
+        }
+        fetchUnreadCount();
+      });
+      source.addEventListener('notification', (event) => {
+        addNotification(JSON.parse(event.data));
+      });
+      source.onerror = () => {
+        // Expired token (401), buffering proxy or server down: stop the
+        // browser's own endless retries, poll instead and reconnect later
+        source.close();
+        source = null;
+        startPolling();
+        // The count request refreshes an expired access token via the axios interceptor
+        fetchUnreadCount();
+        retryTimer = setTimeout(connect, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, 15 * 60000);
+      };
+    };
+
+    connect();
+
+    return () => {
+      closed = true;
+      if (source) source.close();
+      if (interval) clearInterval(interval);
+      if (retryTimer) clearTimeout(retryTimer);
+    };
   }, []);
 
   return {